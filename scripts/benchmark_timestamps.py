@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Timestamp Range Query Benchmark
+Compares the integer epoch-ms detections schema with the legacy TEXT timestamps
+"""
+
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from database.database_manager import legacy_epoch_ms
+
+DAY_SECONDS = 86400
+BATCH_SIZE = 100000
+
+def build_database(path: str, rows: int, days: int, seed: int) -> float:
+    """
+    Fill both schemas with the same detections spread over days
+
+    The legacy table mixes local-time ISO strings and epoch-second floats,
+    as databases written before schema version 2 did; the new table stores
+    the same instants as epoch milliseconds.
+
+    Returns:
+        The epoch second of the newest row, used as "now"
+    """
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE legacy (id INTEGER PRIMARY KEY, timestamp TEXT, confidence REAL);
+        CREATE TABLE epoch (id INTEGER PRIMARY KEY, timestamp INTEGER, confidence REAL);
+    ''')
+
+    rng = random.Random(seed)
+    now = time.time()
+    start = now - days * DAY_SECONDS
+    for offset in range(0, rows, BATCH_SIZE):
+        legacy_rows = []
+        epoch_rows = []
+        for index in range(offset, min(offset + BATCH_SIZE, rows)):
+            ts = start + rng.random() * days * DAY_SECONDS
+            confidence = rng.random()
+            # Alternate the two legacy encodings
+            legacy_ts = datetime.fromtimestamp(ts).isoformat() if index % 2 else str(ts)
+            legacy_rows.append((legacy_ts, confidence))
+            epoch_rows.append((int(ts * 1000), confidence))
+        connection.executemany('INSERT INTO legacy (timestamp, confidence) VALUES (?, ?)', legacy_rows)
+        connection.executemany('INSERT INTO epoch (timestamp, confidence) VALUES (?, ?)', epoch_rows)
+        connection.commit()
+
+    connection.execute('CREATE INDEX idx_legacy_timestamp ON legacy(timestamp)')
+    connection.execute('CREATE INDEX idx_epoch_timestamp ON epoch(timestamp)')
+    connection.execute('ANALYZE')
+    connection.commit()
+    connection.close()
+    return now
+
+def time_query(connection: sqlite3.Connection, sql: str, params: tuple, runs: int) -> tuple:
+    """
+    Run a query runs times
+
+    Returns:
+        (median milliseconds, first column of the first row)
+    """
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = connection.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+        result = rows[0][0] if rows else None
+    return statistics.median(timings), result
+
+def run_benchmark(path: str, now: float, runs: int):
+    """Time the range queries the dashboard issues against both schemas"""
+    connection = sqlite3.connect(path)
+
+    for days in (1, 7):
+        cutoff = now - days * DAY_SECONDS
+        cases = [
+            ('epoch-ms INTEGER, index range',
+             'SELECT COUNT(*) FROM epoch WHERE timestamp >= ?', (int(cutoff * 1000),)),
+            ('legacy TEXT vs ISO cutoff (misses epoch rows)',
+             'SELECT COUNT(*) FROM legacy WHERE timestamp >= ?', (datetime.fromtimestamp(cutoff).isoformat(),)),
+            ('legacy TEXT, per-row conversion',
+             f"SELECT COUNT(*) FROM legacy WHERE {legacy_epoch_ms('timestamp')} >= ?", (int(cutoff * 1000),))
+        ]
+        print(f"\nLast {days} day(s) COUNT:")
+        for label, sql, params in cases:
+            elapsed, count = time_query(connection, sql, params, runs)
+            print(f"  {label:<48} {elapsed:10.2f} ms  {count:>10,} rows")
+
+    print("\nLatest 100 rows (ORDER BY timestamp DESC LIMIT 100):")
+    for table in ('epoch', 'legacy'):
+        elapsed, _ = time_query(
+            connection, f'SELECT id FROM {table} ORDER BY timestamp DESC LIMIT 100', (), runs
+        )
+        print(f"  {table:<48} {elapsed:10.2f} ms")
+
+    print("\nQuery plans:")
+    for table in ('epoch', 'legacy'):
+        for row in connection.execute(f'EXPLAIN QUERY PLAN SELECT COUNT(*) FROM {table} WHERE timestamp >= ?', (0,)):
+            print(f"  {table}: {row[3]}")
+
+    connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark timestamp range queries on a large detections table")
+    parser.add_argument('--rows', type=int, default=10_000_000, help='Rows per schema (default: 10M)')
+    parser.add_argument('--days', type=int, default=365, help='Days the rows are spread over')
+    parser.add_argument('--runs', type=int, default=20, help='Runs per query; the median is reported')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated rows')
+    parser.add_argument('--db', help='Database file to build (default: a temporary file)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or str(Path(tmp) / 'benchmark.db')
+        Path(path).unlink(missing_ok=True)
+
+        print(f"Building {args.rows:,} rows per schema over {args.days} days in {path} ...")
+        start = time.perf_counter()
+        now = build_database(path, args.rows, args.days, args.seed)
+        print(f"Built in {time.perf_counter() - start:.1f} s")
+
+        run_benchmark(path, now, args.runs)
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,39 @@ import cv2
 import os
 import glob
 import time
+import threading
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from loguru import logger
 from utils.logger import LoggerMixin
+from camera.frame_deduplicator import FrameDeduplicator
+from camera.camera_source import CameraSource
+from camera.replay_source import ReplaySource
+from camera.frame_scheduler import WeightedFairScheduler
+from camera.capture_archiver import CaptureArchiver
+
+def load_frame_image(frame_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Fully decode a frame whose image was deferred by the camera manager
+    
+    Args:
+        frame_data: Frame returned by get_frames
+        
+    Returns:
+        The frame with 'image' set, or None if the file could not be decoded
+    """
+    if frame_data.get('image') is not None:
+        return frame_data
+    
+    image = cv2.imread(frame_data.get('file_path', ''))
+    if image is None:
+        logger.error(f"Failed to decode image {frame_data.get('file_path')}")
+        return None
+    
+    frame_data['image'] = image
+    frame_data.setdefault('metadata', {})['dimensions'] = image.shape
+    frame_data.pop('preview', None)
+    return frame_data
 
 class CameraManager(LoggerMixin):
     """Manages different camera sources and image capture"""
@@ -22,6 +51,30 @@ class CameraManager(LoggerMixin):
         self.phone_link_folder = config.get('phone_link', {}).get('capture_folder', 'data/captures')
         self.processed_files = set()
         
+        # Phone Link has no arrival notification, so its folder is polled; the
+        # glob only runs when the folder changed or a file was unreadable, and
+        # every full_scan_interval regardless, since a folder mtime with coarse
+        # resolution (FAT, SMB, some network mounts) can miss a new file
+        self.phone_link_poll_interval = config.get('phone_link', {}).get('poll_interval', 0.25)
+        self.phone_link_full_scan_interval = config.get('phone_link', {}).get('full_scan_interval', 5.0)
+        self.last_phone_link_scan = 0.0
+        self.last_phone_link_full_scan = 0.0
+        self.phone_link_mtime = None
+        self.phone_link_retry = False
+        
+        # Set by live sources as frames arrive so the producer can sleep until then
+        self.frame_event = threading.Event()
+        self.max_wait = config.get('max_wait', 1.0)  # bounds watchdog latency while idle
+        
+        # Near-duplicate frame suppression
+        self.deduplicator = FrameDeduplicator(config.get('dedup', {}))
+        
+        # Live camera sources share the detector budget through the scheduler
+        self.scheduler = WeightedFairScheduler(config.get('scheduler', {}))
+        
+        # Processed captures leave the watched folder once committed
+        self.archiver = CaptureArchiver(config.get('archive', {}))
+        
         self.logger.info("Initializing camera manager")
     
     def initialize(self):
@@ -34,13 +87,11 @@ class CameraManager(LoggerMixin):
             if self.config.get('phone_link', {}).get('enabled', True):
                 self._setup_phone_link()
             
-            # Initialize USB camera if enabled
-            if self.config.get('usb_camera', {}).get('enabled', False):
-                self._setup_usb_camera()
+            # Initialize capture archive
+            self.archiver.initialize()
             
-            # Initialize IP camera if enabled
-            if self.config.get('ip_camera', {}).get('enabled', False):
-                self._setup_ip_camera()
+            # Initialize live camera sources
+            self._setup_camera_sources()
             
             self.logger.info("Camera manager initialized successfully")
             
@@ -75,50 +126,60 @@ class CameraManager(LoggerMixin):
         self.logger.info("3. Take photos with your phone camera")
         self.logger.info("4. Photos will be automatically detected and processed")
     
-    def _setup_usb_camera(self):
-        """Setup USB camera"""
+    def _get_source_configs(self) -> List[Dict[str, Any]]:
+        """Collect live camera source configs, including the legacy usb/ip sections"""
+        source_configs = []
+        
+        # Stream supervision defaults apply to every source unless overridden
+        stream_config = self.config.get('stream', {})
+        
         usb_config = self.config.get('usb_camera', {})
-        device_id = usb_config.get('device_id', 0)
+        if usb_config.get('enabled', False):
+            source_configs.append({**stream_config, 'name': 'usb', 'type': 'usb', **usb_config})
         
-        try:
-            cap = cv2.VideoCapture(device_id)
-            if cap.isOpened():
-                # Set resolution
-                resolution = usb_config.get('resolution', [1920, 1080])
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
-                
-                # Set FPS
-                fps = usb_config.get('fps', 30)
-                cap.set(cv2.CAP_PROP_FPS, fps)
-                
-                self.cameras['usb'] = cap
-                self.logger.info(f"USB camera initialized (device {device_id})")
-            else:
-                self.logger.warning(f"Could not open USB camera (device {device_id})")
-                
-        except Exception as e:
-            self.logger.error(f"Failed to setup USB camera: {e}")
-    
-    def _setup_ip_camera(self):
-        """Setup IP camera"""
         ip_config = self.config.get('ip_camera', {})
-        url = ip_config.get('url', '')
+        if ip_config.get('enabled', False):
+            source_configs.append({**stream_config, 'name': 'ip', 'type': 'ip', **ip_config})
         
-        if not url:
-            self.logger.warning("IP camera URL not provided")
-            return
+        for index, source_config in enumerate(self.config.get('sources', []) or []):
+            if source_config.get('enabled', True):
+                source_configs.append({**stream_config, 'name': f"camera_{index}", **source_config})
         
-        try:
-            cap = cv2.VideoCapture(url)
-            if cap.isOpened():
-                self.cameras['ip'] = cap
-                self.logger.info(f"IP camera initialized: {url}")
-            else:
-                self.logger.warning(f"Could not open IP camera: {url}")
-                
-        except Exception as e:
-            self.logger.error(f"Failed to setup IP camera: {e}")
+        return source_configs
+    
+    def _setup_camera_sources(self):
+        """Setup all configured live camera sources"""
+        for source_config in self._get_source_configs():
+            name = source_config['name']
+            
+            if name in self.cameras:
+                self.logger.warning(f"Duplicate camera name ignored: {name}")
+                continue
+            
+            source_type = source_config.get('type', 'ip')
+            
+            if source_type == 'replay' and not source_config.get('path'):
+                self.logger.warning(f"Replay source {name} has no path - skipping")
+                continue
+            
+            if source_type in ('ip', 'rtsp') and not source_config.get('url'):
+                self.logger.warning(f"Camera {name} has no URL - skipping")
+                continue
+            
+            try:
+                if source_type == 'replay':
+                    camera = ReplaySource(name, source_config, on_frame=self.frame_event.set)
+                else:
+                    camera = CameraSource(name, source_config, on_frame=self.frame_event.set)
+                camera.start()
+                self.cameras[name] = camera
+                if source_config.get('dedup', False) and source_type != 'replay':
+                    self.deduplicator.sources.add(name)
+            except Exception as e:
+                self.logger.error(f"Failed to setup camera {name}: {e}")
+        
+        if self.cameras:
+            self.logger.info(f"{len(self.cameras)} live camera source(s) started")
     
     def get_frames(self) -> List[Dict[str, Any]]:
         """
@@ -133,25 +194,109 @@ class CameraManager(LoggerMixin):
         phone_frames = self._get_phone_link_frames()
         frames.extend(phone_frames)
         
-        # Get frames from USB camera
-        if 'usb' in self.cameras:
-            usb_frame = self._get_usb_frame()
-            if usb_frame:
-                frames.append(usb_frame)
+        # Restart streams whose decoder stopped producing frames
+        for camera in self.cameras.values():
+            camera.check_watchdog()
         
-        # Get frames from IP camera
-        if 'ip' in self.cameras:
-            ip_frame = self._get_ip_frame()
-            if ip_frame:
-                frames.append(ip_frame)
+        # Get frames from live cameras chosen by the fair scheduler
+        for camera in self.scheduler.select(list(self.cameras.values())):
+            live_frame = camera.take_frame()
+            if live_frame:
+                frames.append(live_frame)
         
-        return frames
+        # Drop bursts of near-identical photos from sources that opted in
+        unique_frames = []
+        for frame in frames:
+            if self.deduplicator.applies_to(frame) and self.deduplicator.is_duplicate(frame):
+                # Nothing will be inferred for a duplicate, so it is done already
+                self.commit_frame(frame)
+            else:
+                unique_frames.append(frame)
+        
+        return unique_frames
+    
+    def wait_for_frames(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a frame may be available from get_frames
+        
+        Wakes when a live source delivers a frame, when a throttled or scheduled
+        frame becomes due, when the Phone Link folder is next polled, or after
+        max_wait so stalled streams are still noticed by the watchdog.
+        
+        Args:
+            timeout: Upper bound on the wait in seconds (max_wait if None)
+            
+        Returns:
+            True if woken by a frame arrival or wake(), False on a timer
+        """
+        now = time.time()
+        delay = self.max_wait if timeout is None else min(timeout, self.max_wait)
+        
+        if self.config.get('phone_link', {}).get('enabled', True):
+            delay = min(delay, max(0.0, self.last_phone_link_scan + self.phone_link_poll_interval - now))
+        
+        for camera in self.cameras.values():
+            due = camera.time_until_ready(now)
+            if due is not None:
+                # A pending frame may also be waiting on the detector budget
+                delay = min(delay, max(due, self.scheduler.time_until_slot(now)))
+        
+        if delay <= 0:
+            return False
+        
+        woken = self.frame_event.wait(delay)
+        self.frame_event.clear()
+        return woken
+    
+    def wake(self):
+        """Interrupt a producer blocked in wait_for_frames"""
+        self.frame_event.set()
+    
+    def commit_frame(self, frame_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Mark a frame's results as committed and archive its capture file
+        
+        Args:
+            frame_data: Frame returned by get_frames
+            
+        Returns:
+            Archived path for Phone Link captures, None otherwise
+        """
+        file_path = frame_data.get('file_path')
+        if frame_data.get('source') != 'phone_link' or not file_path:
+            return None
+        
+        archived_path = self.archiver.archive(file_path, frame_data.get('timestamp'))
+        if archived_path:
+            # The file left the watched folder, so it no longer needs tracking
+            self.processed_files.discard(file_path)
+            frame_data['archived_path'] = archived_path
+        
+        return archived_path
+    
+    def lookup_capture(self, original_name: str) -> Optional[str]:
+        """Get the archived location of a capture by its original name"""
+        return self.archiver.lookup(original_name)
     
     def _get_phone_link_frames(self) -> List[Dict[str, Any]]:
         """Get new images from Phone Link folder"""
         frames = []
         
+        now = time.time()
+        if now - self.last_phone_link_scan < self.phone_link_poll_interval:
+            return frames
+        self.last_phone_link_scan = now
+        
         try:
+            # Skip the scan when no file was added since the last one, unless a full scan is due
+            mtime = os.stat(self.phone_link_folder).st_mtime_ns
+            full_scan_due = now - self.last_phone_link_full_scan >= self.phone_link_full_scan_interval
+            if mtime == self.phone_link_mtime and not self.phone_link_retry and not full_scan_due:
+                return frames
+            self.phone_link_mtime = mtime
+            self.phone_link_retry = False
+            self.last_phone_link_full_scan = now
+            
             # Look for new image files
             image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp']
             image_files = []
@@ -163,18 +308,19 @@ class CameraManager(LoggerMixin):
             for image_file in image_files:
                 if image_file not in self.processed_files:
                     try:
-                        # Read image
-                        image = cv2.imread(image_file)
-                        if image is not None:
+                        # Read a cheap reduced preview; the full decode happens in the decode stage
+                        preview = cv2.imread(image_file, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+                        if preview is not None:
                             frame_data = {
                                 'source': 'phone_link',
                                 'file_path': image_file,
-                                'image': image,
+                                'image': None,
+                                'preview': preview,
                                 'timestamp': time.time(),
+                                'captured_at': time.monotonic(),
                                 'metadata': {
                                     'filename': os.path.basename(image_file),
-                                    'size': os.path.getsize(image_file),
-                                    'dimensions': image.shape
+                                    'size': os.path.getsize(image_file)
                                 }
                             }
                             frames.append(frame_data)
@@ -183,8 +329,12 @@ class CameraManager(LoggerMixin):
                             
                             # Mark as processed
                             self.processed_files.add(image_file)
+                        else:
+                            # Probably still being written - look again next poll
+                            self.phone_link_retry = True
                             
                     except Exception as e:
+                        self.phone_link_retry = True
                         self.logger.error(f"Failed to process image {image_file}: {e}")
         
         except Exception as e:
@@ -192,57 +342,14 @@ class CameraManager(LoggerMixin):
         
         return frames
     
-    def _get_usb_frame(self) -> Optional[Dict[str, Any]]:
-        """Get frame from USB camera"""
-        try:
-            cap = self.cameras['usb']
-            ret, frame = cap.read()
-            
-            if ret:
-                return {
-                    'source': 'usb_camera',
-                    'image': frame,
-                    'timestamp': time.time(),
-                    'metadata': {
-                        'dimensions': frame.shape,
-                        'device_id': self.config.get('usb_camera', {}).get('device_id', 0)
-                    }
-                }
-        
-        except Exception as e:
-            self.logger.error(f"Error reading USB camera: {e}")
-        
-        return None
-    
-    def _get_ip_frame(self) -> Optional[Dict[str, Any]]:
-        """Get frame from IP camera"""
-        try:
-            cap = self.cameras['ip']
-            ret, frame = cap.read()
-            
-            if ret:
-                return {
-                    'source': 'ip_camera',
-                    'image': frame,
-                    'timestamp': time.time(),
-                    'metadata': {
-                        'dimensions': frame.shape,
-                        'url': self.config.get('ip_camera', {}).get('url', '')
-                    }
-                }
-        
-        except Exception as e:
-            self.logger.error(f"Error reading IP camera: {e}")
-        
-        return None
-    
-    def save_frame(self, frame_data: Dict[str, Any], filename: str = None) -> str:
+    def save_frame(self, frame_data: Dict[str, Any], filename: str = None, save_dir: str = None) -> str:
         """
         Save a frame to disk
         
         Args:
             frame_data: Frame data dictionary
             filename: Optional filename (auto-generated if None)
+            save_dir: Optional target folder (chosen by source if None)
             
         Returns:
             Path to saved file
@@ -254,10 +361,8 @@ class CameraManager(LoggerMixin):
             
             # Determine save path based on source
             source = frame_data.get('source', 'unknown')
-            if source == 'phone_link':
-                save_dir = self.phone_link_folder
-            else:
-                save_dir = 'data/processed'
+            if save_dir is None:
+                save_dir = self.phone_link_folder if source == 'phone_link' else 'data/processed'
             
             file_path = os.path.join(save_dir, filename)
             
@@ -277,13 +382,17 @@ class CameraManager(LoggerMixin):
             'phone_link_enabled': self.config.get('phone_link', {}).get('enabled', True),
             'phone_link_folder': self.phone_link_folder,
             'processed_files_count': len(self.processed_files),
-            'active_cameras': list(self.cameras.keys())
+            'active_cameras': list(self.cameras.keys()),
+            'dedup': self.deduplicator.get_stats(),
+            'archive': self.archiver.get_stats(),
+            'scheduler': self.scheduler.get_stats(),
+            'cameras': {}
         }
         
         # Add camera-specific status
         for camera_name, camera in self.cameras.items():
-            if hasattr(camera, 'isOpened'):
-                status[f'{camera_name}_connected'] = camera.isOpened()
+            status[f'{camera_name}_connected'] = camera.is_connected()
+            status['cameras'][camera_name] = camera.get_stats()
         
         return status
     
@@ -293,24 +402,32 @@ class CameraManager(LoggerMixin):
             # Check Phone Link folder
             phone_link_ok = os.path.exists(self.phone_link_folder)
             
-            # Check USB camera
-            usb_camera_ok = False
-            if 'usb' in self.cameras:
-                usb_camera_ok = self.cameras['usb'].isOpened()
+            # Check live cameras (connected and not stalled)
+            cameras_ok = {}
+            camera_issues = []
+            for name, camera in self.cameras.items():
+                camera.check_watchdog()
+                stats = camera.get_stats()
+                cameras_ok[name] = stats['connected']
+                if not stats['connected']:
+                    camera_issues.append(f"{name} disconnected (attempt {stats['reconnect_attempts']})")
             
-            # Check IP camera
-            ip_camera_ok = False
-            if 'ip' in self.cameras:
-                ip_camera_ok = self.cameras['ip'].isOpened()
+            overall_health = phone_link_ok or any(cameras_ok.values())
             
-            overall_health = phone_link_ok or usb_camera_ok or ip_camera_ok
+            if not overall_health:
+                message = 'No camera systems available'
+            elif camera_issues:
+                message = f"Camera issues: {', '.join(camera_issues)}"
+            else:
+                message = 'Camera systems operational'
             
             return {
                 'healthy': overall_health,
-                'message': 'Camera systems operational' if overall_health else 'No camera systems available',
+                'message': message,
                 'phone_link_ok': phone_link_ok,
-                'usb_camera_ok': usb_camera_ok,
-                'ip_camera_ok': ip_camera_ok
+                'usb_camera_ok': cameras_ok.get('usb', False),
+                'ip_camera_ok': cameras_ok.get('ip', False),
+                'cameras_ok': cameras_ok
             }
             
         except Exception as e:
@@ -327,8 +444,11 @@ class CameraManager(LoggerMixin):
         for camera_name, camera in self.cameras.items():
             try:
                 camera.release()
+                self.scheduler.remove_source(camera_name)
                 self.logger.info(f"Released {camera_name} camera")
             except Exception as e:
                 self.logger.error(f"Error releasing {camera_name} camera: {e}")
         
-        self.cameras.clear() 
\ No newline at end of file
+        self.cameras.clear()
+        
+        self.archiver.shutdown() 
\ No newline at end of file
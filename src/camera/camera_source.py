@@ -0,0 +1,353 @@
+"""
+Camera Source for Iron Dome for Mosquitoes
+Reads a single live camera stream (USB, IP or RTSP) on its own capture thread
+"""
+
+import cv2
+import time
+import random
+import threading
+from typing import Dict, Any, Optional, Callable
+from utils.logger import LoggerMixin
+
+class CameraSource(LoggerMixin):
+    """A supervised live camera stream that keeps only its latest frame"""
+
+    def __init__(self, name: str, config: Dict[str, Any], on_frame: Optional[Callable[[], None]] = None):
+        super().__init__()
+        self.name = name
+        self.config = config
+        self.on_frame = on_frame  # called from the reader thread when a frame arrives
+        self.type = config.get('type', 'ip')
+        self.device = config.get('device_id', 0) if self.type == 'usb' else config.get('url', '')
+        self.target_fps = float(config.get('fps', 5))
+        self.weight = float(config.get('weight', 1.0))
+        self.resolution = config.get('resolution')
+
+        # Stream supervision settings
+        self.buffer_size = config.get('buffer_size', 1)
+        self.max_frame_age = config.get('max_frame_age', 2.0)  # seconds, 0 = never drop
+        self.stall_timeout = config.get('stall_timeout', 10.0)
+        self.open_timeout = config.get('open_timeout', 10.0)
+        self.max_read_failures = config.get('max_read_failures', 20)
+        self.reconnect_initial_delay = config.get('reconnect_initial_delay', 1.0)
+        self.reconnect_max_delay = config.get('reconnect_max_delay', 60.0)
+
+        # Capture state
+        self.capture = None
+        self.connected = False
+        self.running = False
+        self.thread = None
+        self.generation = 0
+        self.reconnect_attempts = 0
+        self.connected_at = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        # Latest frame slot (overwritten by the reader, taken by the scheduler)
+        self.latest_frame = None
+        self.last_delivery = 0.0
+
+        # Per-camera metrics
+        self.stats = {
+            'frames_read': 0,
+            'frames_delivered': 0,
+            'frames_overwritten': 0,
+            'frames_stale': 0,
+            'read_errors': 0,
+            'reconnects': 0,
+            'stalls': 0,
+            'total_lag': 0.0,
+            'max_lag': 0.0,
+            'last_frame_time': None,
+            'started_at': None
+        }
+
+    def start(self):
+        """Start the capture thread (the stream is opened on that thread)"""
+        if self.running:
+            return
+
+        self.running = True
+        self.stop_event.clear()
+        self.stats['started_at'] = time.time()
+        self._start_reader()
+        self.logger.info(f"Camera source {self.name} started ({self.type}: {self.device})")
+
+    def _start_reader(self):
+        """Start a reader thread for a new capture generation"""
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+
+        self.thread = threading.Thread(
+            target=self._reader_loop,
+            args=(generation,),
+            name=f"camera-{self.name}-{generation}",
+            daemon=True
+        )
+        self.thread.start()
+
+    def _is_current(self, generation: int) -> bool:
+        """Check if a reader thread still owns the stream"""
+        return self.running and generation == self.generation
+
+    def _open(self) -> Optional[Any]:
+        """Open the underlying video capture"""
+        try:
+            params = []
+            if self.type != 'usb':
+                # Bound how long a dead host can block open() and read()
+                timeout_ms = int(self.open_timeout * 1000)
+                if hasattr(cv2, 'CAP_PROP_OPEN_TIMEOUT_MSEC'):
+                    params += [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms]
+                if hasattr(cv2, 'CAP_PROP_READ_TIMEOUT_MSEC'):
+                    params += [cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+
+            if params:
+                capture = cv2.VideoCapture(self.device, cv2.CAP_ANY, params)
+            else:
+                capture = cv2.VideoCapture(self.device)
+
+            if not capture.isOpened():
+                capture.release()
+                self.logger.warning(f"Could not open camera {self.name}: {self.device}")
+                return None
+
+            # Keep the driver queue short so reads return fresh frames
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+            if self.resolution:
+                capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+                capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+            if self.type == 'usb':
+                capture.set(cv2.CAP_PROP_FPS, self.target_fps)
+
+            return capture
+
+        except Exception as e:
+            self.logger.error(f"Failed to open camera {self.name}: {e}")
+            return None
+
+    def _get_backoff_delay(self) -> float:
+        """Exponential reconnect delay with jitter"""
+        delay = min(
+            self.reconnect_max_delay,
+            self.reconnect_initial_delay * (2 ** max(self.reconnect_attempts - 1, 0))
+        )
+        # Equal jitter keeps a floor while spreading out cameras that failed together
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _wait_before_reconnect(self):
+        """Back off before the next connection attempt"""
+        self.reconnect_attempts += 1
+        delay = self._get_backoff_delay()
+        self.logger.info(
+            f"Reconnecting camera {self.name} in {delay:.1f}s "
+            f"(attempt {self.reconnect_attempts})"
+        )
+        self.stop_event.wait(delay)
+
+    def _reader_loop(self, generation: int):
+        """Connect, read and reconnect until stopped or superseded"""
+        capture = None
+        read_failures = 0
+
+        while self._is_current(generation):
+            try:
+                if capture is None:
+                    capture = self._open()
+                    if capture is None:
+                        self._wait_before_reconnect()
+                        continue
+
+                    if not self._is_current(generation):
+                        break
+
+                    if self.reconnect_attempts or self.stats['frames_read']:
+                        self.stats['reconnects'] += 1
+                    self.capture = capture
+                    self.connected = True
+                    self.connected_at = time.time()
+                    read_failures = 0
+                    self.logger.info(f"Camera {self.name} connected: {self.device}")
+
+                ret, image = capture.read()
+
+                if not self._is_current(generation):
+                    break
+
+                if not ret:
+                    self.stats['read_errors'] += 1
+                    read_failures += 1
+                    if read_failures >= self.max_read_failures:
+                        self.logger.warning(f"Camera {self.name} stopped returning frames - reconnecting")
+                        capture = self._close(capture)
+                        self._wait_before_reconnect()
+                    else:
+                        self.stop_event.wait(0.05)
+                    continue
+
+                read_failures = 0
+                self.reconnect_attempts = 0
+
+                frame_data = {
+                    'source': f"{self.type}_camera",
+                    'camera_id': self.name,
+                    'image': image,
+                    'timestamp': time.time(),
+                    'captured_at': time.monotonic(),
+                    'metadata': {
+                        'dimensions': image.shape,
+                        'device': self.device
+                    }
+                }
+
+                with self.lock:
+                    if self.latest_frame is not None:
+                        self.stats['frames_overwritten'] += 1
+                    self.latest_frame = frame_data
+                    self.stats['frames_read'] += 1
+                    self.stats['last_frame_time'] = frame_data['timestamp']
+
+                if self.on_frame:
+                    self.on_frame()
+
+            except Exception as e:
+                self.stats['read_errors'] += 1
+                self.logger.error(f"Error reading camera {self.name}: {e}")
+                capture = self._close(capture)
+                self._wait_before_reconnect()
+
+        # A superseded reader releases only its own capture
+        if capture is not None:
+            capture.release()
+
+    def _close(self, capture: Any) -> None:
+        """Release a capture owned by the calling reader thread"""
+        self.connected = False
+        if capture is not None:
+            try:
+                capture.release()
+            except Exception as e:
+                self.logger.error(f"Error releasing camera {self.name}: {e}")
+        return None
+
+    def check_watchdog(self, now: Optional[float] = None) -> bool:
+        """
+        Detect a stalled decoder and restart the stream
+
+        A reader blocked inside read() cannot notice the stall itself, so the
+        watchdog abandons that thread and starts a fresh reader with a new
+        capture; the old thread exits as soon as read() returns.
+
+        Returns:
+            True if the stream was restarted
+        """
+        if not self.running or not self.connected or self.stall_timeout <= 0:
+            return False
+
+        if now is None:
+            now = time.time()
+
+        last_activity = max(self.stats['last_frame_time'] or 0, self.connected_at or 0)
+        if now - last_activity < self.stall_timeout:
+            return False
+
+        self.stats['stalls'] += 1
+        self.connected = False
+        self.logger.warning(
+            f"Camera {self.name} stalled (no frame for {now - last_activity:.1f}s) - restarting stream"
+        )
+        self._start_reader()
+        return True
+
+    def is_ready(self, now: Optional[float] = None) -> bool:
+        """Check if a new frame is available and the target FPS allows delivering it"""
+        if now is None:
+            now = time.time()
+
+        with self.lock:
+            if self.latest_frame is None:
+                return False
+
+        return self.target_fps <= 0 or now - self.last_delivery >= 1.0 / self.target_fps
+
+    def time_until_ready(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the pending frame may be delivered, or None if no frame is pending"""
+        if now is None:
+            now = time.time()
+
+        with self.lock:
+            if self.latest_frame is None:
+                return None
+
+        if self.target_fps <= 0:
+            return 0.0
+        return max(0.0, self.last_delivery + 1.0 / self.target_fps - now)
+
+    def take_frame(self) -> Optional[Dict[str, Any]]:
+        """Take the latest frame, leaving the slot empty; frames older than max_frame_age are dropped"""
+        with self.lock:
+            frame_data = self.latest_frame
+            self.latest_frame = None
+
+        if frame_data is None:
+            return None
+
+        now = time.time()
+        lag = now - frame_data['timestamp']
+
+        if self.max_frame_age and lag > self.max_frame_age:
+            self.stats['frames_stale'] += 1
+            return None
+
+        self.last_delivery = now
+        self.stats['frames_delivered'] += 1
+        self.stats['total_lag'] += lag
+        self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+
+        return frame_data
+
+    def is_connected(self) -> bool:
+        """Check if the stream is open and delivering"""
+        return self.connected and self.capture is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get throughput, lag and supervision metrics for this camera"""
+        now = time.time()
+        elapsed = now - self.stats['started_at'] if self.stats['started_at'] else 0
+        delivered = self.stats['frames_delivered']
+        last_frame_time = self.stats['last_frame_time']
+
+        return {
+            'type': self.type,
+            'connected': self.is_connected(),
+            'target_fps': self.target_fps,
+            'weight': self.weight,
+            'frames_read': self.stats['frames_read'],
+            'frames_delivered': delivered,
+            'frames_overwritten': self.stats['frames_overwritten'],
+            'frames_stale': self.stats['frames_stale'],
+            'read_errors': self.stats['read_errors'],
+            'reconnects': self.stats['reconnects'],
+            'reconnect_attempts': self.reconnect_attempts,
+            'stalls': self.stats['stalls'],
+            'read_fps': round(self.stats['frames_read'] / elapsed, 2) if elapsed > 0 else 0.0,
+            'delivered_fps': round(delivered / elapsed, 2) if elapsed > 0 else 0.0,
+            'avg_lag_ms': round(self.stats['total_lag'] / delivered * 1000, 1) if delivered else 0.0,
+            'max_lag_ms': round(self.stats['max_lag'] * 1000, 1),
+            'last_frame_time': last_frame_time,
+            'seconds_since_frame': round(now - last_frame_time, 1) if last_frame_time else None
+        }
+
+    def release(self):
+        """Stop the capture thread and release the stream"""
+        self.running = False
+        self.stop_event.set()
+
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+
+        self.capture = None
+        self.connected = False
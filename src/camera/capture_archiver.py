@@ -0,0 +1,161 @@
+"""
+Capture Archiver for Iron Dome for Mosquitoes
+Moves processed captures out of the watched folder into date-sharded archive directories
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from utils.logger import LoggerMixin
+
+class CaptureArchiver(LoggerMixin):
+    """Archives processed capture files and keeps a lookup from original name to archived location"""
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.archive_folder = config.get('archive_folder', 'data/archive')
+        self.index_path = config.get('index_path', os.path.join(self.archive_folder, 'index.db'))
+
+        self.connection = None
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'archived': 0,
+            'failed': 0
+        }
+
+        self.logger.info(f"Capture archiver initialized (enabled: {self.enabled}, folder: {self.archive_folder})")
+
+    def initialize(self):
+        """Create the archive folder and open the lookup index"""
+        if not self.enabled:
+            return
+
+        try:
+            Path(self.archive_folder).mkdir(parents=True, exist_ok=True)
+
+            self.connection = sqlite3.connect(self.index_path, check_same_thread=False, timeout=30)
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS archived_captures (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    original_name TEXT NOT NULL,
+                    original_path TEXT NOT NULL,
+                    archived_path TEXT NOT NULL,
+                    archived_at TEXT NOT NULL
+                )
+            ''')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS idx_archived_original_name ON archived_captures(original_name)'
+            )
+            self.connection.commit()
+
+            self.logger.info(f"Capture archive index opened: {self.index_path}")
+
+        except Exception as e:
+            self.logger.error(f"Failed to initialize capture archiver: {e}")
+            raise
+
+    def _get_shard_dir(self, timestamp: float) -> Path:
+        """Get the date-sharded directory for a capture time (YYYY/MM/DD)"""
+        date = datetime.fromtimestamp(timestamp)
+        return Path(self.archive_folder) / date.strftime('%Y') / date.strftime('%m') / date.strftime('%d')
+
+    def archive(self, file_path: str, timestamp: Optional[float] = None) -> Optional[str]:
+        """
+        Move a processed capture into the archive
+
+        Args:
+            file_path: Path of the capture in the watched folder
+            timestamp: Capture time used for sharding (file mtime if None)
+
+        Returns:
+            Archived path, or None if the file could not be archived
+        """
+        if not self.enabled or self.connection is None:
+            return None
+
+        try:
+            if not os.path.exists(file_path):
+                return None
+
+            if timestamp is None:
+                timestamp = os.path.getmtime(file_path)
+
+            shard_dir = self._get_shard_dir(timestamp)
+            shard_dir.mkdir(parents=True, exist_ok=True)
+
+            original_name = os.path.basename(file_path)
+            target = shard_dir / original_name
+
+            # Phone Link reuses names across days; keep every copy
+            counter = 1
+            while target.exists():
+                target = shard_dir / f"{Path(original_name).stem}_{counter}{Path(original_name).suffix}"
+                counter += 1
+
+            shutil.move(file_path, target)
+
+            with self.lock:
+                self.connection.execute('''
+                    INSERT INTO archived_captures (original_name, original_path, archived_path, archived_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (original_name, file_path, str(target), datetime.now().isoformat()))
+                self.connection.commit()
+
+            self.stats['archived'] += 1
+            self.logger.debug(f"Archived capture {original_name} -> {target}")
+            return str(target)
+
+        except Exception as e:
+            self.stats['failed'] += 1
+            self.logger.error(f"Failed to archive capture {file_path}: {e}")
+            return None
+
+    def lookup(self, original_name: str) -> Optional[str]:
+        """
+        Find where a capture was archived
+
+        Args:
+            original_name: File name (or path) the capture had in the watched folder
+
+        Returns:
+            Most recently archived path, or None if the capture was never archived
+        """
+        if self.connection is None:
+            return None
+
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    'SELECT archived_path FROM archived_captures WHERE original_name = ? ORDER BY id DESC LIMIT 1',
+                    (os.path.basename(original_name),)
+                ).fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            self.logger.error(f"Failed to look up archived capture {original_name}: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get archival counters"""
+        return {
+            'enabled': self.enabled,
+            'archive_folder': self.archive_folder,
+            'archived': self.stats['archived'],
+            'failed': self.stats['failed']
+        }
+
+    def shutdown(self):
+        """Close the lookup index"""
+        try:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+        except Exception as e:
+            self.logger.error(f"Error closing capture archive index: {e}")
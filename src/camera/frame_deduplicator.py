@@ -0,0 +1,171 @@
+"""
+Frame Deduplicator for Iron Dome for Mosquitoes
+Suppresses near-duplicate frames using perceptual hashing
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Dict, Any
+
+import cv2
+import numpy as np
+from utils.logger import LoggerMixin
+
+
+def compute_dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Compute a difference hash (dHash) of an image
+
+    Args:
+        image: BGR or grayscale image as numpy array
+        hash_size: Hash width/height, producing hash_size * hash_size bits
+
+    Returns:
+        Perceptual hash as an integer
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # Downscale first so hashing cost does not depend on the source resolution
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return bin(hash_a ^ hash_b).count('1')
+
+
+class FrameDeduplicator(LoggerMixin):
+    """
+    Drops frames that are near-duplicates of a recent frame from the same source
+
+    Deduplication is opt-in per source and by default only covers Phone Link
+    stills, where a burst of near-identical photos is common. An 8x8 hash
+    barely changes for a mosquito a few pixels wide, so a static live view
+    would only be inferred once per window; live cameras are deduplicated
+    only when listed in sources (or configured with dedup: true). Replays
+    are never deduplicated.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.hash_size = config.get('hash_size', 8)
+        self.max_distance = config.get('max_distance', 4)
+        self.window_size = config.get('window_size', 32)
+        self.window_seconds = config.get('window_seconds', 30)
+        # Frame sources or camera names deduplicated
+        self.sources = set(config.get('sources', ['phone_link']))
+
+        # Recent hashes per source: deque of (hash, timestamp, reference)
+        self.recent = {}
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'frames_checked': 0,
+            'duplicates': 0,
+            'per_source': {}
+        }
+
+        self.logger.info(
+            f"Frame deduplicator initialized (enabled: {self.enabled}, "
+            f"max distance: {self.max_distance}, sources: {', '.join(sorted(self.sources)) or 'none'})"
+        )
+
+    def applies_to(self, frame: Dict[str, Any]) -> bool:
+        """Check if a frame's source opted in to deduplication"""
+        if not self.enabled or frame.get('source') == 'replay':
+            return False
+        return frame.get('source') in self.sources or frame.get('camera_id') in self.sources
+
+    def is_duplicate(self, frame: Dict[str, Any]) -> bool:
+        """
+        Check a frame against recent frames from the same source and remember it
+
+        Args:
+            frame: Frame data dictionary
+
+        Returns:
+            True if the frame is within the Hamming threshold of a recent frame
+        """
+        # Prefer the reduced preview when the full decode was deferred
+        image = frame.get('preview')
+        if image is None:
+            image = frame.get('image')
+        if image is None:
+            return False
+
+        try:
+            frame_hash = compute_dhash(image, self.hash_size)
+        except Exception as e:
+            self.logger.error(f"Failed to hash frame: {e}")
+            return False
+
+        source = self._get_source_key(frame)
+        reference = self._get_reference(frame)
+        now = time.time()
+
+        with self.lock:
+            history = self.recent.setdefault(source, deque(maxlen=self.window_size))
+            source_stats = self.stats['per_source'].setdefault(
+                source, {'frames_checked': 0, 'duplicates': 0}
+            )
+
+            # Expire old entries so every source is re-inferred at least once per window
+            while history and now - history[0][1] > self.window_seconds:
+                history.popleft()
+
+            self.stats['frames_checked'] += 1
+            source_stats['frames_checked'] += 1
+
+            for known_hash, _, known_reference in history:
+                if hamming_distance(frame_hash, known_hash) <= self.max_distance:
+                    self.stats['duplicates'] += 1
+                    source_stats['duplicates'] += 1
+                    frame['duplicate_of'] = known_reference
+                    self.logger.debug(f"Duplicate frame from {source} (matches {known_reference})")
+                    return True
+
+            history.append((frame_hash, now, reference))
+            frame['phash'] = frame_hash
+
+        return False
+
+    def _get_source_key(self, frame: Dict[str, Any]) -> str:
+        """Get the key used to group frames by camera"""
+        return frame.get('camera_id') or frame.get('source', 'unknown')
+
+    def _get_reference(self, frame: Dict[str, Any]) -> str:
+        """Get a stable reference for a frame (file path or source and timestamp)"""
+        if frame.get('file_path'):
+            return frame['file_path']
+        return f"{self._get_source_key(frame)}@{frame.get('timestamp', time.time()):.3f}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get deduplication hit rates"""
+        with self.lock:
+            checked = self.stats['frames_checked']
+            duplicates = self.stats['duplicates']
+
+            per_source = {}
+            for source, source_stats in self.stats['per_source'].items():
+                source_checked = source_stats['frames_checked']
+                per_source[source] = {
+                    'frames_checked': source_checked,
+                    'duplicates': source_stats['duplicates'],
+                    'hit_rate': round(source_stats['duplicates'] / source_checked, 3) if source_checked else 0.0
+                }
+
+            return {
+                'enabled': self.enabled,
+                'sources': sorted(self.sources),
+                'frames_checked': checked,
+                'duplicates': duplicates,
+                'hit_rate': round(duplicates / checked, 3) if checked else 0.0,
+                'per_source': per_source
+            }
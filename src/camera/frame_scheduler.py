@@ -0,0 +1,111 @@
+"""
+Frame Scheduler for Iron Dome for Mosquitoes
+Shares the detector budget fairly across live camera sources
+"""
+
+import time
+import threading
+from typing import List, Dict, Any, Optional
+from utils.logger import LoggerMixin
+
+class WeightedFairScheduler(LoggerMixin):
+    """
+    Weighted fair scheduler (stride scheduling) over camera sources
+
+    Every source has a virtual pass value that advances by 1 / weight each time
+    it is given a detector slot. The ready source with the lowest pass is served
+    next, so over time each camera receives slots in proportion to its weight
+    and a camera that has no frames simply stops consuming budget.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.budget_fps = float(config.get('budget_fps', 0))  # 0 = unlimited
+        self.max_batch = int(config.get('max_batch', 8))
+
+        self.passes = {}
+        self.virtual_time = 0.0
+        self.tokens = float(self.max_batch)
+        self.last_refill = time.time()
+        self.lock = threading.Lock()
+
+        self.logger.info(
+            f"Frame scheduler initialized (budget: {self.budget_fps or 'unlimited'} fps, "
+            f"max batch: {self.max_batch})"
+        )
+
+    def _refill(self, now: float):
+        """Replenish the detector budget token bucket"""
+        if self.budget_fps <= 0:
+            self.tokens = float(self.max_batch)
+            return
+
+        self.tokens = min(
+            float(self.max_batch),
+            self.tokens + (now - self.last_refill) * self.budget_fps
+        )
+        self.last_refill = now
+
+    def select(self, sources: List[Any]) -> List[Any]:
+        """
+        Pick which ready sources get a detector slot this cycle
+
+        Args:
+            sources: Candidate sources exposing name, weight and is_ready()
+
+        Returns:
+            Sources to take a frame from, in service order
+        """
+        now = time.time()
+
+        with self.lock:
+            self._refill(now)
+
+            ready = [source for source in sources if source.is_ready(now)]
+            if not ready:
+                return []
+
+            # Sources joining (or returning from an outage) start at the current
+            # virtual time so they cannot claim a burst of accumulated credit
+            for source in ready:
+                self.passes[source.name] = max(self.passes.get(source.name, self.virtual_time), self.virtual_time)
+
+            selected = []
+            while ready and self.tokens >= 1.0:
+                source = min(ready, key=lambda s: self.passes[s.name])
+                ready.remove(source)
+                selected.append(source)
+
+                self.virtual_time = self.passes[source.name]
+                self.passes[source.name] += 1.0 / max(source.weight, 1e-6)
+                self.tokens -= 1.0
+
+            return selected
+
+    def time_until_slot(self, now: Optional[float] = None) -> float:
+        """Seconds until the budget allows the next detector slot"""
+        if now is None:
+            now = time.time()
+
+        with self.lock:
+            self._refill(now)
+            if self.tokens >= 1.0:
+                return 0.0
+            return (1.0 - self.tokens) / self.budget_fps
+
+    def remove_source(self, name: str):
+        """Forget the scheduling state of a source"""
+        with self.lock:
+            self.passes.pop(name, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler state"""
+        with self.lock:
+            return {
+                'budget_fps': self.budget_fps,
+                'max_batch': self.max_batch,
+                'available_tokens': round(self.tokens, 2),
+                'virtual_time': round(self.virtual_time, 3),
+                'passes': {name: round(value, 3) for name, value in self.passes.items()}
+            }
@@ -0,0 +1,256 @@
+"""
+Replay Source for Iron Dome for Mosquitoes
+Streams a recorded video file or image folder through the pipeline at a controlled rate
+"""
+
+import os
+import cv2
+import glob
+import time
+import queue
+import threading
+from typing import List, Dict, Any, Optional, Callable
+from utils.logger import LoggerMixin
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+class ReplaySource(LoggerMixin):
+    """
+    Deterministic replay of a recorded dataset
+
+    Frame N always carries the timestamp start_timestamp + N / fps, regardless
+    of replay speed or pipeline load, so two runs over the same dataset produce
+    identical frame streams. Speed 1.0 replays in real time, N replays N times
+    faster and 0 replays as fast as the pipeline consumes frames. Frames are
+    never dropped: a slow pipeline applies backpressure and the delay is
+    reported as lag. Replay frames bypass deduplication and load shedding,
+    and their detections are stamped with the frame timestamp.
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any], on_frame: Optional[Callable[[], None]] = None):
+        super().__init__()
+        self.name = name
+        self.config = config
+        self.on_frame = on_frame  # called from the decoder thread when a frame is queued
+        self.type = 'replay'
+        self.path = config.get('path', '')
+        self.speed = float(config.get('speed', 1.0))
+        self.fps = float(config.get('fps', 0))  # 0 = use the video's native rate
+        self.loop = config.get('loop', False)
+        self.start_timestamp = float(config.get('start_timestamp', 0.0))
+        self.weight = float(config.get('weight', 1.0))
+        self.prefetch = config.get('prefetch', 8)
+        self.late_threshold = config.get('late_threshold', 0.1)  # seconds behind schedule
+
+        # The scheduler paces by is_ready(), so no extra FPS gating is applied
+        self.target_fps = 0
+
+        self.frame_queue = queue.Queue(maxsize=self.prefetch)
+        self.running = False
+        self.finished = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.replay_started = None
+        self.next_frame = None
+
+        self.stats = {
+            'frames_decoded': 0,
+            'frames_delivered': 0,
+            'frames_late': 0,
+            'total_lag': 0.0,
+            'max_lag': 0.0,
+            'loops': 0,
+            'last_delivery': None
+        }
+
+    def start(self):
+        """Start decoding the dataset ahead of the pipeline"""
+        if self.running:
+            return
+
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._decoder_loop, name=f"replay-{self.name}", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Replay source {self.name} started: {self.path} (speed: {self.speed or 'max'})")
+
+    def _list_images(self) -> List[str]:
+        """List the images of a folder dataset in a stable order"""
+        files = []
+        for pattern in ('*', '*/*'):
+            files.extend(glob.glob(os.path.join(self.path, pattern)))
+        return sorted(f for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+
+    def _iterate_frames(self):
+        """Yield (image, native_fps, origin) for one pass over the dataset"""
+        if os.path.isdir(self.path):
+            fps = self.fps or 1.0
+            for image_file in self._list_images():
+                image = cv2.imread(image_file)
+                if image is not None:
+                    yield image, fps, image_file
+            return
+
+        capture = cv2.VideoCapture(self.path)
+        if not capture.isOpened():
+            self.logger.error(f"Could not open replay file: {self.path}")
+            return
+
+        try:
+            fps = self.fps or capture.get(cv2.CAP_PROP_FPS) or 25.0
+            while not self.stop_event.is_set():
+                ret, image = capture.read()
+                if not ret:
+                    break
+                yield image, fps, self.path
+        finally:
+            capture.release()
+
+    def _decoder_loop(self):
+        """Decode frames and assign deterministic offsets"""
+        index = 0
+        offset = 0.0
+
+        try:
+            while self.running:
+                frames_in_pass = 0
+
+                for image, fps, origin in self._iterate_frames():
+                    frame_data = {
+                        'source': 'replay',
+                        'camera_id': self.name,
+                        'image': image,
+                        'timestamp': self.start_timestamp + offset,
+                        'metadata': {
+                            'dimensions': image.shape,
+                            'replay_path': origin,
+                            'replay_index': index,
+                            'replay_offset': offset
+                        }
+                    }
+
+                    # Block rather than drop so replays stay deterministic
+                    while self.running:
+                        try:
+                            self.frame_queue.put(frame_data, timeout=0.5)
+                            if self.on_frame:
+                                self.on_frame()
+                            break
+                        except queue.Full:
+                            continue
+
+                    if not self.running:
+                        return
+
+                    self.stats['frames_decoded'] += 1
+                    frames_in_pass += 1
+                    index += 1
+                    offset = index / fps
+
+                if not self.loop or frames_in_pass == 0:
+                    break
+                self.stats['loops'] += 1
+
+        except Exception as e:
+            self.logger.error(f"Replay source {self.name} failed: {e}")
+
+        self.finished = True
+        self.logger.info(f"Replay source {self.name} decoded {index} frame(s)")
+
+    def _due_time(self, frame_data: Dict[str, Any]) -> float:
+        """Wall-clock time at which a frame should be delivered"""
+        if self.speed <= 0:
+            return 0.0
+        return self.replay_started + frame_data['metadata']['replay_offset'] / self.speed
+
+    def _peek(self) -> Optional[Dict[str, Any]]:
+        """Get the next decoded frame without delivering it"""
+        if self.next_frame is None:
+            try:
+                self.next_frame = self.frame_queue.get_nowait()
+            except queue.Empty:
+                return None
+
+            if self.replay_started is None:
+                self.replay_started = time.time()
+
+        return self.next_frame
+
+    def is_ready(self, now: Optional[float] = None) -> bool:
+        """Check if the next frame is due"""
+        frame_data = self._peek()
+        if frame_data is None:
+            return False
+
+        if now is None:
+            now = time.time()
+        return now >= self._due_time(frame_data)
+
+    def time_until_ready(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the next frame is due, or None if none is decoded yet"""
+        frame_data = self._peek()
+        if frame_data is None:
+            return None
+
+        if now is None:
+            now = time.time()
+        return max(0.0, self._due_time(frame_data) - now)
+
+    def take_frame(self) -> Optional[Dict[str, Any]]:
+        """Deliver the next due frame"""
+        if not self.is_ready():
+            return None
+
+        frame_data = self.next_frame
+        self.next_frame = None
+        frame_data['captured_at'] = time.monotonic()
+
+        lag = max(0.0, time.time() - self._due_time(frame_data)) if self.speed > 0 else 0.0
+        self.stats['frames_delivered'] += 1
+        self.stats['total_lag'] += lag
+        self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+        if lag > self.late_threshold:
+            self.stats['frames_late'] += 1
+        self.stats['last_delivery'] = time.time()
+
+        return frame_data
+
+    def check_watchdog(self, now: Optional[float] = None) -> bool:
+        """Replays are local files and never stall"""
+        return False
+
+    def is_connected(self) -> bool:
+        """A replay is connected until every frame has been delivered"""
+        return self.running and not (self.finished and self.next_frame is None and self.frame_queue.empty())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get replay progress, throughput and lag"""
+        delivered = self.stats['frames_delivered']
+        connected = self.is_connected()
+        end = time.time() if connected else (self.stats['last_delivery'] or time.time())
+        elapsed = end - self.replay_started if self.replay_started else 0
+
+        return {
+            'type': self.type,
+            'connected': connected,
+            'path': self.path,
+            'speed': self.speed,
+            'weight': self.weight,
+            'finished': self.finished,
+            'frames_decoded': self.stats['frames_decoded'],
+            'frames_delivered': delivered,
+            'frames_late': self.stats['frames_late'],
+            'loops': self.stats['loops'],
+            'delivered_fps': round(delivered / elapsed, 2) if elapsed > 0 else 0.0,
+            'avg_lag_ms': round(self.stats['total_lag'] / delivered * 1000, 1) if delivered else 0.0,
+            'max_lag_ms': round(self.stats['max_lag'] * 1000, 1),
+            'elapsed_seconds': round(elapsed, 3)
+        }
+
+    def release(self):
+        """Stop the replay"""
+        self.running = False
+        self.stop_event.set()
+
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
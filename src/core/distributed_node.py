@@ -0,0 +1,339 @@
+"""
+Distributed Node for Iron Dome for Mosquitoes
+Producer and worker side of capture processing spread over several nodes
+"""
+
+import os
+import time
+import uuid
+import shutil
+import socket
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import cv2
+from utils.logger import LoggerMixin
+from core.work_queue import WorkQueue
+
+# Frame fields that do not travel between nodes: pixels, node-local monotonic
+# timestamps and trace state
+LOCAL_FIELDS = ('image', 'preview', 'captured_at', 'admitted_at', 'trace', 'frame_id')
+
+class DistributedNode(LoggerMixin):
+    """
+    One SystemManager's link to the shared work queue
+
+    Producers write each frame's image to the shared spool folder and enqueue
+    the frame without its pixels. Workers lease frames up to prefetch at a
+    time, so every node pulls only as much as it can process and throughput
+    grows with the number of workers. While a worker holds a frame its lease
+    is renewed in the background; a frame held longer than
+    max_processing_time is no longer renewed and goes to another node.
+
+    Payloads name their spooled image relative to the spool folder, so
+    nodes may mount the shared folder at different paths. Images of
+    acknowledged frames are removed at once; those of dead items, and any
+    left behind, go when the items are purged after retention seconds.
+    """
+
+    def __init__(self, config: Dict[str, Any], priority_classes: Optional[List[str]] = None):
+        super().__init__()
+        self.config = config
+        self.role = config.get('role', 'worker')
+        self.node_id = config.get('node_id') or f"{socket.gethostname()}-{os.getpid()}"
+        self.spool_dir = config.get('spool_dir', 'data/spool')
+        self.spool_root = Path(self.spool_dir).resolve()
+        self.renew_interval = config.get('renew_interval', 10.0)
+        self.max_processing_time = config.get('max_processing_time', 120.0)
+        self.prefetch = max(1, config.get('prefetch', 4))
+        self.poll_interval = config.get('poll_interval', 0.5)
+        self.retention = config.get('retention', 86400)
+        self.priority_classes = list(priority_classes or ['interactive', 'live'])
+
+        self.work_queue = WorkQueue(config)
+
+        # Leased item ID -> time the lease was taken
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.capacity_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.renew_thread = None
+        self.last_purge = 0.0
+
+        self.stats = {
+            'submitted': 0,
+            'leased': 0,
+            'acked': 0,
+            'lost_leases': 0,
+            'released': 0,
+            'abandoned': 0,
+            'purged': 0,
+            'spool_files_removed': 0
+        }
+
+    @property
+    def produces(self) -> bool:
+        """Whether this node captures frames"""
+        return self.role in ('producer', 'both')
+
+    @property
+    def works(self) -> bool:
+        """Whether this node processes frames"""
+        return self.role in ('worker', 'both')
+
+    def initialize(self):
+        """Prepare the shared queue and spool folder"""
+        self.work_queue.initialize()
+        Path(self.spool_dir).mkdir(parents=True, exist_ok=True)
+        self.logger.info(f"Distributed node {self.node_id} initialized (role: {self.role})")
+
+    def start(self):
+        """Start renewing the leases of frames in flight"""
+        if not self.works:
+            return
+
+        self.stop_event.clear()
+        self.capacity_event.set()
+        self.renew_thread = threading.Thread(target=self._renew_loop, name="lease-renewal", daemon=True)
+        self.renew_thread.start()
+
+    def _get_priority(self, frame: Dict[str, Any]) -> int:
+        """Queue priority of a frame; higher classes are leased first"""
+        name = frame.get('priority')
+        if name in self.priority_classes:
+            return len(self.priority_classes) - self.priority_classes.index(name)
+        return 0
+
+    def submit(self, frame: Dict[str, Any]) -> Optional[int]:
+        """
+        Spool a captured frame's image and enqueue it for the workers
+
+        Returns:
+            The work item ID, or None if the frame could not be spooled
+        """
+        spool_path = os.path.join(self.spool_dir, f"{uuid.uuid4().hex}.jpg")
+        try:
+            if frame.get('image') is not None:
+                if not cv2.imwrite(spool_path, frame['image']):
+                    raise IOError("image could not be encoded")
+            elif frame.get('file_path'):
+                # Deferred Phone Link image - the original leaves the capture folder on commit
+                spool_path = os.path.join(self.spool_dir, f"{uuid.uuid4().hex}{Path(frame['file_path']).suffix}")
+                shutil.copy2(frame['file_path'], spool_path)
+            else:
+                raise IOError("frame has no image")
+
+            payload = {key: value for key, value in frame.items() if key not in LOCAL_FIELDS}
+            payload['original_path'] = frame.get('file_path')
+            payload['file_path'] = spool_path
+            payload['spool_file'] = os.path.basename(spool_path)
+            payload['producer'] = self.node_id
+
+            item_id = self.work_queue.enqueue(payload, self._get_priority(frame))
+
+        except Exception as e:
+            self.logger.error(f"Failed to submit frame from {frame.get('source')}: {e}")
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+            return None
+
+        with self.lock:
+            self.stats['submitted'] += 1
+        return item_id
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        """
+        Lease frames up to the free prefetch capacity
+
+        Returns:
+            Frames ready to publish to the local pipeline
+        """
+        with self.lock:
+            capacity = self.prefetch - len(self.in_flight)
+        if capacity <= 0:
+            self.capacity_event.clear()
+            return []
+
+        items = self.work_queue.lease(self.node_id, capacity)
+        now = time.monotonic()
+        frames = []
+
+        with self.lock:
+            for item in items:
+                self.in_flight[item['id']] = now
+                self.stats['leased'] += 1
+
+                frame = item['payload']
+                frame['work_item'] = item['id']
+                frame['delivery'] = item['attempts']
+                frame['image'] = None
+                if frame.get('spool_file'):
+                    # The producer's path may not exist here; the shared folder may be mounted elsewhere
+                    frame['file_path'] = os.path.join(self.spool_dir, frame['spool_file'])
+                # Latency on this node starts when the lease was taken
+                frame['captured_at'] = now
+                frames.append(frame)
+
+        return frames
+
+    def wait_for_capacity(self, timeout: Optional[float] = None) -> bool:
+        """Wait until a leased frame completes or the poll interval elapses"""
+        return self.capacity_event.wait(self.poll_interval if timeout is None else timeout)
+
+    def _remove_spooled(self, payload: Dict[str, Any]) -> bool:
+        """
+        Delete the spooled image of a work item, if it lies in the spool folder
+
+        Returns:
+            True if a file was deleted
+        """
+        if payload.get('spool_file'):
+            spool_path = Path(self.spool_dir) / payload['spool_file']
+        elif payload.get('file_path'):
+            spool_path = Path(payload['file_path'])
+        else:
+            return False
+
+        # Compare resolved paths so relative, symlinked or differently spelled folders match
+        if spool_path.resolve().parent != self.spool_root:
+            return False
+        try:
+            spool_path.unlink()
+            return True
+        except OSError:
+            return False
+
+    def _finish(self, frame: Dict[str, Any]) -> Optional[int]:
+        """Forget a frame in flight and remove its spooled image"""
+        item_id = frame.get('work_item')
+        with self.lock:
+            self.in_flight.pop(item_id, None)
+        self.capacity_event.set()
+
+        self._remove_spooled(frame)
+        return item_id
+
+    def purge(self) -> int:
+        """
+        Delete finished and dead items past retention along with their spooled images
+
+        Returns:
+            Number of items purged
+        """
+        payloads = self.work_queue.purge(self.retention)
+        removed = sum(1 for payload in payloads if self._remove_spooled(payload))
+        with self.lock:
+            self.stats['purged'] += len(payloads)
+            self.stats['spool_files_removed'] += removed
+        if payloads:
+            self.logger.info(f"Purged {len(payloads)} work item(s), removed {removed} spooled image(s)")
+        return len(payloads)
+
+    def complete(self, frame: Dict[str, Any], result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Acknowledge a processed frame and store its result
+
+        Returns:
+            True if the result was stored, False if the lease was lost
+        """
+        item_id = frame.get('work_item')
+        if item_id is None:
+            return False
+
+        try:
+            acked = self.work_queue.ack(item_id, self.node_id, result)
+        except Exception as e:
+            self.logger.error(f"Failed to acknowledge work item {item_id}: {e}")
+            acked = False
+
+        with self.lock:
+            self.stats['acked' if acked else 'lost_leases'] += 1
+
+        # Another node owns a lost item now and needs the spooled image
+        if acked:
+            self._finish(frame)
+        else:
+            with self.lock:
+                self.in_flight.pop(item_id, None)
+            self.capacity_event.set()
+        return acked
+
+    def fail(self, frame: Dict[str, Any], error: str):
+        """Give a frame back for redelivery to any node"""
+        item_id = frame.get('work_item')
+        if item_id is None:
+            return
+
+        try:
+            self.work_queue.release(item_id, self.node_id, error)
+        except Exception as e:
+            self.logger.error(f"Failed to release work item {item_id}: {e}")
+
+        with self.lock:
+            self.in_flight.pop(item_id, None)
+            self.stats['released'] += 1
+        self.capacity_event.set()
+
+    def _renew_loop(self):
+        """Keep the leases of frames in flight alive"""
+        while not self.stop_event.wait(self.renew_interval):
+            now = time.monotonic()
+            with self.lock:
+                abandoned = [item_id for item_id, leased_at in self.in_flight.items()
+                             if now - leased_at > self.max_processing_time]
+                for item_id in abandoned:
+                    # Let the lease expire so another node retries the frame
+                    del self.in_flight[item_id]
+                    self.stats['abandoned'] += 1
+                item_ids = list(self.in_flight)
+
+            if abandoned:
+                self.logger.warning(f"Abandoned {len(abandoned)} work item(s) after {self.max_processing_time}s")
+                self.capacity_event.set()
+
+            try:
+                self.work_queue.renew(self.node_id, item_ids)
+
+                if self.retention > 0 and time.time() - self.last_purge > self.retention / 24:
+                    self.last_purge = time.time()
+                    self.purge()
+            except Exception as e:
+                self.logger.error(f"Lease renewal failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get this node's counters and the shared queue state"""
+        with self.lock:
+            stats = {
+                'node_id': self.node_id,
+                'role': self.role,
+                'in_flight': len(self.in_flight),
+                'prefetch': self.prefetch,
+                **self.stats
+            }
+
+        try:
+            stats['queue'] = self.work_queue.get_stats()
+        except Exception as e:
+            stats['queue'] = {'error': str(e)}
+        return stats
+
+    def shutdown(self):
+        """Stop renewing and hand unfinished frames back to the queue"""
+        self.stop_event.set()
+        self.capacity_event.set()
+        if self.renew_thread and self.renew_thread.is_alive():
+            self.renew_thread.join(timeout=2.0)
+
+        with self.lock:
+            item_ids = list(self.in_flight)
+            self.in_flight.clear()
+
+        for item_id in item_ids:
+            try:
+                self.work_queue.release(item_id, self.node_id, 'node shut down')
+            except Exception as e:
+                self.logger.error(f"Failed to release work item {item_id}: {e}")
+
+        self.work_queue.close()
+        self.logger.info(f"Distributed node {self.node_id} stopped")
@@ -0,0 +1,452 @@
+"""
+Frame Pipeline for Iron Dome for Mosquitoes
+Single frame producer with bounded per-stage queues and explicit fan-out
+"""
+
+import time
+import heapq
+import queue
+import threading
+from collections import deque
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Callable
+from utils.logger import LoggerMixin
+
+def get_priority(item: Any, default: str) -> str:
+    """Priority class of a frame, or of a stage result carrying its frame"""
+    if not isinstance(item, dict):
+        return default
+    if 'priority' in item:
+        return item['priority']
+    frame = item.get('frame')
+    if isinstance(frame, dict):
+        return frame.get('priority', default)
+    return default
+
+
+class PriorityLanes:
+    """
+    Per-class FIFO lanes behind the deque interface queue.Queue uses
+
+    Entries are served from the highest class that has any, except that the
+    head of a lower class that has waited longer than starvation_timeout is
+    served first, so live streams keep flowing while stills are favoured.
+    Iteration yields entries oldest first across all lanes.
+    """
+
+    def __init__(self, classes: List[str], default_class: str, starvation_timeout: float):
+        self.classes = list(classes)
+        self.default_class = default_class if default_class in self.classes else self.classes[-1]
+        self.starvation_timeout = starvation_timeout
+        self.lanes = {name: deque() for name in self.classes}
+        self.promoted = 0
+
+    def classify(self, item: Any) -> str:
+        """Lane of an item; wake-up sentinels go to the highest class"""
+        if item is None:
+            return self.classes[0]
+        name = get_priority(item, self.default_class)
+        return name if name in self.lanes else self.default_class
+
+    def append(self, entry: tuple):
+        self.lanes[self.classify(entry[1])].append(entry)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def popleft(self) -> tuple:
+        if self.starvation_timeout > 0:
+            # Serve the longest-starved lower class first
+            deadline = time.monotonic() - self.starvation_timeout
+            starved = None
+            for name in self.classes[1:]:
+                lane = self.lanes[name]
+                if lane and lane[0][0] <= deadline and (starved is None or lane[0][0] < starved[0][0]):
+                    starved = lane
+            if starved is not None:
+                self.promoted += 1
+                return starved.popleft()
+
+        for name in self.classes:
+            if self.lanes[name]:
+                return self.lanes[name].popleft()
+        raise IndexError("pop from empty lanes")
+
+    def clear(self):
+        for lane in self.lanes.values():
+            lane.clear()
+
+    def depths(self) -> Dict[str, int]:
+        return {name: len(lane) for name, lane in self.lanes.items()}
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def __iter__(self):
+        return heapq.merge(*self.lanes.values(), key=itemgetter(0))
+
+
+class _LaneQueue(queue.Queue):
+    """queue.Queue storing its entries in PriorityLanes"""
+
+    def __init__(self, maxsize: int, lanes: PriorityLanes):
+        self.lanes = lanes
+        super().__init__(maxsize=maxsize)
+
+    def _init(self, maxsize: int):
+        self.queue = self.lanes
+
+    def put_reserved(self, entry: tuple, reserve: int):
+        """Queue an entry without blocking, using up to reserve slots beyond maxsize"""
+        with self.not_full:
+            if self.maxsize > 0 and self._qsize() >= self.maxsize + reserve:
+                raise queue.Full
+            self._put(entry)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class StageQueue:
+    """
+    Bounded queue feeding one pipeline stage, with depth and wait-time metrics
+
+    With a priority config the queue keeps one lane per priority class (see
+    PriorityLanes). Items of the highest class never wait for room: they
+    may use reserved_slots beyond maxsize, so a backlog of live frames
+    cannot hold up an interactive still.
+    """
+
+    def __init__(self, name: str, maxsize: int = 32, block: bool = True, put_timeout: float = 1.0,
+                 priority: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.block = block
+        self.put_timeout = put_timeout
+        self.lock = threading.Lock()
+
+        self.lanes = None
+        self.reserved_slots = 0
+        self.class_stats = {}
+        if priority and priority.get('enabled', False):
+            self.lanes = PriorityLanes(
+                priority.get('classes', ['interactive', 'live']),
+                priority.get('default_class', 'live'),
+                priority.get('starvation_timeout', 2.0)
+            )
+            self.reserved_slots = priority.get('reserved_slots', 8)
+            self.class_stats = {
+                name: {'dequeued': 0, 'total_wait': 0.0, 'max_wait': 0.0} for name in self.lanes.classes
+            }
+            self.queue = _LaneQueue(maxsize, self.lanes)
+        else:
+            self.queue = queue.Queue(maxsize=maxsize)
+
+        self.stats = {
+            'enqueued': 0,
+            'dequeued': 0,
+            'dropped': 0,
+            'discarded': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'total_put_wait': 0.0
+        }
+
+    def put(self, item: Any, stop_event: Optional[threading.Event] = None,
+            on_wait: Optional[Callable[[], Any]] = None) -> bool:
+        """
+        Add an item for this stage
+
+        Blocking stages apply backpressure to the producer for up to put_timeout;
+        non-blocking stages drop the item when full. With a stop_event the item
+        is never dropped: the call keeps waiting for room until the item is
+        queued or the event is set, calling on_wait before every wait.
+
+        Returns:
+            True if the item was queued, False if it was dropped
+        """
+        start = time.monotonic()
+        while True:
+            try:
+                if self.lanes is not None and self.lanes.classify(item) == self.lanes.classes[0]:
+                    self.queue.put_reserved((start, item), self.reserved_slots)
+                elif self.block:
+                    self.queue.put((start, item), timeout=self.put_timeout)
+                else:
+                    self.queue.put_nowait((start, item))
+                break
+            except queue.Full:
+                if stop_event is None or stop_event.is_set():
+                    with self.lock:
+                        self.stats['dropped'] += 1
+                    return False
+                # Wait for a consumer to take an item, then try again
+                if on_wait:
+                    on_wait()
+                with self.queue.not_full:
+                    self.queue.not_full.wait(self.put_timeout)
+
+        with self.lock:
+            self.stats['enqueued'] += 1
+            self.stats['total_put_wait'] += time.monotonic() - start
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Take the next item, waiting up to timeout seconds (forever if None)
+
+        Returns:
+            The item, or None if nothing arrived in time
+        """
+        try:
+            enqueued_at, item = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        if item is None:
+            return None
+
+        wait = time.monotonic() - enqueued_at
+        with self.lock:
+            self.stats['dequeued'] += 1
+            self.stats['total_wait'] += wait
+            self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+
+            if self.lanes is not None:
+                class_stats = self.class_stats[self.lanes.classify(item)]
+                class_stats['dequeued'] += 1
+                class_stats['total_wait'] += wait
+                class_stats['max_wait'] = max(class_stats['max_wait'], wait)
+        return item
+
+    def wake(self, count: int = 1):
+        """
+        Wake consumers blocked in get() without a timeout
+
+        Each woken consumer receives None, as if its wait had timed out, so it
+        can re-check whether it should keep running.
+        """
+        for _ in range(count):
+            try:
+                self.queue.put_nowait((time.monotonic(), None))
+            except queue.Full:
+                # Consumers of a full queue are not blocked
+                break
+
+    def discard(self, predicate: Optional[Callable[[Any], bool]] = None, limit: Optional[int] = None) -> List[Any]:
+        """
+        Remove queued items, oldest first
+
+        Args:
+            predicate: Only remove items it returns True for (all items if None)
+            limit: Maximum number of items to remove (no limit if None)
+
+        Returns:
+            The removed items
+        """
+        removed = []
+        with self.queue.mutex:
+            kept = []
+            for entry in self.queue.queue:
+                item = entry[1]
+                if (item is not None and (limit is None or len(removed) < limit)
+                        and (predicate is None or predicate(item))):
+                    removed.append(item)
+                else:
+                    kept.append(entry)
+
+            if removed:
+                self.queue.queue.clear()
+                self.queue.queue.extend(kept)
+                self.queue.not_full.notify(len(removed))
+
+        if removed:
+            with self.lock:
+                self.stats['discarded'] += len(removed)
+        return removed
+
+    def depth(self) -> int:
+        """Number of items waiting"""
+        return self.queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and wait-time metrics"""
+        with self.lock:
+            dequeued = self.stats['dequeued']
+            enqueued = self.stats['enqueued']
+            stats = {
+                'depth': self.depth(),
+                'maxsize': self.maxsize,
+                'enqueued': enqueued,
+                'dequeued': dequeued,
+                'dropped': self.stats['dropped'],
+                'discarded': self.stats['discarded'],
+                'avg_wait_ms': round(self.stats['total_wait'] / dequeued * 1000, 2) if dequeued else 0.0,
+                'max_wait_ms': round(self.stats['max_wait'] * 1000, 2),
+                'avg_put_wait_ms': round(self.stats['total_put_wait'] / enqueued * 1000, 2) if enqueued else 0.0
+            }
+
+            if self.lanes is not None:
+                with self.queue.mutex:
+                    depths = self.lanes.depths()
+                    stats['promoted'] = self.lanes.promoted
+                stats['classes'] = {
+                    name: {
+                        'depth': depths[name],
+                        'dequeued': class_stats['dequeued'],
+                        'avg_wait_ms': round(class_stats['total_wait'] / class_stats['dequeued'] * 1000, 2)
+                        if class_stats['dequeued'] else 0.0,
+                        'max_wait_ms': round(class_stats['max_wait'] * 1000, 2)
+                    }
+                    for name, class_stats in self.class_stats.items()
+                }
+            return stats
+
+
+class FramePipeline(LoggerMixin):
+    """
+    Reads every frame exactly once and fans it out to the subscribed stages
+
+    Only the producer calls CameraManager.get_frames(), so a Phone Link image
+    or live frame reaches every stage that subscribed to frames instead of
+    whichever worker thread happened to poll first. Every published frame is
+    tagged with the priority class of its source.
+
+    Frames of a lossless source (Phone Link stills and replays by default)
+    are never dropped by a blocking stage: the producer waits for room until
+    close() is called. A Phone Link still is marked processed once read, so
+    dropping it would leave it uninferred and unarchived until a restart.
+    Only live-camera frames are dropped when a stage is full; those drops are
+    counted per source and logged as a warning.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.default_queue_size = config.get('queue_size', 32)
+        self.priority = config.get('priority', {})
+        self.priority_classes = self.priority.get('classes', ['interactive', 'live'])
+        self.priority_sources = self.priority.get('sources', {'phone_link': 'interactive'})
+        self.default_priority = self.priority.get('default_class', 'live')
+        self.lossless_sources = set(config.get('lossless_sources', ['phone_link', 'replay']))
+        self.drop_log_interval = config.get('drop_log_interval', 5.0)  # seconds between drop warnings
+        self.stages = {}
+        self.frame_subscribers = []
+        self.admission = {}
+        self.frames_produced = 0
+        self.stop_event = threading.Event()
+
+        # Frames dropped by full stages, per source
+        self.drops = {}
+        self.drops_logged = 0
+        self.last_drop_log = 0.0
+
+    def add_stage(self, name: str, subscribe_frames: bool = False, **options) -> StageQueue:
+        """
+        Register a stage queue
+
+        Args:
+            name: Stage name
+            subscribe_frames: Whether the producer fans every frame out to this stage
+            options: StageQueue options (maxsize, block, put_timeout, priority), overridable from config
+
+        Returns:
+            The stage's queue
+        """
+        stage_config = {**options, **self.config.get('stages', {}).get(name, {})}
+        stage_queue = StageQueue(
+            name,
+            maxsize=stage_config.get('maxsize', self.default_queue_size),
+            block=stage_config.get('block', True),
+            put_timeout=stage_config.get('put_timeout', 1.0),
+            priority=self.priority if stage_config.get('priority', True) else None
+        )
+
+        self.stages[name] = stage_queue
+        if subscribe_frames:
+            self.frame_subscribers.append(stage_queue)
+
+        self.logger.info(
+            f"Pipeline stage '{name}' registered (maxsize: {stage_queue.maxsize}, "
+            f"{'blocking' if stage_queue.block else 'lossy'})"
+        )
+        return stage_queue
+
+    def subscribe(self, stage_queue: StageQueue,
+                  admission: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None):
+        """
+        Fan every frame out to a queue owned by another component
+
+        Args:
+            stage_queue: Queue to receive frames
+            admission: Optional filter applied to each batch before it is queued
+        """
+        self.stages[stage_queue.name] = stage_queue
+        self.frame_subscribers.append(stage_queue)
+        if admission:
+            self.admission[stage_queue.name] = admission
+
+    def get_stage(self, name: str) -> StageQueue:
+        """Get a registered stage queue"""
+        return self.stages[name]
+
+    def publish(self, frames: List[Dict[str, Any]], on_wait: Optional[Callable[[], Any]] = None) -> int:
+        """
+        Fan frames out to every frame subscriber
+
+        Args:
+            frames: Frames to publish
+            on_wait: Called while waiting for room for a lossless frame, e.g. a heartbeat
+
+        Returns:
+            Number of frames published
+        """
+        for frame in frames:
+            frame.setdefault('priority', self.priority_sources.get(frame.get('source'), self.default_priority))
+
+        # Higher classes first, so they never wait behind a batch of live frames
+        rank = {name: index for index, name in enumerate(self.priority_classes)}
+        frames = sorted(frames, key=lambda frame: rank.get(frame['priority'], len(rank)))
+
+        for stage_queue in self.frame_subscribers:
+            admission = self.admission.get(stage_queue.name)
+            for frame in admission(frames) if admission else frames:
+                # Lossy stages (monitoring) never hold up the producer
+                lossless = stage_queue.block and frame.get('source') in self.lossless_sources
+                if not stage_queue.put(frame, self.stop_event if lossless else None, on_wait):
+                    self._record_drop(stage_queue, frame)
+
+        self.frames_produced += len(frames)
+        return len(frames)
+
+    def _record_drop(self, stage_queue: StageQueue, frame: Dict[str, Any]):
+        """Count a frame a full stage dropped and warn at most once per drop_log_interval"""
+        if not stage_queue.block:
+            # Non-blocking stages are lossy by design and only count their drops
+            return
+
+        source = frame.get('camera_id') or frame.get('source', 'unknown')
+        self.drops[source] = self.drops.get(source, 0) + 1
+
+        now = time.monotonic()
+        if now - self.last_drop_log >= self.drop_log_interval:
+            total = sum(self.drops.values())
+            self.logger.warning(
+                f"Stage '{stage_queue.name}' full - {total - self.drops_logged} frame(s) dropped "
+                f"since the last warning ({total} total, latest from {source})"
+            )
+            self.drops_logged = total
+            self.last_drop_log = now
+
+    def close(self):
+        """Stop waiting for room for lossless frames, e.g. on shutdown"""
+        self.stop_event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stage queue metrics"""
+        return {
+            'frames_produced': self.frames_produced,
+            'frames_dropped': sum(self.drops.values()),
+            'dropped_per_source': dict(self.drops),
+            'stages': {name: stage_queue.get_stats() for name, stage_queue in self.stages.items()}
+        }
@@ -0,0 +1,283 @@
+"""
+Frame Tracer for Iron Dome for Mosquitoes
+Records per-frame spans across the pipeline and exports them as Chrome trace events
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from utils.logger import LoggerMixin
+
+class _Span:
+    """Context manager recording one span on a traced frame"""
+
+    __slots__ = ('tracer', 'frame', 'name', 'start')
+
+    def __init__(self, tracer: 'FrameTracer', frame: Dict[str, Any], name: str):
+        self.tracer = tracer
+        self.frame = frame
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.tracer.add_span(self.frame, self.name, self.start, time.monotonic())
+        return False
+
+
+class _NoSpan:
+    """Span used for frames that are not traced"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class FrameTracer(LoggerMixin):
+    """
+    Per-frame tracing on the monotonic clock
+
+    start_trace() gives a frame an ID and a trace record that travels with the
+    frame (also across processes, since the monotonic clock is system-wide).
+    Stages wrap their work in span(); fork() tells the tracer that the frame
+    continues down several branches, and the trace completes when every branch
+    has called finish(). Completed traces are kept in a bounded in-memory
+    buffer, aggregated per span, and optionally appended to a Chrome trace
+    event file that Perfetto or chrome://tracing can open.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.sample_rate = config.get('sample_rate', 1.0)
+        self.max_traces = config.get('max_traces', 1000)
+        self.max_samples = config.get('max_samples', 1000)
+        self.export_path = config.get('export_path')
+        self.flush_every = config.get('flush_every', 50)
+
+        self.traces = deque(maxlen=self.max_traces)
+        self.span_stats = {}
+        self.lock = threading.Lock()
+
+        # Chrome trace events waiting to be written
+        self.pending_events = []
+        self.export_file = None
+        self.completed = 0
+
+        if self.enabled and self.export_path:
+            self._open_export()
+
+    def _open_export(self):
+        """Open the trace file (JSON array format, which may be left unterminated)"""
+        try:
+            Path(self.export_path).parent.mkdir(parents=True, exist_ok=True)
+            is_new = not os.path.exists(self.export_path) or os.path.getsize(self.export_path) == 0
+            self.export_file = open(self.export_path, 'a')
+            if is_new:
+                self.export_file.write("[\n")
+            self.logger.info(f"Exporting frame traces to {self.export_path}")
+        except Exception as e:
+            self.logger.error(f"Failed to open trace export file {self.export_path}: {e}")
+            self.export_file = None
+
+    def start_trace(self, frame: Dict[str, Any]) -> Optional[str]:
+        """
+        Start tracing a frame, recording the capture span
+
+        The capture span runs from the frame's captured_at (set by its source)
+        until now.
+
+        Returns:
+            The frame ID, or None if the frame is not traced
+        """
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return None
+
+        now = time.monotonic()
+        started = frame.get('captured_at', now)
+        frame_id = uuid.uuid4().hex[:16]
+
+        frame['frame_id'] = frame_id
+        frame['trace'] = {
+            'frame_id': frame_id,
+            'source': frame.get('camera_id') or frame.get('source', 'unknown'),
+            'started': started,
+            'pending': 1,
+            'spans': []
+        }
+        self.add_span(frame, 'capture', started, now)
+        return frame_id
+
+    def span(self, frame: Dict[str, Any], name: str):
+        """Context manager recording a span on the frame (no-op if untraced)"""
+        if 'trace' not in frame:
+            return _NO_SPAN
+        return _Span(self, frame, name)
+
+    def add_span(self, frame: Dict[str, Any], name: str, start: float, end: float):
+        """Record a span measured by the caller"""
+        trace = frame.get('trace')
+        if trace is not None:
+            trace['spans'].append((name, start, end, os.getpid(), threading.get_ident()))
+
+    def fork(self, frame: Dict[str, Any], branches: int):
+        """Declare that the frame continues down several pipeline branches"""
+        trace = frame.get('trace')
+        if trace is not None:
+            with self.lock:
+                trace['pending'] += branches - 1
+
+    def finish(self, frame: Dict[str, Any]) -> Optional[float]:
+        """
+        End one branch of a frame's trace
+
+        Returns:
+            End-to-end seconds once the last branch finished, None otherwise
+        """
+        trace = frame.get('trace')
+        if trace is None:
+            return None
+
+        with self.lock:
+            trace['pending'] -= 1
+            if trace['pending'] > 0:
+                return None
+
+            end = time.monotonic()
+            total = end - trace['started']
+            self.completed += 1
+            events = self._chrome_events(trace, end)
+            self.traces.append((
+                {
+                    'frame_id': trace['frame_id'],
+                    'source': trace['source'],
+                    'total_ms': round(total * 1000, 2),
+                    'spans': [
+                        {'name': name, 'offset_ms': round((start - trace['started']) * 1000, 2),
+                         'duration_ms': round((span_end - start) * 1000, 2)}
+                        for name, start, span_end, _, _ in trace['spans']
+                    ]
+                },
+                events
+            ))
+
+            self._record_duration('total', total)
+            for name, start, span_end, _, _ in trace['spans']:
+                self._record_duration(name, span_end - start)
+
+            if self.export_file:
+                self.pending_events.extend(events)
+                if len(self.pending_events) >= self.flush_every:
+                    self._flush()
+
+        return total
+
+    def _record_duration(self, name: str, duration: float):
+        """Aggregate a span duration"""
+        stats = self.span_stats.get(name)
+        if stats is None:
+            stats = self.span_stats[name] = {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'samples': deque(maxlen=self.max_samples)
+            }
+
+        stats['count'] += 1
+        stats['total'] += duration
+        stats['max'] = max(stats['max'], duration)
+        stats['samples'].append(duration)
+
+    def _chrome_events(self, trace: Dict[str, Any], end: float) -> List[Dict[str, Any]]:
+        """Convert a completed trace into Chrome trace events"""
+        events = []
+        for name, start, span_end, pid, tid in trace['spans']:
+            events.append({
+                'name': name,
+                'cat': trace['source'],
+                'ph': 'X',
+                'ts': round(start * 1e6, 1),
+                'dur': round((span_end - start) * 1e6, 1),
+                'pid': pid,
+                'tid': tid,
+                'args': {'frame_id': trace['frame_id']}
+            })
+
+        events.append({
+            'name': 'frame',
+            'cat': trace['source'],
+            'ph': 'X',
+            'ts': round(trace['started'] * 1e6, 1),
+            'dur': round((end - trace['started']) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {'frame_id': trace['frame_id']}
+        })
+        return events
+
+    def _flush(self):
+        """Write pending trace events to the export file"""
+        if not self.export_file or not self.pending_events:
+            return
+
+        try:
+            self.export_file.write("".join(json.dumps(event) + ",\n" for event in self.pending_events))
+            self.export_file.flush()
+        except Exception as e:
+            self.logger.error(f"Failed to export frame traces: {e}")
+        self.pending_events = []
+
+    def get_traces(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent completed traces with their span offsets and durations"""
+        with self.lock:
+            return [summary for summary, _ in list(self.traces)[-limit:]]
+
+    def get_chrome_trace(self, limit: int = 50) -> Dict[str, Any]:
+        """Get the most recent completed traces as a Chrome trace document (Perfetto, chrome://tracing)"""
+        with self.lock:
+            events = [event for _, trace_events in list(self.traces)[-limit:] for event in trace_events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-span latency statistics in milliseconds"""
+        with self.lock:
+            spans = {}
+            for name, stats in self.span_stats.items():
+                samples = sorted(stats['samples'])
+                spans[name] = {
+                    'count': stats['count'],
+                    'avg_ms': round(stats['total'] / stats['count'] * 1000, 2),
+                    'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+                    'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+                    'max_ms': round(stats['max'] * 1000, 2)
+                }
+
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'completed': self.completed,
+                'export_path': self.export_path if self.export_file else None,
+                'spans': spans
+            }
+
+    def shutdown(self):
+        """Flush and close the export file"""
+        with self.lock:
+            self._flush()
+            if self.export_file:
+                self.export_file.close()
+                self.export_file = None
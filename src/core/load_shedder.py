@@ -0,0 +1,252 @@
+"""
+Load Shedder for Iron Dome for Mosquitoes
+Applies an overload policy when frames arrive faster than the detector can handle them
+"""
+
+import time
+import threading
+from typing import Dict, Any, List, Optional, Callable
+from utils.logger import LoggerMixin
+from core.frame_pipeline import StageQueue
+
+class LoadShedder(LoggerMixin):
+    """
+    Bounds the detection backlog with a configurable overload policy
+
+    The shedder watches the depth of the detection queues and the time frames
+    spend between admission and inference. Once either crosses its threshold
+    the system is overloaded until both fall back below resume_ratio of their
+    thresholds. While overloaded, the policy decides what happens to new frames:
+
+    - drop_oldest: discard the oldest queued frames to make room for new ones
+    - latest_per_source: keep only the newest frame of every source
+    - sample: keep one in every sample_every frames per source
+    - degrade: keep every frame but infer it with the degraded model/resolution
+
+    Every shed frame is counted and handed to on_shed, so Phone Link captures
+    still leave the watched folder instead of piling up. Frames of an exempt
+    priority class (interactive stills by default) and replay frames, which
+    must reach the detector one for one, are always admitted at full quality
+    and never discarded from the queue.
+    """
+
+    POLICIES = ('none', 'drop_oldest', 'latest_per_source', 'sample', 'degrade')
+
+    def __init__(self, config: Dict[str, Any], queues: List[StageQueue],
+                 on_shed: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        super().__init__()
+        self.config = config
+        self.policy = config.get('policy', 'latest_per_source')
+        self.max_queue_depth = config.get('max_queue_depth', 12)
+        self.max_latency = config.get('max_latency', 2.0)  # seconds, 0 = ignore latency
+        self.resume_ratio = config.get('resume_ratio', 0.5)
+        self.sample_every = max(1, int(config.get('sample_every', 3)))
+        self.latency_smoothing = config.get('latency_smoothing', 0.2)
+        self.exempt_priorities = set(config.get('exempt_priorities', ['interactive']))
+
+        if self.policy not in self.POLICIES:
+            self.logger.warning(f"Unknown load shedding policy '{self.policy}' - shedding disabled")
+            self.policy = 'none'
+
+        # Frames are admitted into queues[0]; the depth of all queues counts as backlog
+        self.queues = queues
+        self.on_shed = on_shed
+
+        self.overloaded = False
+        self.latency = 0.0
+        self.sample_counters = {}
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'admitted': 0,
+            'shed': 0,
+            'degraded': 0,
+            'overload_events': 0,
+            'overload_seconds': 0.0,
+            'overload_started': None,
+            'per_reason': {},
+            'per_source': {}
+        }
+
+        self.logger.info(
+            f"Load shedder initialized (policy: {self.policy}, max depth: {self.max_queue_depth}, "
+            f"max latency: {self.max_latency}s)"
+        )
+
+    def _get_source_key(self, frame: Dict[str, Any]) -> str:
+        """Get the key used to group frames by camera"""
+        return frame.get('camera_id') or frame.get('source', 'unknown')
+
+    def _is_exempt(self, frame: Dict[str, Any]) -> bool:
+        """Check if a frame is never shed: an exempt priority class or a replay"""
+        return frame.get('priority') in self.exempt_priorities or frame.get('source') == 'replay'
+
+    def get_depth(self) -> int:
+        """Total number of frames waiting for detection"""
+        return sum(stage_queue.depth() for stage_queue in self.queues)
+
+    def record_latency(self, frame: Dict[str, Any]):
+        """Record how long a frame waited between admission and inference"""
+        admitted_at = frame.get('admitted_at')
+        if admitted_at is None:
+            return
+
+        latency = time.monotonic() - admitted_at
+        with self.lock:
+            self.latency += self.latency_smoothing * (latency - self.latency)
+
+    def _update(self, depth: int) -> bool:
+        """Re-evaluate the overload state with hysteresis"""
+        now = time.time()
+
+        # An empty backlog means whatever latency was measured has been worked off
+        latency = self.latency if depth > 0 else 0.0
+        depth_over = depth >= self.max_queue_depth
+        latency_over = self.max_latency > 0 and latency > self.max_latency
+
+        if not self.overloaded and (depth_over or latency_over):
+            self.overloaded = True
+            self.stats['overload_events'] += 1
+            self.stats['overload_started'] = now
+            self.logger.warning(
+                f"Detection overloaded (backlog: {depth}, latency: {latency:.2f}s) - applying {self.policy}"
+            )
+
+        elif self.overloaded:
+            depth_ok = depth <= self.max_queue_depth * self.resume_ratio
+            latency_ok = self.max_latency <= 0 or latency <= self.max_latency * self.resume_ratio
+            if depth_ok and latency_ok:
+                self.overloaded = False
+                self.stats['overload_seconds'] += now - self.stats['overload_started']
+                self.stats['overload_started'] = None
+                self.logger.info(f"Detection load recovered (backlog: {depth})")
+
+        return self.overloaded
+
+    def _shed(self, frame: Dict[str, Any], reason: str):
+        """Count a shed frame and hand it to on_shed"""
+        source = self._get_source_key(frame)
+        self.stats['shed'] += 1
+        self.stats['per_reason'][reason] = self.stats['per_reason'].get(reason, 0) + 1
+        self.stats['per_source'][source] = self.stats['per_source'].get(source, 0) + 1
+
+        if self.on_shed:
+            try:
+                self.on_shed(frame)
+            except Exception as e:
+                self.logger.error(f"Failed to release shed frame from {source}: {e}")
+
+    def apply(self, frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply the overload policy to a batch of new frames
+
+        Args:
+            frames: Frames about to be admitted to the detection queue
+
+        Returns:
+            Frames to admit
+        """
+        if not frames:
+            return frames
+
+        now = time.monotonic()
+        for frame in frames:
+            frame['admitted_at'] = now
+
+        with self.lock:
+            depth = self.get_depth()
+            if self.policy == 'none' or not self._update(depth):
+                self.stats['admitted'] += len(frames)
+                return frames
+
+            exempt = [frame for frame in frames if self._is_exempt(frame)]
+            frames = [frame for frame in frames if not self._is_exempt(frame)]
+            if not frames:
+                self.stats['admitted'] += len(exempt)
+                return exempt
+
+            if self.policy == 'drop_oldest':
+                admitted = self._drop_oldest(frames, depth)
+            elif self.policy == 'latest_per_source':
+                admitted = self._keep_latest(frames)
+            elif self.policy == 'sample':
+                admitted = self._sample(frames)
+            else:
+                admitted = frames
+                for frame in frames:
+                    frame['degraded'] = True
+                self.stats['degraded'] += len(frames)
+
+            admitted = exempt + admitted
+            self.stats['admitted'] += len(admitted)
+            return admitted
+
+    def _drop_oldest(self, frames: List[Dict[str, Any]], depth: int) -> List[Dict[str, Any]]:
+        """Discard the oldest frames so the backlog stays within max_queue_depth"""
+        excess = depth + len(frames) - self.max_queue_depth
+        if excess <= 0:
+            return frames
+
+        for frame in self.queues[0].discard(lambda queued: not self._is_exempt(queued), limit=excess):
+            self._shed(frame, 'drop_oldest')
+
+        # The batch alone may exceed the limit; its oldest frames go first
+        overflow = len(frames) - self.max_queue_depth
+        if overflow > 0:
+            for frame in frames[:overflow]:
+                self._shed(frame, 'drop_oldest')
+            frames = frames[overflow:]
+
+        return frames
+
+    def _keep_latest(self, frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the newest frame per source, discarding older queued and batched ones"""
+        latest = {}
+        for frame in frames:
+            source = self._get_source_key(frame)
+            if source in latest:
+                self._shed(latest[source], 'latest_per_source')
+            latest[source] = frame
+
+        sources = set(latest)
+        for frame in self.queues[0].discard(
+                lambda queued: not self._is_exempt(queued) and self._get_source_key(queued) in sources):
+            self._shed(frame, 'latest_per_source')
+
+        return list(latest.values())
+
+    def _sample(self, frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep one in every sample_every frames per source"""
+        admitted = []
+        for frame in frames:
+            source = self._get_source_key(frame)
+            count = self.sample_counters.get(source, 0)
+            self.sample_counters[source] = count + 1
+
+            if count % self.sample_every == 0:
+                admitted.append(frame)
+            else:
+                self._shed(frame, 'sample')
+
+        return admitted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get overload state and shed counters"""
+        with self.lock:
+            overload_seconds = self.stats['overload_seconds']
+            if self.stats['overload_started'] is not None:
+                overload_seconds += time.time() - self.stats['overload_started']
+
+            return {
+                'policy': self.policy,
+                'overloaded': self.overloaded,
+                'backlog': self.get_depth(),
+                'latency_ms': round(self.latency * 1000, 1),
+                'admitted': self.stats['admitted'],
+                'shed': self.stats['shed'],
+                'degraded': self.stats['degraded'],
+                'overload_events': self.stats['overload_events'],
+                'overload_seconds': round(overload_seconds, 1),
+                'per_reason': dict(self.stats['per_reason']),
+                'per_source': dict(self.stats['per_source'])
+            }
@@ -0,0 +1,258 @@
+"""
+Pipeline Executor for Iron Dome for Mosquitoes
+Runs processing stages on their own worker pools connected by bounded queues
+"""
+
+import time
+import threading
+from typing import Dict, Any, List, Callable, Optional
+from utils.logger import LoggerMixin
+from utils.thread_watchdog import ThreadWatchdog, Heartbeat
+from core.frame_pipeline import StageQueue
+
+class PipelineStage:
+    """A pipeline stage: a handler, its input queue and its worker pool"""
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], queue: StageQueue,
+                 workers: int = 1, downstream: Optional[List[str]] = None,
+                 stall_timeout: Optional[float] = None, replace_on_stall: Optional[bool] = None):
+        self.name = name
+        self.handler = handler
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.downstream = list(downstream or [])
+        self.stall_timeout = stall_timeout
+        # A replacement runs beside the stuck call, so single-worker stages are not replaced by default
+        self.replace_on_stall = self.workers > 1 if replace_on_stall is None else replace_on_stall
+
+        self.threads = []
+        self.worker_count = 0
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'processed': 0,
+            'failed': 0,
+            'stalls': 0,
+            'restarts': 0,
+            'busy_workers': 0,
+            'total_service_time': 0.0,
+            'max_service_time': 0.0
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue and service-time metrics for this stage"""
+        with self.lock:
+            processed = self.stats['processed']
+            return {
+                'workers': self.workers,
+                'busy_workers': self.stats['busy_workers'],
+                'processed': processed,
+                'failed': self.stats['failed'],
+                'stalls': self.stats['stalls'],
+                'restarts': self.stats['restarts'],
+                'replace_on_stall': self.replace_on_stall,
+                'avg_service_ms': round(self.stats['total_service_time'] / processed * 1000, 2) if processed else 0.0,
+                'max_service_ms': round(self.stats['max_service_time'] * 1000, 2),
+                'downstream': self.downstream,
+                'queue': self.queue.get_stats()
+            }
+
+
+class PipelineExecutor(LoggerMixin):
+    """
+    Staged pipeline engine
+
+    Every stage has its own bounded input queue and a fixed number of workers,
+    which is also its concurrency limit. A handler returns the item to pass on
+    to its downstream stages, or None to stop processing that item. Handlers
+    run on the worker threads; they are bound methods sharing the system's
+    components, so CPU isolation comes from --multiprocess mode rather than
+    from a per-stage process pool.
+
+    With a watchdog, a worker stuck in one item beyond the stage's
+    stall_timeout is retired and replaced, so the stage keeps its full
+    worker count while the stuck call is abandoned. Python cannot stop the
+    stuck call, so a replacement runs beside it: stages whose handler must
+    not run twice at once (one worker, or the model) set replace_on_stall
+    to False and only report the stall, keeping the stuck worker.
+    """
+
+    def __init__(self, config: Dict[str, Any], watchdog: Optional[ThreadWatchdog] = None):
+        super().__init__()
+        self.config = config
+        self.default_queue_size = config.get('queue_size', 32)
+        self.watchdog = watchdog
+        self.stages = {}
+        self.running = False
+
+    def add_stage(self, name: str, handler: Callable[[Any], Any], downstream: Optional[List[str]] = None,
+                  **defaults) -> StageQueue:
+        """
+        Register a stage
+
+        Args:
+            name: Stage name
+            handler: Callable taking an item and returning the item for downstream stages (or None)
+            downstream: Names of stages that receive the handler's result
+            defaults: Stage defaults (workers, maxsize, block, put_timeout, stall_timeout,
+                replace_on_stall, priority), overridable from config
+
+        Returns:
+            The stage's input queue
+        """
+        stage_config = {**defaults, **self.config.get('stages', {}).get(name, {})}
+
+        stage_queue = StageQueue(
+            name,
+            maxsize=stage_config.get('maxsize', self.default_queue_size),
+            block=stage_config.get('block', True),
+            put_timeout=stage_config.get('put_timeout', 1.0),
+            priority=self.config.get('priority') if stage_config.get('priority', True) else None
+        )
+
+        self.stages[name] = PipelineStage(
+            name,
+            handler,
+            stage_queue,
+            workers=stage_config.get('workers', 1),
+            downstream=downstream,
+            stall_timeout=stage_config.get('stall_timeout'),
+            replace_on_stall=stage_config.get('replace_on_stall')
+        )
+
+        self.logger.info(
+            f"Pipeline stage '{name}' registered ({stage_config.get('workers', 1)} worker(s), queue: {stage_queue.maxsize}, next: {downstream or []})"
+        )
+        return stage_queue
+
+    def start(self):
+        """Start the worker pools of every stage"""
+        for name, stage in self.stages.items():
+            for downstream_name in stage.downstream:
+                if downstream_name not in self.stages:
+                    raise ValueError(f"Stage '{name}' routes to unknown stage '{downstream_name}'")
+
+        self.running = True
+
+        for name, stage in self.stages.items():
+            for _ in range(stage.workers):
+                self._start_worker(stage)
+
+        self.logger.info(f"Pipeline executor started with {len(self.stages)} stage(s)")
+
+    def _start_worker(self, stage: PipelineStage):
+        """Start one worker thread for a stage"""
+        with stage.lock:
+            index = stage.worker_count
+            stage.worker_count += 1
+
+        thread = threading.Thread(
+            target=self._stage_worker,
+            args=(stage,),
+            name=f"stage-{stage.name}-{index}",
+            daemon=True
+        )
+        thread.start()
+        stage.threads.append(thread)
+
+    def _replace_worker(self, stage: PipelineStage, heartbeat: Heartbeat) -> bool:
+        """Retire a stalled worker and start a replacement, unless the stage allows one call at a time"""
+        with stage.lock:
+            if heartbeat.busy_since is None:
+                # The item finished while the stall was being reported
+                return False
+            stage.stats['stalls'] += 1
+            if not stage.replace_on_stall:
+                self.logger.error(
+                    f"Stage '{stage.name}' worker {heartbeat.name} stalled - not replaced, "
+                    f"as a second worker would call the handler concurrently"
+                )
+                return False
+            heartbeat.retired = True
+            stage.stats['restarts'] += 1
+            # The stuck item no longer occupies a worker of this stage
+            stage.stats['busy_workers'] -= 1
+
+        stage.threads = [thread for thread in stage.threads if thread.ident != heartbeat.thread_ident]
+
+        self.logger.warning(f"Stage '{stage.name}' worker {heartbeat.name} replaced after stalling")
+        self._start_worker(stage)
+        return True
+
+    def submit(self, stage_name: str, item: Any) -> bool:
+        """Queue an item for a stage"""
+        return self.stages[stage_name].queue.put(item)
+
+    def _stage_worker(self, stage: PipelineStage):
+        """Worker loop: take an item, run the handler, route the result"""
+        name = threading.current_thread().name
+        if self.watchdog:
+            heartbeat = self.watchdog.register(
+                name, stage.stall_timeout, on_stall=lambda stalled: self._replace_worker(stage, stalled)
+            )
+        else:
+            heartbeat = Heartbeat(name)
+
+        while self.running and not heartbeat.retired:
+            # Block until work arrives; stop() wakes idle workers
+            item = stage.queue.get()
+            if item is None:
+                continue
+
+            with stage.lock:
+                stage.stats['busy_workers'] += 1
+            heartbeat.busy()
+            start = time.monotonic()
+
+            try:
+                result = stage.handler(item)
+
+                service_time = time.monotonic() - start
+                with stage.lock:
+                    stage.stats['processed'] += 1
+                    stage.stats['total_service_time'] += service_time
+                    stage.stats['max_service_time'] = max(stage.stats['max_service_time'], service_time)
+
+                if result is not None:
+                    for downstream_name in stage.downstream:
+                        if not self.stages[downstream_name].queue.put(result):
+                            self.logger.warning(f"Stage '{downstream_name}' full - item from '{stage.name}' dropped")
+
+            except Exception as e:
+                with stage.lock:
+                    stage.stats['failed'] += 1
+                self.logger.error(f"Stage '{stage.name}' error: {e}")
+
+            finally:
+                with stage.lock:
+                    heartbeat.idle()
+                    if not heartbeat.retired:
+                        stage.stats['busy_workers'] -= 1
+
+        if self.watchdog:
+            self.watchdog.unregister(heartbeat)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop all stage workers"""
+        self.running = False
+        for stage in self.stages.values():
+            stage.queue.wake(stage.workers)
+
+        deadline = time.monotonic() + timeout
+        for stage in self.stages.values():
+            for thread in stage.threads:
+                if thread.is_alive():
+                    thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            stage.threads = []
+
+        self.logger.info("Pipeline executor stopped")
+
+    def is_alive(self) -> bool:
+        """Check that every stage still has a live worker"""
+        return self.running and all(
+            any(thread.is_alive() for thread in stage.threads) for stage in self.stages.values()
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stage metrics"""
+        return {name: stage.get_stats() for name, stage in self.stages.items()}
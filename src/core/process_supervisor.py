@@ -0,0 +1,197 @@
+"""
+Process Supervisor for Iron Dome for Mosquitoes
+Runs system roles as separate OS processes and restarts them when they crash
+"""
+
+import time
+import multiprocessing
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+import psutil
+from utils.logger import LoggerMixin
+
+class SupervisedProcess:
+    """A named worker process and its restart history"""
+
+    def __init__(self, name: str, target: Callable, args: tuple):
+        self.name = name
+        self.target = target
+        self.args = args
+
+        self.process = None
+        self.handle = None
+        self.started_at = None
+        self.restarts = 0
+        self.restart_times = deque()
+        self.next_restart_at = None
+        self.last_exitcode = None
+        self.failed = False
+
+    def is_alive(self) -> bool:
+        """Check if the worker process is running"""
+        return self.process is not None and self.process.is_alive()
+
+
+class ProcessSupervisor(LoggerMixin):
+    """
+    Starts, watches and restarts worker processes
+
+    Workers share a stop event and talk over queues created by the supervisor.
+    A worker that exits while the system is running is restarted after an
+    exponential backoff; one that crashes more than max_restarts times within
+    restart_window seconds is marked failed and left down. CPU and memory are
+    sampled per process with psutil.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.context = multiprocessing.get_context(config.get('start_method', 'spawn'))
+        self.restart_initial_delay = config.get('restart_initial_delay', 1.0)
+        self.restart_max_delay = config.get('restart_max_delay', 30.0)
+        self.max_restarts = config.get('max_restarts', 5)
+        self.restart_window = config.get('restart_window', 300.0)
+        self.stop_timeout = config.get('stop_timeout', 10.0)
+
+        self.stop_event = self.context.Event()
+        self.processes = {}
+        self.running = False
+
+    def create_queue(self, maxsize: int = 0):
+        """Create a queue that can be shared with worker processes"""
+        return self.context.Queue(maxsize=maxsize)
+
+    def add_process(self, name: str, target: Callable, *args):
+        """
+        Register a worker process
+
+        Args:
+            name: Unique process name
+            target: Picklable module-level function run in the new process
+            args: Arguments passed to target
+        """
+        self.processes[name] = SupervisedProcess(name, target, args)
+
+    def start(self):
+        """Start every registered process"""
+        self.running = True
+        self.stop_event.clear()
+
+        for worker in self.processes.values():
+            self._start_process(worker)
+
+        self.logger.info(f"Process supervisor started {len(self.processes)} process(es)")
+
+    def _start_process(self, worker: SupervisedProcess):
+        """Start (or restart) one worker process"""
+        worker.process = self.context.Process(
+            target=worker.target,
+            args=worker.args,
+            name=f"iron-dome-{worker.name}",
+            daemon=True
+        )
+        worker.process.start()
+        worker.started_at = time.time()
+        worker.next_restart_at = None
+
+        try:
+            worker.handle = psutil.Process(worker.process.pid)
+            # Prime the CPU counter so the next sample covers a real interval
+            worker.handle.cpu_percent(interval=None)
+        except psutil.Error:
+            worker.handle = None
+
+        self.logger.info(f"Process '{worker.name}' started (pid {worker.process.pid})")
+
+    def check(self):
+        """Restart workers that exited while the system is running"""
+        if not self.running or self.stop_event.is_set():
+            return
+
+        now = time.time()
+        for worker in self.processes.values():
+            if worker.failed or worker.is_alive():
+                continue
+
+            if worker.next_restart_at is None:
+                worker.last_exitcode = worker.process.exitcode if worker.process else None
+
+                # Forget crashes that fell out of the restart window
+                while worker.restart_times and now - worker.restart_times[0] > self.restart_window:
+                    worker.restart_times.popleft()
+
+                if len(worker.restart_times) >= self.max_restarts:
+                    worker.failed = True
+                    self.logger.error(
+                        f"Process '{worker.name}' crashed {len(worker.restart_times) + 1} times within "
+                        f"{self.restart_window:.0f}s - giving up"
+                    )
+                    continue
+
+                delay = min(self.restart_max_delay, self.restart_initial_delay * (2 ** len(worker.restart_times)))
+                worker.next_restart_at = now + delay
+                self.logger.warning(
+                    f"Process '{worker.name}' exited (code {worker.last_exitcode}) - restarting in {delay:.1f}s"
+                )
+
+            if now >= worker.next_restart_at:
+                worker.restarts += 1
+                worker.restart_times.append(now)
+                self._start_process(worker)
+
+    def is_healthy(self) -> bool:
+        """Check that no worker has been given up on"""
+        return not any(worker.failed for worker in self.processes.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-process liveness, restarts and resource usage"""
+        now = time.time()
+        stats = {}
+
+        for name, worker in self.processes.items():
+            alive = worker.is_alive()
+            process_stats = {
+                'pid': worker.process.pid if worker.process else None,
+                'alive': alive,
+                'failed': worker.failed,
+                'restarts': worker.restarts,
+                'last_exitcode': worker.last_exitcode,
+                'uptime_seconds': round(now - worker.started_at, 1) if alive and worker.started_at else 0.0,
+                'cpu_percent': None,
+                'memory_mb': None,
+                'threads': None
+            }
+
+            if alive and worker.handle is not None:
+                try:
+                    with worker.handle.oneshot():
+                        process_stats['cpu_percent'] = worker.handle.cpu_percent(interval=None)
+                        process_stats['memory_mb'] = round(worker.handle.memory_info().rss / (1024 * 1024), 1)
+                        process_stats['threads'] = worker.handle.num_threads()
+                except psutil.Error:
+                    pass
+
+            stats[name] = process_stats
+
+        return stats
+
+    def stop(self, timeout: Optional[float] = None):
+        """Ask every worker to stop, then terminate the ones that do not"""
+        self.running = False
+        self.stop_event.set()
+
+        deadline = time.time() + (self.stop_timeout if timeout is None else timeout)
+        for worker in self.processes.values():
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.join(timeout=max(0.0, deadline - time.time()))
+
+        for worker in self.processes.values():
+            if worker.is_alive():
+                self.logger.warning(f"Process '{worker.name}' did not stop in time - terminating")
+                worker.process.terminate()
+                worker.process.join(timeout=2.0)
+                if worker.is_alive():
+                    worker.process.kill()
+
+        self.logger.info("Process supervisor stopped")
@@ -0,0 +1,336 @@
+"""
+Process Workers for Iron Dome for Mosquitoes
+Entry points of the capture, detection and service processes in multi-process mode
+"""
+
+import os
+import time
+import queue
+from typing import Dict, Any, Optional
+
+import cv2
+from utils.logger import setup_logger, get_logger
+from core.frame_tracer import FrameTracer
+
+logger = get_logger(__name__)
+
+def _frame_stub(frame: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip the pixel data from a frame before sending it to another process"""
+    return {key: value for key, value in frame.items() if key not in ('image', 'preview')}
+
+def _create_tracer(config: Dict[str, Any], export: bool = False) -> FrameTracer:
+    """Create a tracer; only the process that completes traces exports them"""
+    tracing_config = dict(config.get('pipeline', {}).get('tracing', {}))
+    if not export:
+        tracing_config['export_path'] = None
+    return FrameTracer(tracing_config)
+
+def _put_or_drop(target_queue, item: Any, timeout: float = 0.0) -> bool:
+    """Queue an item for another process, giving up after timeout seconds"""
+    try:
+        if timeout > 0:
+            target_queue.put(item, timeout=timeout)
+        else:
+            target_queue.put_nowait(item)
+        return True
+    except queue.Full:
+        return False
+
+def run_capture_process(config: Dict[str, Any], frame_queue, commit_queue, stop_event, log_level: str = "INFO"):
+    """
+    Capture process: owns the cameras and feeds frames to the detection processes
+
+    Phone Link captures are archived when the service process reports that
+    their results were stored, exactly as commit_frame() is used in
+    thread mode. When the detectors fall behind, live frames are shed but
+    Phone Link stills wait for room in the queue: each one is a photo the
+    user took and must be inferred before it is archived. Replay frames wait
+    too, so a replay reaches the detectors frame for frame.
+    """
+    setup_logger(level=log_level)
+    # Imported here so each process loads only the components of its role
+    from camera.camera_manager import CameraManager
+
+    camera = CameraManager(config['camera'])
+    camera.initialize()
+    tracer = _create_tracer(config)
+    put_timeout = config.get('processes', {}).get('put_timeout', 1.0)
+    logger.info(f"Capture process running (pid {os.getpid()})")
+
+    def archive_committed():
+        # Archive captures whose results were committed
+        while True:
+            try:
+                camera.commit_frame(commit_queue.get_nowait())
+            except queue.Empty:
+                break
+
+    try:
+        while not stop_event.is_set():
+            archive_committed()
+
+            frames = camera.get_frames()
+            if not frames:
+                camera.wait_for_frames()
+                continue
+
+            for frame in frames:
+                tracer.start_trace(frame)
+                
+                if frame.get('source') in ('phone_link', 'replay'):
+                    # Stills and replays are never shed; keep archiving while the detectors catch up
+                    while not _put_or_drop(frame_queue, frame, put_timeout):
+                        archive_committed()
+                        if stop_event.is_set():
+                            # Not archived, so the file is read again on the next start
+                            break
+                
+                # Bounded queue: a slow detector applies backpressure, then live frames are dropped
+                elif not _put_or_drop(frame_queue, frame, put_timeout):
+                    logger.warning(f"Detection queue full - frame from {frame.get('source')} dropped")
+
+    except Exception as e:
+        logger.error(f"Capture process error: {e}")
+        raise
+
+    finally:
+        camera.shutdown()
+
+def run_detection_process(config: Dict[str, Any], frame_queue, result_queue, stop_event, log_level: str = "INFO"):
+    """Detection process: decodes frames, runs the detector and saves detection images"""
+    setup_logger(level=log_level)
+    from camera.camera_manager import load_frame_image
+    from detection.mosquito_detector import MosquitoDetector, build_detection_record
+
+    detector = MosquitoDetector(config['detection'])
+    detector.initialize()
+    tracer = _create_tracer(config)
+    save_images = config.get('monitoring', {}).get('save_images', True)
+    status_interval = config.get('system', {}).get('status_interval', 5.0)
+    next_status = 0.0
+    logger.info(f"Detection process running (pid {os.getpid()})")
+
+    try:
+        while not stop_event.is_set():
+            try:
+                frame = frame_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            with tracer.span(frame, 'decode'):
+                frame = load_frame_image(frame)
+            if frame is None:
+                continue
+
+            with tracer.span(frame, 'inference'):
+                detections = detector.detect(frame['image'])
+            detection_data = build_detection_record(frame, detections)
+
+            # The pixels stay in this process; only the saved image path travels on
+            if detection_data and save_images:
+                image_path = detection_data['image_path']
+                with tracer.span(frame, 'save_image'):
+                    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+                    cv2.imwrite(image_path, frame['image'])
+
+            result = {'frame': _frame_stub(frame), 'detection_data': detection_data}
+            
+            # The service process shows the detector status in the web interface
+            if time.time() >= next_status:
+                next_status = time.time() + status_interval
+                result['detector_status'] = {**detector.get_status(), 'pid': os.getpid(), 'updated_at': time.time()}
+            
+            while not stop_event.is_set():
+                if _put_or_drop(result_queue, result, 0.5):
+                    break
+
+    except Exception as e:
+        logger.error(f"Detection process error: {e}")
+        raise
+
+    finally:
+        detector.shutdown()
+
+
+class ProcessDetectorView:
+    """
+    Stand-in for the detector inside the service process
+
+    The detectors live in the detection processes, which attach their
+    status to a result every status interval; this view serves the latest
+    status of each of them.
+    """
+
+    def __init__(self):
+        self.statuses = {}
+
+    def update(self, status: Dict[str, Any]):
+        """Record the status reported by one detection process"""
+        self.statuses[status['pid']] = status
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the status of the first detection process, with every process listed"""
+        processes = [self.statuses[pid] for pid in sorted(self.statuses)]
+        if not processes:
+            return {'model_loaded': False, 'message': 'No status from the detection processes yet'}
+        return {**processes[0], 'processes': processes}
+
+    def check_health(self) -> Dict[str, Any]:
+        """Healthy when every reporting detection process has its model loaded"""
+        if not self.statuses:
+            return {'healthy': False, 'message': 'No status from the detection processes yet'}
+        healthy = all(status.get('model_loaded') for status in self.statuses.values())
+        return {
+            'healthy': healthy,
+            'message': 'Detector is working properly' if healthy else 'Model not loaded in a detection process',
+            'processes': len(self.statuses)
+        }
+
+
+class ProcessStatusView:
+    """
+    Stand-in for SystemManager inside the service process
+
+    The web interface asks its system manager for status, components and
+    start/stop; in multi-process mode the status is the latest snapshot
+    pushed by the supervisor, components are those of the service process
+    and stopping sets the shared stop event. Frame traces complete in the
+    service process, so its tracer is the one exposed.
+    """
+
+    def __init__(self, stop_event, components: Optional[Dict[str, Any]] = None, tracer: Optional[FrameTracer] = None):
+        self.stop_event = stop_event
+        self.components = components or {}
+        self.tracer = tracer
+        self.status = {'running': True, 'mode': 'multiprocess'}
+
+    def update(self, status: Dict[str, Any]):
+        """Replace the status snapshot"""
+        self.status = status
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the latest system status"""
+        return self.status
+
+    def run(self):
+        """The system is already running while this process is alive"""
+        return None
+
+    def shutdown(self):
+        """Ask the supervisor to stop the system"""
+        self.stop_event.set()
+
+
+def run_service_process(config: Dict[str, Any], result_queue, commit_queue, status_queue, stop_event,
+                        log_level: str = "INFO"):
+    """Service process: persistence, monitoring, prevention, uploads and the web interface"""
+    setup_logger(level=log_level)
+    from database.database_manager import DatabaseManager
+    from monitoring.monitoring_manager import MonitoringManager
+    from prevention.prevention_manager import PreventionManager
+    from camera.capture_archiver import CaptureArchiver
+
+    components = {
+        'database': DatabaseManager(config['database']),
+        'monitoring': MonitoringManager(config['monitoring']),
+        'prevention': PreventionManager(config['prevention']),
+        # The capture process archives; this instance only reads its index for the web interface
+        'captures': CaptureArchiver(config['camera'].get('archive', {}))
+    }
+    if config['web_interface']['enabled']:
+        from web.web_interface import WebInterface
+        components['web'] = WebInterface(config['web_interface'])
+
+    for component in components.values():
+        component.initialize()
+
+    upload_queue = _create_upload_queue(config)
+    detector_view = ProcessDetectorView()
+    tracer = _create_tracer(config, export=True)
+    status_view = ProcessStatusView(stop_event, {**components, 'detector': detector_view}, tracer)
+
+    if 'web' in components:
+        components['web'].set_system_references(status_view, components['monitoring'], detector_view)
+        components['web'].start()
+
+    logger.info(f"Service process running (pid {os.getpid()})")
+
+    try:
+        while not stop_event.is_set():
+            # Keep only the newest status snapshot
+            while True:
+                try:
+                    status = status_queue.get_nowait()
+                except queue.Empty:
+                    break
+                status_view.update({**status, 'tracing': tracer.get_stats()})
+                components['monitoring'].update_component_stats('tracing', tracer.get_stats())
+
+            try:
+                result = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            frame = result['frame']
+            detection_data = result['detection_data']
+            if 'detector_status' in result:
+                detector_view.update(result['detector_status'])
+            components['monitoring'].process_frames([frame])
+
+            if detection_data:
+                with tracer.span(frame, 'db_write'):
+                    components['database'].log_detection(detection_data)
+                with tracer.span(frame, 'prevention'):
+                    components['prevention'].process_detection(detection_data)
+                with tracer.span(frame, 'monitoring'):
+                    components['monitoring'].log_detection(detection_data)
+
+                if 'web' in components:
+                    with tracer.span(frame, 'broadcast'):
+                        components['web'].broadcast_detection(detection_data)
+
+                if upload_queue and os.path.exists(detection_data['image_path']):
+                    upload_queue.enqueue(
+                        detection_data['image_path'],
+                        created_at=detection_data['timestamp'],
+                        description=f"Mosquito detection: {', '.join(detection_data['classes'])}"
+                    )
+
+            tracer.finish(frame)
+
+            # Results are stored - the capture process may archive the file
+            if not _put_or_drop(commit_queue, frame):
+                logger.warning(f"Commit queue full - {frame.get('file_path')} stays in the capture folder")
+
+    except Exception as e:
+        logger.error(f"Service process error: {e}")
+        raise
+
+    finally:
+        for name, component in components.items():
+            try:
+                component.shutdown()
+            except Exception as e:
+                logger.error(f"Error shutting down {name}: {e}")
+        if upload_queue:
+            upload_queue.shutdown()
+        tracer.shutdown()
+
+def _create_upload_queue(config: Dict[str, Any]) -> Optional[Any]:
+    """Create and start the Drive upload queue if Google Drive is enabled"""
+    drive_config = config.get('google_drive', {})
+    if not drive_config.get('enabled', False):
+        return None
+
+    from utils.google_drive_manager import GoogleDriveManager
+    from utils.drive_upload_queue import DriveUploadQueue
+
+    google_drive = GoogleDriveManager()
+    if not google_drive.authenticate():
+        logger.warning("Google Drive authentication failed - integration disabled")
+        return None
+
+    google_drive.create_project_folder()
+    upload_queue = DriveUploadQueue(google_drive, drive_config.get('upload', {}))
+    upload_queue.start()
+    return upload_queue
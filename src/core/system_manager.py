@@ -3,18 +3,27 @@ System Manager for Iron Dome for Mosquitoes
 Coordinates all system components and manages the overall system state
 """
 
+import os
+import queue
 import threading
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from loguru import logger
 
-from detection.mosquito_detector import MosquitoDetector
-from camera.camera_manager import CameraManager
+from detection.mosquito_detector import MosquitoDetector, build_detection_record
+from camera.camera_manager import CameraManager, load_frame_image
 from prevention.prevention_manager import PreventionManager
 from monitoring.monitoring_manager import MonitoringManager
-from web.web_interface import WebInterface
 from database.database_manager import DatabaseManager
-from utils.google_drive_manager import GoogleDriveManager
+from utils.thread_watchdog import ThreadWatchdog
+from utils.startup_profiler import startup_profiler
+from core.frame_pipeline import FramePipeline
+from core.pipeline_executor import PipelineExecutor
+from core.load_shedder import LoadShedder
+from core.frame_tracer import FrameTracer
+
+# Optional components (web interface, Google Drive, process and distributed
+# modes) are imported through startup_profiler only when enabled
 
 class SystemManager:
     """Main system manager that coordinates all components"""
@@ -23,18 +32,78 @@ class SystemManager:
         self.config = config
         self.mode = mode
         self.running = False
+        self.start_time = time.time()
         self.components = {}
         self.threads = {}
+        self.producer_generation = 0
+        
+        # Workers block on these instead of sleeping on fixed intervals
+        self.stop_event = threading.Event()
+        self.prevention_event = threading.Event()
+        self.status_interval = self.config.get('system', {}).get('status_interval', 5.0)
+        self.prevention_interval = self.config.get('prevention', {}).get('status_interval', 5.0)
+        
+        # Per-frame latency spans across the pipeline
+        self.tracer = FrameTracer(self.config.get('pipeline', {}).get('tracing', {}))
+        
+        # Detects worker threads stuck in one frame and replaces them
+        self.watchdog = ThreadWatchdog(self.config.get('pipeline', {}).get('watchdog', {}))
+        
+        # Single producer fanning frames out to the processing stages
+        self.frame_pipeline = FramePipeline(self.config.get('pipeline', {}))
+        self.frame_pipeline.add_stage('monitoring', subscribe_frames=True, block=False)
+        
+        # Staged detection pipeline: decode -> infer -> (persist -> upload, notify)
+        self.executor = PipelineExecutor(self.config.get('pipeline', {}), watchdog=self.watchdog)
+        decode_queue = self.executor.add_stage('decode', self._decode_stage, downstream=['infer'], workers=2)
+        # The model is not thread-safe: a stalled inference is reported, never run beside a replacement
+        infer_queue = self.executor.add_stage('infer', self._infer_stage, downstream=['persist', 'notify'], workers=1,
+                                              replace_on_stall=False)
+        self.executor.add_stage('persist', self._persist_stage, downstream=['upload'], workers=1)
+        self.executor.add_stage('notify', self._notify_stage, workers=1)
+        self.executor.add_stage('upload', self._upload_stage, workers=1, block=False)
         
-        # Initialize component managers
-        self._initialize_components()
+        # Overload policy deciding which frames enter the detection backlog
+        self.load_shedder = LoadShedder(
+            self.config.get('pipeline', {}).get('load_shedding', {}),
+            [decode_queue, infer_queue],
+            on_shed=self._release_frame
+        )
+        self.frame_pipeline.subscribe(decode_queue, admission=self.load_shedder.apply)
+        
+        # In distributed mode frames travel through the shared work queue
+        self.distributed = None
+        if mode == 'distributed' or self.config.get('distributed', {}).get('enabled', False):
+            self.mode = 'distributed'
+            DistributedNode = startup_profiler.import_attr('core.distributed_node', 'DistributedNode')
+            self.distributed = DistributedNode(
+                self.config.get('distributed', {}),
+                self.config.get('pipeline', {}).get('priority', {}).get('classes')
+            )
+        
+        # In multi-process mode the components live in the worker processes
+        self.multiprocess = mode == 'multiprocess' or self.config.get('processes', {}).get('enabled', False)
+        self.supervisor = None
+        if self.multiprocess:
+            self.mode = 'multiprocess'
+            ProcessSupervisor = startup_profiler.import_attr('core.process_supervisor', 'ProcessSupervisor')
+            self.supervisor = ProcessSupervisor(self.config.get('processes', {}))
+        else:
+            # Initialize component managers
+            self._initialize_components()
         
         # Initialize Google Drive manager
         self.google_drive = None
-        if self.config.get('google_drive', {}).get('enabled', False):
+        self.upload_queue = None
+        if not self.multiprocess and self.config.get('google_drive', {}).get('enabled', False):
+            GoogleDriveManager = startup_profiler.import_attr('utils.google_drive_manager', 'GoogleDriveManager')
+            DriveUploadQueue = startup_profiler.import_attr('utils.drive_upload_queue', 'DriveUploadQueue')
             self.google_drive = GoogleDriveManager()
             if self.google_drive.authenticate():
                 self.google_drive.create_project_folder()
+                self.upload_queue = DriveUploadQueue(
+                    self.google_drive, self.config['google_drive'].get('upload', {}), watchdog=self.watchdog
+                )
                 logger.info("Google Drive integration initialized")
             else:
                 logger.warning("Google Drive authentication failed - integration disabled")
@@ -62,6 +131,7 @@ class SystemManager:
             
             # Web interface
             if self.config['web_interface']['enabled']:
+                WebInterface = startup_profiler.import_attr('web.web_interface', 'WebInterface')
                 self.components['web'] = WebInterface(self.config['web_interface'])
             
             logger.info("All components initialized successfully")
@@ -74,30 +144,47 @@ class SystemManager:
         """Initialize the system and all components"""
         logger.info("Starting system initialization...")
         
+        if self.multiprocess:
+            logger.info("Multi-process mode - each process initializes its own components")
+            return
+        
         try:
             # Initialize database
-            self.components['database'].initialize()
+            with startup_profiler.phase('init database'):
+                self.components['database'].initialize()
             logger.info("Database initialized")
             
-            # Initialize camera system
-            self.components['camera'].initialize()
-            logger.info("Camera system initialized")
+            # Join the shared work queue
+            if self.distributed:
+                with startup_profiler.phase('init work queue'):
+                    self.distributed.initialize()
             
-            # Initialize detection system
-            self.components['detector'].initialize()
-            logger.info("Detection system initialized")
+            # Initialize camera system (worker-only nodes do not capture)
+            if self._captures():
+                with startup_profiler.phase('init camera'):
+                    self.components['camera'].initialize()
+                logger.info("Camera system initialized")
+            
+            # Initialize detection system (producer-only nodes do not detect)
+            if self._detects():
+                with startup_profiler.phase('init detector'):
+                    self.components['detector'].initialize()
+                logger.info("Detection system initialized")
             
             # Initialize prevention system
-            self.components['prevention'].initialize()
+            with startup_profiler.phase('init prevention'):
+                self.components['prevention'].initialize()
             logger.info("Prevention system initialized")
             
             # Initialize monitoring system
-            self.components['monitoring'].initialize()
+            with startup_profiler.phase('init monitoring'):
+                self.components['monitoring'].initialize()
             logger.info("Monitoring system initialized")
             
             # Initialize web interface if enabled
             if 'web' in self.components:
-                self.components['web'].initialize()
+                with startup_profiler.phase('init web interface'):
+                    self.components['web'].initialize()
                 logger.info("Web interface initialized")
             
             logger.info("System initialization completed successfully")
@@ -110,13 +197,40 @@ class SystemManager:
         """Run the main system loop"""
         logger.info("Starting Iron Dome for Mosquitoes system...")
         self.running = True
+        self.stop_event.clear()
+        
+        if self.multiprocess:
+            try:
+                self._run_processes()
+            except KeyboardInterrupt:
+                logger.info("Received shutdown signal")
+            except Exception as e:
+                logger.error(f"System error: {e}")
+            finally:
+                self.shutdown()
+            return
         
         try:
-            # Start camera monitoring thread
-            self._start_camera_thread()
+            # Watch the worker threads for stalls
+            self.watchdog.start()
+            
+            # Start the frame consumers before the producer
+            self._start_monitoring_thread()
+            if self._detects():
+                self.executor.start()
             
-            # Start detection processing thread
-            self._start_detection_thread()
+            # Start the background Drive uploader
+            if self.upload_queue:
+                self.upload_queue.start()
+            
+            # Start the single frame producer
+            if self._captures():
+                self._start_camera_thread()
+            
+            # Pull frames captured by other nodes
+            if self.distributed and self.distributed.works:
+                self.distributed.start()
+                self._start_work_thread()
             
             # Start prevention monitoring thread
             self._start_prevention_thread()
@@ -135,74 +249,256 @@ class SystemManager:
         finally:
             self.shutdown()
     
+    def _run_processes(self):
+        """Run capture, detection and services as supervised processes"""
+        process_config = self.config.get('processes', {})
+        log_level = self.config.get('system', {}).get('log_level', 'INFO')
+        supervisor = self.supervisor
+        workers = startup_profiler.import_module('core.process_workers')
+        
+        # Local IPC: bounded queues between the processes
+        frame_queue = supervisor.create_queue(process_config.get('frame_queue_size', 16))
+        result_queue = supervisor.create_queue(process_config.get('result_queue_size', 64))
+        commit_queue = supervisor.create_queue(process_config.get('commit_queue_size', 1024))
+        status_queue = supervisor.create_queue(process_config.get('status_queue_size', 4))
+        
+        supervisor.add_process(
+            'capture', workers.run_capture_process,
+            self.config, frame_queue, commit_queue, supervisor.stop_event, log_level
+        )
+        for index in range(process_config.get('detection_workers', 1)):
+            supervisor.add_process(
+                f"detection-{index}", workers.run_detection_process,
+                self.config, frame_queue, result_queue, supervisor.stop_event, log_level
+            )
+        supervisor.add_process(
+            'services', workers.run_service_process,
+            self.config, result_queue, commit_queue, status_queue, supervisor.stop_event, log_level
+        )
+        
+        supervisor.start()
+        logger.info("System is running in multi-process mode. Press Ctrl+C to stop.")
+        
+        interval = process_config.get('supervise_interval', 1.0)
+        next_status = 0.0
+        
+        # The web interface can stop the system through the shared stop event
+        while self.running and not supervisor.stop_event.is_set():
+            supervisor.check()
+            
+            now = time.time()
+            if now >= next_status:
+                next_status = now + self.status_interval
+                status = self.get_status()
+                
+                if not supervisor.is_healthy():
+                    logger.warning("One or more processes have failed and were not restarted")
+                
+                try:
+                    status_queue.put_nowait(status)
+                except queue.Full:
+                    # The service process has not consumed the previous snapshots yet
+                    pass
+            
+            if self.stop_event.wait(interval):
+                break
+    
+    def _captures(self) -> bool:
+        """Whether this node reads its own cameras"""
+        return self.distributed is None or self.distributed.produces
+    
+    def _detects(self) -> bool:
+        """Whether this node runs detection"""
+        return self.distributed is None or self.distributed.works
+    
+    def _publish_frames(self, frames, on_wait=None):
+        """Hand captured frames to the local pipeline or the shared work queue"""
+        if self.distributed is None:
+            self.frame_pipeline.publish(frames, on_wait)
+            return
+        
+        for frame in frames:
+            # Once queued, the frame is safe and the capture can be archived
+            if self.distributed.submit(frame) is not None:
+                self.components['camera'].commit_frame(frame)
+    
+    def _start_work_thread(self):
+        """Start the thread feeding leased frames from the work queue into the pipeline"""
+        node = self.distributed
+        
+        def work_worker():
+            while self.running:
+                try:
+                    frames = node.fetch()
+                    if frames:
+                        for frame in frames:
+                            self.tracer.start_trace(frame)
+                        self.frame_pipeline.publish(frames)
+                    else:
+                        # Sleep until a leased frame completes or the next poll is due
+                        node.wait_for_capacity()
+                except Exception as e:
+                    logger.error(f"Work queue thread error: {e}")
+                    self.stop_event.wait(1.0)
+        
+        self.threads['work_queue'] = threading.Thread(target=work_worker, name="work-queue", daemon=True)
+        self.threads['work_queue'].start()
+        logger.info(f"Work queue thread started (node {node.node_id})")
+    
     def _start_camera_thread(self):
-        """Start camera monitoring thread"""
+        """Start the frame producer thread (the only caller of get_frames)"""
+        camera = self.components['camera']
+        stall_timeout = self.config.get('pipeline', {}).get('watchdog', {}).get('producer_stall_timeout')
+        # Replacements get a generation suffix so each thread has its own watchdog entry
+        name = f"camera-producer-{self.producer_generation}" if self.producer_generation else "camera-producer"
+        self.producer_generation += 1
+        
+        def replace_producer(heartbeat) -> bool:
+            # A stuck producer starves every stage, so start a new one right away
+            if not self.running:
+                return False
+            heartbeat.retired = True
+            logger.warning("Camera producer thread stalled - starting a replacement")
+            self._start_camera_thread()
+            return True
+        
         def camera_worker():
-            while self.running:
+            heartbeat = self.watchdog.register(name, stall_timeout, on_stall=replace_producer)
+            while self.running and not heartbeat.retired:
                 try:
-                    frames = self.components['camera'].get_frames()
+                    heartbeat.busy()
+                    frames = camera.get_frames()
                     if frames:
-                        self.components['monitoring'].process_frames(frames)
+                        for frame in frames:
+                            self.tracer.start_trace(frame)
+                        # Waiting for room for a still is backpressure, not a stall
+                        self._publish_frames(frames, heartbeat.beat)
+                    heartbeat.idle()
+                    
+                    if not frames:
+                        # Sleep until a source signals a frame or the next poll is due
+                        camera.wait_for_frames()
                 except Exception as e:
+                    heartbeat.idle()
                     logger.error(f"Camera thread error: {e}")
-                time.sleep(0.1)
+                    self.stop_event.wait(1.0)
+            self.watchdog.unregister(heartbeat)
         
-        self.threads['camera'] = threading.Thread(target=camera_worker, daemon=True)
+        self.threads['camera'] = threading.Thread(target=camera_worker, name=name, daemon=True)
         self.threads['camera'].start()
-        logger.info("Camera monitoring thread started")
+        logger.info(f"Camera producer thread started ({name})")
     
-    def _start_detection_thread(self):
-        """Start detection processing thread"""
-        def detection_worker():
+    def _start_monitoring_thread(self):
+        """Start frame monitoring thread"""
+        monitoring_queue = self.frame_pipeline.get_stage('monitoring')
+        
+        def monitoring_worker():
             while self.running:
                 try:
-                    # Get frames from camera
-                    frames = self.components['camera'].get_frames()
-                    
-                    for frame in frames:
-                        # Run detection
-                        detections = self.components['detector'].detect(frame)
-                        
-                        if detections:
-                            # Create detection data
-                            detection_data = {
-                                'timestamp': time.time(),
-                                'classes': [d['class_name'] for d in detections],
-                                'confidence': max([d['confidence'] for d in detections]) if detections else 0,
-                                'detections': detections,
-                                'image_path': f"data/detections/detection_{int(time.time())}.jpg"
-                            }
-                            
-                            # Process detections
-                            self.components['prevention'].process_detection(detection_data)
-                            self.components['monitoring'].log_detection(detection_data)
-                            
-                            # Save to database
-                            self.components['database'].log_detection(detection_data)
-                            
-                            # Broadcast to web interface
-                            if 'web' in self.components:
-                                self.components['web'].broadcast_detection(detection_data)
-                            
-                            # Upload to Google Drive if enabled
-                            if self.google_drive:
-                                try:
-                                    from datetime import datetime
-                                    results = self.google_drive.upload_detection_files(
-                                        "data/detections", datetime.now()
-                                    )
-                                    if results['uploaded_files'] > 0:
-                                        logger.info(f"Uploaded {results['uploaded_files']} detection files to Google Drive")
-                                except Exception as e:
-                                    logger.error(f"Google Drive upload error: {e}")
-                            
+                    frame = monitoring_queue.get()
+                    if frame is not None:
+                        self.components['monitoring'].process_frames([frame])
                 except Exception as e:
-                    logger.error(f"Detection thread error: {e}")
-                time.sleep(0.5)
+                    logger.error(f"Monitoring thread error: {e}")
+        
+        self.threads['monitoring'] = threading.Thread(target=monitoring_worker, daemon=True)
+        self.threads['monitoring'].start()
+        logger.info("Frame monitoring thread started")
+    
+    def _decode_stage(self, frame: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Pipeline stage: fully decode deferred Phone Link images"""
+        with self.tracer.span(frame, 'decode'):
+            decoded = load_frame_image(frame)
+        
+        if decoded is None and self.distributed and 'work_item' in frame:
+            # The spooled image may not be visible here yet - let any node retry it
+            self.distributed.fail(frame, 'decode failed')
+        return decoded
+    
+    def _release_frame(self, frame: Dict[str, Any], detection_data: Optional[Dict[str, Any]] = None):
+        """Commit a frame whose results are stored, or that was shed without inference"""
+        if 'work_item' in frame:
+            self.distributed.complete(frame, {'detection': detection_data})
+        else:
+            self.components['camera'].commit_frame(frame)
+    
+    def _infer_stage(self, frame: Dict[str, Any]) -> Dict[str, Any]:
+        """Pipeline stage: run detection and build the detection record"""
+        self.load_shedder.record_latency(frame)
+        with self.tracer.span(frame, 'inference'):
+            detections = self.components['detector'].detect(frame['image'], degraded=frame.get('degraded', False))
+        
+        # The frame continues down the persist and notify branches
+        self.tracer.fork(frame, 2)
+        return {'frame': frame, 'detection_data': build_detection_record(frame, detections)}
+    
+    def _persist_stage(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Pipeline stage: save the detection and archive the capture"""
+        frame = result['frame']
+        
+        try:
+            if result['detection_data']:
+                # Keep the detection image so it can be uploaded later
+                if self.components['monitoring'].save_images:
+                    image_path = result['detection_data']['image_path']
+                    with self.tracer.span(frame, 'save_image'):
+                        self.components['camera'].save_frame(
+                            frame, os.path.basename(image_path), os.path.dirname(image_path)
+                        )
+                
+                with self.tracer.span(frame, 'db_write'):
+                    self.components['database'].log_detection(result['detection_data'])
+            
+            # Results are committed - move the capture out of the hot folder
+            with self.tracer.span(frame, 'archive'):
+                self._release_frame(frame, result['detection_data'])
+        
+        finally:
+            self.tracer.finish(frame)
+        
+        return result if result['detection_data'] else None
+    
+    def _notify_stage(self, result: Dict[str, Any]) -> None:
+        """Pipeline stage: prevention, monitoring and web broadcast"""
+        frame = result['frame']
+        detection_data = result['detection_data']
+        
+        try:
+            if not detection_data:
+                return None
+            
+            with self.tracer.span(frame, 'prevention'):
+                self.components['prevention'].process_detection(detection_data)
+            self.prevention_event.set()
+            
+            with self.tracer.span(frame, 'monitoring'):
+                self.components['monitoring'].log_detection(detection_data)
+            
+            if 'web' in self.components:
+                with self.tracer.span(frame, 'broadcast'):
+                    self.components['web'].broadcast_detection(detection_data)
+        
+        finally:
+            self.tracer.finish(frame)
+        
+        return None
+    
+    def _upload_stage(self, result: Dict[str, Any]) -> None:
+        """Pipeline stage: hand the detection image to the background Drive uploader"""
+        if not self.upload_queue:
+            return None
         
-        self.threads['detection'] = threading.Thread(target=detection_worker, daemon=True)
-        self.threads['detection'].start()
-        logger.info("Detection processing thread started")
+        detection_data = result['detection_data']
+        if not os.path.exists(detection_data['image_path']):
+            return None
+        
+        self.upload_queue.enqueue(
+            detection_data['image_path'],
+            created_at=detection_data['timestamp'],
+            description=f"Mosquito detection: {', '.join(detection_data['classes'])}"
+        )
+        
+        return None
     
     def _start_prevention_thread(self):
         """Start prevention monitoring thread"""
@@ -219,7 +515,10 @@ class SystemManager:
                     
                 except Exception as e:
                     logger.error(f"Prevention thread error: {e}")
-                time.sleep(1.0)
+                
+                # Refresh on every detection, otherwise on the status interval
+                self.prevention_event.wait(self.prevention_interval)
+                self.prevention_event.clear()
         
         self.threads['prevention'] = threading.Thread(target=prevention_worker, daemon=True)
         self.threads['prevention'].start()
@@ -240,9 +539,8 @@ class SystemManager:
                     self.components['web'].start()
                     logger.info("Web interface started successfully")
                     
-                    # Keep web interface running
-                    while self.running and self.components['web'].running:
-                        time.sleep(1)
+                    # The server runs on its own thread; hold until shutdown
+                    self.stop_event.wait()
                         
             except Exception as e:
                 logger.error(f"Web interface error: {e}")
@@ -263,7 +561,8 @@ class SystemManager:
                 # Update system status
                 self._update_system_status()
                 
-                time.sleep(5.0)
+                if self.stop_event.wait(self.status_interval):
+                    break
                 
         except KeyboardInterrupt:
             logger.info("Shutdown signal received")
@@ -272,10 +571,16 @@ class SystemManager:
         """Check the health of all system components"""
         try:
             for name, component in self.components.items():
+                if name == 'camera' and not self._captures():
+                    continue
                 if hasattr(component, 'check_health'):
                     health = component.check_health()
                     if not health['healthy']:
                         logger.warning(f"Component {name} health check failed: {health['message']}")
+            
+            stalled = self.watchdog.get_stats()['stalled_workers']
+            if stalled:
+                logger.warning(f"Stalled worker threads: {', '.join(stalled)}")
         except Exception as e:
             logger.error(f"Health check error: {e}")
     
@@ -287,9 +592,28 @@ class SystemManager:
                 'detections_per_minute': self.components['monitoring'].get_detection_rate(),
                 'prevention_active': self.components['prevention'].is_active(),
                 'camera_status': self.components['camera'].get_status(),
-                'system_uptime': time.time()
+                'system_uptime': time.time() - self.start_time
             }
             
+            # Report background upload backlog
+            if self.upload_queue:
+                upload_stats = self.upload_queue.get_stats()
+                metrics['upload_queue'] = upload_stats
+                self.components['monitoring'].update_component_stats('uploads', upload_stats)
+            
+            # Report overload state and shed frames
+            self.components['monitoring'].update_component_stats('load_shedding', self.load_shedder.get_stats())
+            
+            # Report where frame latency is spent
+            self.components['monitoring'].update_component_stats('tracing', self.tracer.get_stats())
+            
+            # Report stalled and replaced workers
+            self.components['monitoring'].update_component_stats('watchdog', self.watchdog.get_stats())
+            
+            # Report this node's share of the distributed work
+            if self.distributed:
+                self.components['monitoring'].update_component_stats('distributed', self.distributed.get_stats())
+            
             # Update database with metrics
             self.components['database'].update_metrics(metrics)
             
@@ -301,13 +625,47 @@ class SystemManager:
         logger.info("Shutting down Iron Dome for Mosquitoes system...")
         self.running = False
         
+        if self.multiprocess:
+            self.stop_event.set()
+            self.supervisor.stop()
+            logger.info("System shutdown completed")
+            return
+        
+        # Wake every worker blocked on an event or queue
+        self.stop_event.set()
+        self.prevention_event.set()
+        self.components['camera'].wake()
+        self.frame_pipeline.get_stage('monitoring').wake()
+        self.frame_pipeline.close()
+        self.watchdog.shutdown()
+        
         try:
-            # Shutdown components
+            # Stop the frame producers so nothing new enters the pipeline
+            for name in ('camera', 'work_queue'):
+                thread = self.threads.get(name)
+                if thread and thread.is_alive():
+                    thread.join(timeout=5.0)
+            
+            # Stop pipeline stage workers; items in progress finish against live components
+            self.executor.stop()
+            
+            # Hand frames still in flight back to the shared queue
+            if self.distributed:
+                self.distributed.shutdown()
+            
+            # Shutdown components once no stage can use them
             for name, component in self.components.items():
                 if hasattr(component, 'shutdown'):
                     logger.info(f"Shutting down {name}...")
                     component.shutdown()
             
+            # Drain pending Drive uploads
+            if self.upload_queue:
+                self.upload_queue.shutdown()
+            
+            # Write out the remaining frame traces
+            self.tracer.shutdown()
+            
             # Wait for threads to finish
             for name, thread in self.threads.items():
                 if thread.is_alive():
@@ -321,9 +679,25 @@ class SystemManager:
     
     def get_status(self) -> Dict[str, Any]:
         """Get current system status"""
+        if self.multiprocess:
+            return {
+                'running': self.running,
+                'mode': self.mode,
+                'healthy': self.supervisor.is_healthy(),
+                'processes': self.supervisor.get_stats()
+            }
+        
         return {
             'running': self.running,
             'mode': self.mode,
             'components': {name: component.get_status() for name, component in self.components.items()},
-            'threads': {name: thread.is_alive() for name, thread in self.threads.items()}
+            'threads': {name: thread.is_alive() for name, thread in self.threads.items()},
+            'pipeline': self.frame_pipeline.get_stats(),
+            'stages': self.executor.get_stats(),
+            'load_shedding': self.load_shedder.get_stats(),
+            'tracing': self.tracer.get_stats(),
+            'watchdog': self.watchdog.get_stats(),
+            'distributed': self.distributed.get_stats() if self.distributed else None,
+            'startup': startup_profiler.get_report(),
+            'uploads': self.upload_queue.get_stats() if self.upload_queue else None
         } 
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Work Queue for Iron Dome for Mosquitoes
+Durable SQLite work queue with leases, acknowledgements and redelivery
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from utils.logger import LoggerMixin
+
+class WorkQueue(LoggerMixin):
+    """
+    Work queue shared by several nodes through one SQLite file
+
+    A node leases pending items for lease_seconds and either acknowledges
+    them with a result or gives them back. Leases of a node that died are
+    not renewed, so its items become pending again once the lease expires
+    and another node picks them up. Items that were delivered max_attempts
+    times without being acknowledged are moved to the dead state. Delivery
+    is at-least-once: a node that lost its lease cannot acknowledge the item
+    any more, but its side effects have already happened.
+
+    Results are stored next to the items, so the queue file doubles as the
+    shared result store.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.path = config.get('queue_path', 'data/work_queue.db')
+        self.lease_seconds = config.get('lease_seconds', 30.0)
+        self.max_attempts = config.get('max_attempts', 3)
+        self.busy_timeout = config.get('busy_timeout', 10.0)
+
+        # One connection per thread; SQLite serializes writers across nodes
+        self.local = threading.local()
+        self.initialized = False
+
+    def initialize(self):
+        """Create the queue tables"""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connect()
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS work_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_work_items_pending ON work_items (status, priority DESC, id);
+            CREATE TABLE IF NOT EXISTS work_results (
+                item_id INTEGER PRIMARY KEY,
+                node_id TEXT NOT NULL,
+                result TEXT,
+                completed_at REAL NOT NULL
+            );
+        ''')
+        self.initialized = True
+        self.logger.info(f"Work queue ready: {self.path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the calling thread's connection"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # Autocommit mode; write transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+        return connection
+
+    def enqueue(self, payload: Dict[str, Any], priority: int = 0) -> int:
+        """
+        Add a work item
+
+        Args:
+            payload: JSON-serializable item
+            priority: Higher values are leased first
+
+        Returns:
+            The item ID
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            'INSERT INTO work_items (payload, priority, enqueued_at, updated_at) VALUES (?, ?, ?, ?)',
+            (json.dumps(payload), priority, now, now)
+        )
+        return cursor.lastrowid
+
+    def lease(self, owner: str, count: int = 1) -> List[Dict[str, Any]]:
+        """
+        Lease up to count pending items, highest priority first
+
+        Returns:
+            Leased items as dicts with id, payload and attempts
+        """
+        if count <= 0:
+            return []
+
+        now = time.time()
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._expire_leases(connection, now)
+
+            rows = connection.execute(
+                "SELECT id, payload, attempts FROM work_items WHERE status = 'pending' "
+                "ORDER BY priority DESC, id LIMIT ?",
+                (count,)
+            ).fetchall()
+
+            if rows:
+                connection.executemany(
+                    "UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(owner, now + self.lease_seconds, now, row[0]) for row in rows]
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return [{'id': row[0], 'payload': json.loads(row[1]), 'attempts': row[2] + 1} for row in rows]
+
+    def _expire_leases(self, connection: sqlite3.Connection, now: float):
+        """Return expired leases to pending, or dead once out of attempts"""
+        connection.execute(
+            "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'pending' END, "
+            "lease_owner = NULL, lease_expires = NULL, last_error = 'lease expired', updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now, now)
+        )
+
+    def renew(self, owner: str, item_ids: List[int]) -> int:
+        """
+        Extend the leases an owner still holds
+
+        Returns:
+            Number of leases renewed
+        """
+        if not item_ids:
+            return 0
+
+        now = time.time()
+        placeholders = ','.join('?' * len(item_ids))
+        cursor = self._connect().execute(
+            f"UPDATE work_items SET lease_expires = ?, updated_at = ? "
+            f"WHERE status = 'leased' AND lease_owner = ? AND id IN ({placeholders})",
+            (now + self.lease_seconds, now, owner, *item_ids)
+        )
+        return cursor.rowcount
+
+    def ack(self, item_id: int, owner: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Complete a leased item and store its result
+
+        Returns:
+            True if the owner still held the lease, False if it was lost
+        """
+        now = time.time()
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = connection.execute(
+                "UPDATE work_items SET status = 'done', lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now, item_id, owner)
+            )
+            acked = cursor.rowcount == 1
+            if acked:
+                connection.execute(
+                    'INSERT OR REPLACE INTO work_results (item_id, node_id, result, completed_at) VALUES (?, ?, ?, ?)',
+                    (item_id, owner, json.dumps(result), now)
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        if not acked:
+            self.logger.warning(f"Work item {item_id} lease lost before acknowledgement")
+        return acked
+
+    def release(self, item_id: int, owner: str, error: str = '') -> bool:
+        """
+        Give a leased item back for redelivery (dead once out of attempts)
+
+        Returns:
+            True if the owner still held the lease
+        """
+        cursor = self._connect().execute(
+            "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'pending' END, "
+            "lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (self.max_attempts, error, time.time(), item_id, owner)
+        )
+        return cursor.rowcount == 1
+
+    def get_result(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """Get the stored result of a completed item"""
+        row = self._connect().execute(
+            'SELECT node_id, result, completed_at FROM work_results WHERE item_id = ?', (item_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'node_id': row[0], 'result': json.loads(row[1]), 'completed_at': row[2]}
+
+    def purge(self, older_than: float) -> List[Dict[str, Any]]:
+        """
+        Delete completed and dead items, and their results, older than older_than seconds
+
+        Returns:
+            Payloads of the deleted items, so their files can be removed
+        """
+        cutoff = time.time() - older_than
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                "SELECT id, payload FROM work_items WHERE status IN ('done', 'dead') AND updated_at < ?",
+                (cutoff,)
+            ).fetchall()
+            connection.execute(
+                "DELETE FROM work_results WHERE item_id IN "
+                "(SELECT id FROM work_items WHERE status IN ('done', 'dead') AND updated_at < ?)",
+                (cutoff,)
+            )
+            connection.execute(
+                "DELETE FROM work_items WHERE status IN ('done', 'dead') AND updated_at < ?", (cutoff,)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return [json.loads(row[1]) for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get item counts per status and completions per node"""
+        connection = self._connect()
+        counts = dict(connection.execute('SELECT status, COUNT(*) FROM work_items GROUP BY status').fetchall())
+        per_node = dict(connection.execute('SELECT node_id, COUNT(*) FROM work_results GROUP BY node_id').fetchall())
+
+        return {
+            'path': self.path,
+            'pending': counts.get('pending', 0),
+            'leased': counts.get('leased', 0),
+            'done': counts.get('done', 0),
+            'dead': counts.get('dead', 0),
+            'completed_per_node': per_node
+        }
+
+    def close(self):
+        """Close the calling thread's connection"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
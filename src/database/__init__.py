@@ -4,5 +4,11 @@ Handles data persistence, storage, and database operations
 """
 
 from .database_manager import DatabaseManager
+from .connection_pool import ReadConnectionPool
+from .rollups import DetectionRollups
+from .partitions import TimePartitions
+from .backup import OnlineBackup
+from .export import StreamingExport
+from .metrics_store import MetricsStore
 
-__all__ = ['DatabaseManager'] 
\ No newline at end of file
+__all__ = ['DatabaseManager', 'ReadConnectionPool', 'DetectionRollups', 'TimePartitions', 'OnlineBackup', 'StreamingExport', 'MetricsStore'] 
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Online Backup for Iron Dome for Mosquitoes
+Incremental, snapshot-consistent database copies taken alongside live writes
+"""
+
+import gzip
+import time
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Optional
+from utils.logger import LoggerMixin
+
+class OnlineBackup(LoggerMixin):
+    """
+    Copies the database page by page from a read-only connection
+
+    The copy reads from one pinned WAL snapshot, so it is consistent without
+    holding the writer lock: detections keep committing while it runs, and
+    because the source connection never sees those commits the copy never
+    restarts. pages_per_step pages are copied per step with step_pause
+    seconds between steps, leaving the disk to the writer. The WAL cannot be
+    checkpointed past the snapshot until the copy ends, so it grows by the
+    writes made meanwhile.
+
+    Copies are written to a temporary file and renamed when complete,
+    optionally gzip-compressed, and only the newest keep backups are kept.
+    """
+
+    PREFIX = 'iron_dome_backup_'
+
+    def __init__(self, db_path: str, config: Dict[str, Any]):
+        super().__init__()
+        self.db_path = db_path
+        self.backup_dir = Path(config.get('dir', 'data/backups'))
+        self.pages_per_step = max(1, config.get('pages_per_step', 256))
+        self.step_pause = config.get('step_pause', 0.001)  # seconds
+        self.compress = config.get('compress', False)
+        self.keep = config.get('keep', 7)  # 0 keeps every backup
+
+        self.run_lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.write_stall = 0.0
+        self.last_backup = None
+        self.last_result = None
+        self.stats = {
+            'backups': 0,
+            'failed': 0,
+            'rotated': 0
+        }
+
+    def record_wait(self, wait: float):
+        """Record a writer lock wait; the longest during a backup is its write stall"""
+        if self.running:
+            self.write_stall = max(self.write_stall, wait)
+
+    def start(self) -> bool:
+        """
+        Run a backup in a background thread
+
+        Returns:
+            False if a backup is already running
+        """
+        if self.thread and self.thread.is_alive():
+            return False
+        self.thread = threading.Thread(target=self.run, name="db-backup", daemon=True)
+        self.thread.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for a background backup and return its result"""
+        if self.thread:
+            self.thread.join(timeout)
+        return self.last_result
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Take one backup
+
+        Returns:
+            Result with path, sizes, duration and the write stall observed
+        """
+        if not self.run_lock.acquire(blocking=False):
+            return {'success': False, 'error': 'A backup is already running'}
+
+        self.running = True
+        self.write_stall = 0.0
+        start = time.monotonic()
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{self.PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        partial = self.backup_dir / f"{name}.partial"
+
+        try:
+            steps, pages = self._copy(partial)
+            size = partial.stat().st_size
+
+            if self.compress:
+                path = self.backup_dir / f"{name}.gz"
+                # Level 6 compresses about as well as 9 at a fraction of the CPU
+                with open(partial, 'rb') as source, gzip.open(path, 'wb', compresslevel=6) as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+                partial.unlink()
+            else:
+                path = self.backup_dir / name
+                partial.replace(path)
+
+            rotated = self._rotate()
+            result = {
+                'success': True,
+                'path': str(path),
+                'pages': pages,
+                'steps': steps,
+                'size_bytes': size,
+                'stored_bytes': path.stat().st_size,
+                'duration_ms': round((time.monotonic() - start) * 1000, 1),
+                'max_write_stall_ms': round(self.write_stall * 1000, 3),
+                'rotated': rotated
+            }
+            self.stats['backups'] += 1
+            self.stats['rotated'] += rotated
+            self.last_backup = datetime.now()
+            self.logger.info(
+                f"Database backup created: {path} ({pages} pages in {steps} steps, "
+                f"{result['duration_ms']} ms, max write stall {result['max_write_stall_ms']} ms)"
+            )
+
+        except Exception as e:
+            partial.unlink(missing_ok=True)
+            self.stats['failed'] += 1
+            result = {'success': False, 'error': str(e)}
+            self.logger.error(f"Failed to backup database: {e}")
+
+        finally:
+            self.running = False
+            self.run_lock.release()
+
+        self.last_result = result
+        return result
+
+    def _copy(self, path: Path) -> tuple:
+        """
+        Copy the database to path from one snapshot
+
+        Returns:
+            (steps, pages)
+        """
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        source = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        target = sqlite3.connect(path)
+        progress = {'steps': 0, 'pages': 0}
+
+        def step(status, remaining, total):
+            progress['steps'] += 1
+            progress['pages'] = total
+            if remaining and self.step_pause > 0:
+                # Give the writer the disk between steps
+                time.sleep(self.step_pause)
+
+        try:
+            # Pin the snapshot: later commits by the writer are not seen
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(target, pages=self.pages_per_step, progress=step)
+        finally:
+            target.close()
+            source.close()
+        return progress['steps'], progress['pages']
+
+    def _rotate(self) -> int:
+        """
+        Delete all but the newest keep backups
+
+        Returns:
+            Number of backups deleted
+        """
+        if self.keep <= 0:
+            return 0
+        backups = sorted(
+            (path for path in self.backup_dir.glob(f"{self.PREFIX}*")
+             if path.suffix in ('.db', '.gz')),
+            key=lambda path: path.name,
+            reverse=True
+        )
+        for path in backups[self.keep:]:
+            path.unlink(missing_ok=True)
+        return len(backups[self.keep:])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backup counts and the last result"""
+        return {
+            **self.stats,
+            'running': self.running,
+            'compress': self.compress,
+            'keep': self.keep,
+            'last_backup': self.last_backup.isoformat() if self.last_backup else None,
+            'last_result': self.last_result
+        }
@@ -0,0 +1,128 @@
+"""
+Connection Pool for Iron Dome for Mosquitoes
+Read-only SQLite connections shared by dashboard and status queries
+"""
+
+import time
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Any
+from utils.logger import LoggerMixin
+
+class ReadConnectionPool(LoggerMixin):
+    """
+    Fixed-size pool of read-only connections
+
+    With WAL journaling a reader sees the last committed snapshot and neither
+    waits for nor blocks the writer connection, so a slow analytics query
+    cannot hold up detection inserts. Connections are opened lazily up to
+    size; a query waits for a free one for at most acquire_timeout seconds.
+    """
+
+    def __init__(self, db_path: str, size: int = 4, acquire_timeout: float = 10.0, busy_timeout: float = 30.0):
+        super().__init__()
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.acquire_timeout = acquire_timeout
+        self.busy_timeout = busy_timeout
+
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self.stats = {
+            'acquired': 0,
+            'in_use': 0,
+            'max_in_use': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'timeouts': 0
+        }
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a read-only connection"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=self.busy_timeout)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one while below size"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self.opened -= 1
+                    raise
+
+        try:
+            return self.idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            with self.lock:
+                self.stats['timeouts'] += 1
+            raise TimeoutError(f"No read connection free within {self.acquire_timeout}s")
+
+    @contextmanager
+    def connection(self):
+        """Borrow a read-only connection for the duration of the block"""
+        if self.closed:
+            raise RuntimeError("Read connection pool is closed")
+
+        start = time.monotonic()
+        connection = self._acquire()
+        wait = time.monotonic() - start
+
+        with self.lock:
+            self.stats['acquired'] += 1
+            self.stats['in_use'] += 1
+            self.stats['max_in_use'] = max(self.stats['max_in_use'], self.stats['in_use'])
+            self.stats['total_wait'] += wait
+            self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+
+        try:
+            yield connection
+        finally:
+            with self.lock:
+                self.stats['in_use'] -= 1
+
+            if self.closed:
+                connection.close()
+            else:
+                # End the read transaction so the next borrower sees new commits
+                connection.rollback()
+                self.idle.put(connection)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool usage and wait-time metrics"""
+        with self.lock:
+            acquired = self.stats['acquired']
+            return {
+                'size': self.size,
+                'opened': self.opened,
+                'in_use': self.stats['in_use'],
+                'max_in_use': self.stats['max_in_use'],
+                'acquired': acquired,
+                'avg_wait_ms': round(self.stats['total_wait'] / acquired * 1000, 3) if acquired else 0.0,
+                'max_wait_ms': round(self.stats['max_wait'] * 1000, 3),
+                'timeouts': self.stats['timeouts']
+            }
+
+    def close(self):
+        """Close every idle connection; borrowed ones close when returned"""
+        self.closed = True
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -5,12 +5,46 @@ Handles data persistence, storage, and database operations
 
 import sqlite3
 import json
+import time
+import atexit
 import threading
-from typing import Dict, Any, List, Optional
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime, timedelta
+from contextlib import contextmanager
 from pathlib import Path
 from loguru import logger
 from utils.logger import LoggerMixin
+from database.connection_pool import ReadConnectionPool
+from database.rollups import DetectionRollups, HOUR_MS, DAY_MS
+from database.partitions import TimePartitions, PARTITIONED_TABLES
+from database.backup import OnlineBackup
+from database.export import StreamingExport
+from database.metrics_store import MetricsStore, flatten_metrics
+
+# PRAGMA user_version of the current schema
+SCHEMA_VERSION = 4
+
+def legacy_epoch_ms(column: str) -> str:
+    """
+    SQL converting a pre-version-2 timestamp column to epoch milliseconds
+    
+    Those columns were TEXT and held local-time ISO strings or epoch seconds,
+    which the TEXT affinity stored as text as well.
+    """
+    return (
+        f"CASE WHEN {column} NOT LIKE '%-%' THEN CAST(ROUND(CAST({column} AS REAL) * 1000) AS INTEGER) "
+        f"ELSE CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER) END"
+    )
+
+def to_epoch_ms(timestamp: Any) -> int:
+    """Convert epoch seconds, a datetime or an ISO string to epoch milliseconds"""
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp * 1000)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return int(timestamp.timestamp() * 1000)
 
 class DatabaseManager(LoggerMixin):
     """Manages database operations and data persistence"""
@@ -21,14 +55,56 @@ class DatabaseManager(LoggerMixin):
         self.db_type = config.get('type', 'sqlite')
         self.db_path = config.get('path', 'data/iron_dome.db')
         self.backup_enabled = config.get('backup_enabled', True)
+        self.auto_backup = config.get('auto_backup', False)
         self.backup_interval = config.get('backup_interval', 86400)  # 24 hours
         
-        # Database connection
+        # One writer connection; queries use a pool of read-only connections
         self.connection = None
         self.lock = threading.Lock()
+        self.readers = None
+        self.journal_mode = config.get('journal_mode', 'wal')
+        self.synchronous = config.get('synchronous', 'normal')
+        self.read_pool_size = config.get('read_pool_size', 4)
+        self.class_ids = {}
+        self.rollups = DetectionRollups(config.get('rollups', {}))
+        self.partitions = TimePartitions(config.get('partitions', {}))
+        self.vacuum_pages = config.get('partitions', {}).get('vacuum_pages', 1024)
+        self.export_chunk_size = config.get('export', {}).get('chunk_size', 5000)
+        self.metrics = MetricsStore(config.get('metrics', {}))
+        self.writer_stats = {
+            'acquired': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0
+        }
+        
+        # Online backups run in their own thread, without the writer lock
+        self.backup = OnlineBackup(self.db_path, config.get('backup', {}))
+        self.backup_stop = threading.Event()
+        self.backup_thread = None
+        
+        # Write-behind buffer: 'sync' commits every row, 'batched' group-commits
+        write_config = config.get('write_behind', {})
+        self.durability = write_config.get('durability', 'batched')
+        self.batch_size = write_config.get('batch_size', 50)
+        self.flush_interval = write_config.get('flush_interval', 0.25)  # seconds
+        self.max_buffer = write_config.get('max_buffer', 5000)
         
-        # Backup tracking
-        self.last_backup = None
+        self.write_buffer = []
+        self.buffer_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flush_event = threading.Event()
+        self.flush_stop = threading.Event()
+        self.flush_thread = None
+        # Set by shutdown(): later writes are committed in the caller or refused
+        self.closing = False
+        self.buffer_stats = {
+            'flushes': 0,
+            'flushed_rows': 0,
+            'max_batch': 0,
+            'max_flush_time': 0.0,
+            'failed_flushes': 0,
+            'dropped_rows': 0
+        }
         
         self.logger.info(f"Database manager initialized for {self.db_type}: {self.db_path}")
     
@@ -45,10 +121,26 @@ class DatabaseManager(LoggerMixin):
             
             # Create tables
             self._create_tables()
+            self._migrate()
+            self._load_partitions()
+            self._load_class_ids()
             
             # Initialize backup system
             if self.backup_enabled:
                 self._initialize_backup_system()
+                if self.auto_backup and self.backup_interval > 0:
+                    self.backup_thread = threading.Thread(target=self._backup_loop, name="db-backup-schedule", daemon=True)
+                    self.backup_thread.start()
+            
+            # Start the group-commit thread
+            if self.durability == 'batched':
+                self.flush_thread = threading.Thread(target=self._flush_loop, name="db-flush", daemon=True)
+                self.flush_thread.start()
+                # Buffered rows still reach the disk if the process exits without shutdown()
+                atexit.register(self.flush)
+                self.logger.info(
+                    f"Write-behind buffer enabled (batch: {self.batch_size} rows, interval: {self.flush_interval}s)"
+                )
             
             self.logger.info("Database system initialized successfully")
             
@@ -66,7 +158,23 @@ class DatabaseManager(LoggerMixin):
                     timeout=30
                 )
                 self.connection.row_factory = sqlite3.Row
-                self.logger.info(f"SQLite database connected: {self.db_path}")
+                
+                # A new file returns the pages of dropped partitions to the OS;
+                # the mode can only be chosen before the first table exists
+                if self.connection.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()[0] == 0:
+                    self.connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                
+                # WAL lets readers work from the last commit while the writer appends
+                mode = self.connection.execute(f"PRAGMA journal_mode={self.journal_mode}").fetchone()[0]
+                self.connection.execute(f"PRAGMA synchronous={self.synchronous}")
+                if mode.lower() != self.journal_mode.lower():
+                    self.logger.warning(f"Journal mode {self.journal_mode} unavailable - using {mode}")
+                
+                self.readers = ReadConnectionPool(self.db_path, size=self.read_pool_size)
+                self.logger.info(
+                    f"SQLite database connected: {self.db_path} "
+                    f"(journal: {mode}, read pool: {self.read_pool_size})"
+                )
             else:
                 raise ValueError(f"Unsupported database type: {self.db_type}")
                 
@@ -77,66 +185,25 @@ class DatabaseManager(LoggerMixin):
     def _create_tables(self):
         """Create database tables"""
         try:
-            with self.lock:
+            with self._writer():
                 cursor = self.connection.cursor()
                 
-                # Detections table
+                # Class names referenced by integer ID from detection_boxes
                 cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS detections (
+                    CREATE TABLE IF NOT EXISTS detection_classes (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        classes TEXT NOT NULL,
-                        confidence REAL NOT NULL,
-                        image_path TEXT,
-                        processing_time REAL,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                        name TEXT NOT NULL UNIQUE
                     )
                 ''')
                 
-                # System events table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS system_events (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        event_type TEXT NOT NULL,
-                        message TEXT,
-                        severity TEXT DEFAULT 'info',
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+                # Detection counts per minute, hour and day
+                self.rollups.create(cursor)
                 
-                # Performance metrics table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS performance_metrics (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        cpu_usage REAL,
-                        memory_usage REAL,
-                        disk_usage REAL,
-                        detection_count INTEGER,
-                        error_count INTEGER,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Alerts table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS alerts (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        alert_type TEXT NOT NULL,
-                        message TEXT,
-                        detection_count INTEGER,
-                        severity TEXT DEFAULT 'warning',
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+                # System metrics per minute and per hour
+                self.metrics.create(cursor)
                 
-                # Create indexes for better performance
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections(timestamp)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_timestamp ON system_events(timestamp)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON performance_metrics(timestamp)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)')
+                # Time-series tables are views over the partitions in this catalog
+                self.partitions.create_catalog(cursor)
                 
                 self.connection.commit()
                 self.logger.info("Database tables created successfully")
@@ -145,39 +212,311 @@ class DatabaseManager(LoggerMixin):
             self.logger.error(f"Failed to create database tables: {e}")
             raise
     
+    def _migrate(self):
+        """Bring databases created by older versions up to SCHEMA_VERSION"""
+        with self._writer() as connection:
+            version = connection.execute('PRAGMA user_version').fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            
+            # All steps commit together or not at all
+            connection.execute('BEGIN IMMEDIATE')
+            
+            legacy = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detections'"
+            ).fetchone()
+            if not legacy:
+                # New database - the partitions are created on load
+                version = SCHEMA_VERSION
+            
+            if version < 1:
+                # Version 1: per-box rows. Older detections kept only class names and
+                # the max confidence, so they get one box row per class without coordinates
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS detection_boxes ({PARTITIONED_TABLES['detection_boxes'][1]})"
+                )
+                connection.execute('''
+                    INSERT OR IGNORE INTO detection_classes (name)
+                    SELECT DISTINCT j.value FROM detections d, json_each(d.classes) j
+                ''')
+                cursor = connection.execute(f'''
+                    INSERT INTO detection_boxes (detection_id, ts, class_id, confidence)
+                    SELECT d.id, {legacy_epoch_ms('d.timestamp')}, c.id, d.confidence
+                    FROM detections d, json_each(d.classes) j
+                    JOIN detection_classes c ON c.name = j.value
+                    WHERE NOT EXISTS (SELECT 1 FROM detection_boxes b WHERE b.detection_id = d.id)
+                ''')
+                if cursor.rowcount > 0:
+                    self.logger.info(f"Migrated {cursor.rowcount} detection class(es) to detection_boxes")
+            
+            if version < 2:
+                # Version 2: integer epoch-ms timestamps. SQLite cannot change a
+                # column type, so each table is copied into a new one
+                for table in ('detections', 'system_events', 'performance_metrics', 'alerts'):
+                    columns = PARTITIONED_TABLES[table][1]
+                    legacy_types = {row['name']: row['type'] for row in connection.execute(f'PRAGMA table_info({table})')}
+                    if not legacy_types or legacy_types.get('timestamp') == 'INTEGER':
+                        continue
+                    
+                    connection.execute(f'CREATE TABLE {table}_v2 ({columns})')
+                    names = [row['name'] for row in connection.execute(f'PRAGMA table_info({table}_v2)')
+                             if row['name'] in legacy_types]
+                    values = {
+                        'timestamp': legacy_epoch_ms('timestamp'),
+                        # CURRENT_TIMESTAMP text, which is UTC
+                        'created_at': "CAST(ROUND((julianday(created_at) - 2440587.5) * 86400000) AS INTEGER)"
+                    }
+                    cursor = connection.execute(f'''
+                        INSERT INTO {table}_v2 ({', '.join(names)})
+                        SELECT {', '.join(values.get(name, name) for name in names)} FROM {table}
+                    ''')
+                    connection.execute(f'DROP TABLE {table}')
+                    connection.execute(f'ALTER TABLE {table}_v2 RENAME TO {table}')
+                    self.logger.info(f"Migrated {cursor.rowcount} {table} row(s) to epoch-ms timestamps")
+            
+            if version < 3:
+                # Version 3: rollups of the detections already stored
+                written = self.rollups.rebuild(connection)
+                self.logger.info(f"Built {written} detection rollup row(s)")
+            
+            if version < 4:
+                # Version 4: time partitions behind views with the table names
+                for table in PARTITIONED_TABLES:
+                    moved = self.partitions.adopt(connection, table)
+                    self.logger.info(f"Moved {moved} {table} row(s) into time partitions")
+            
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            connection.commit()
+    
+    def _load_partitions(self):
+        """Load the partition catalog and create the time-series views"""
+        with self._writer() as connection:
+            self.partitions.load(connection)
+            connection.commit()
+        
+        self.logger.info(f"Time partitions loaded: {self.partitions.get_stats()['partitions']}")
+    
+    def _load_class_ids(self):
+        """Cache the class name to ID mapping"""
+        with self._writer() as connection:
+            self.class_ids = {row['name']: row['id'] for row in connection.execute('SELECT id, name FROM detection_classes')}
+    
+    def _get_class_id(self, connection: sqlite3.Connection, name: str) -> int:
+        """Get a class ID, registering new class names (writer lock held)"""
+        class_id = self.class_ids.get(name)
+        if class_id is None:
+            connection.execute('INSERT OR IGNORE INTO detection_classes (name) VALUES (?)', (name,))
+            class_id = connection.execute('SELECT id FROM detection_classes WHERE name = ?', (name,)).fetchone()[0]
+            self.class_ids[name] = class_id
+        return class_id
+    
     def _initialize_backup_system(self):
         """Initialize database backup system"""
         try:
             # Create backup directory
-            backup_dir = Path('data/backups')
-            backup_dir.mkdir(parents=True, exist_ok=True)
+            self.backup.backup_dir.mkdir(parents=True, exist_ok=True)
             
             self.logger.info("Database backup system initialized")
             
         except Exception as e:
             self.logger.error(f"Failed to initialize backup system: {e}")
     
+    @contextmanager
+    def _writer(self):
+        """Hold the writer connection, recording how long the lock took"""
+        start = time.monotonic()
+        with self.lock:
+            wait = time.monotonic() - start
+            self.writer_stats['acquired'] += 1
+            self.writer_stats['total_wait'] += wait
+            self.writer_stats['max_wait'] = max(self.writer_stats['max_wait'], wait)
+            self.backup.record_wait(wait)
+            yield self.connection
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Get writer lock wait and reader pool usage metrics"""
+        acquired = self.writer_stats['acquired']
+        return {
+            'journal_mode': self.journal_mode,
+            'writer': {
+                'acquired': acquired,
+                'avg_lock_wait_ms': round(self.writer_stats['total_wait'] / acquired * 1000, 3) if acquired else 0.0,
+                'max_lock_wait_ms': round(self.writer_stats['max_wait'] * 1000, 3)
+            },
+            'readers': self.readers.get_stats() if self.readers else None
+        }
+    
+    def _write(self, sql, params) -> bool:
+        """
+        Insert one row, either now or through the write-behind buffer
+        
+        In sync mode the row is committed before returning. In batched mode it
+        is buffered and committed by the flush thread together with the rows
+        of every table, once batch_size rows are waiting or flush_interval
+        has passed. sql may also be a function called with the writer
+        connection and params, for writes spanning several tables.
+        
+        Once shutdown() has started, rows are committed in the caller, and
+        refused after the connection is closed.
+        
+        Returns:
+            True if the row was committed or buffered
+        
+        Raises:
+            RuntimeError: If the database has been shut down
+        """
+        with self.buffer_lock:
+            buffered = self.durability != 'sync' and self.flush_thread is not None and not self.closing
+            if buffered:
+                self.write_buffer.append((sql, params))
+                pending = len(self.write_buffer)
+        
+        if not buffered:
+            with self._writer() as connection:
+                if connection is None:
+                    raise RuntimeError("Database connection is closed")
+                try:
+                    self._execute(connection, sql, [params])
+                    connection.commit()
+                except Exception:
+                    self._rollback(connection)
+                    raise
+            return True
+            
+        if pending >= self.max_buffer:
+            # The flush thread is falling behind - write in the caller
+            self.flush()
+        elif pending >= self.batch_size:
+            self.flush_event.set()
+        return True
+    
+    def _execute(self, connection: sqlite3.Connection, sql, rows: List[Any]):
+        """Run buffered writes of one kind (writer lock held)"""
+        if callable(sql):
+            for params in rows:
+                sql(connection, params)
+        else:
+            connection.executemany(sql, rows)
+    
+    def _rollback(self, connection: sqlite3.Connection):
+        """Roll back a failed write, forgetting partitions it may have created (writer lock held)"""
+        connection.rollback()
+        self.partitions.load(connection)
+        connection.commit()
+    
+    def _insert_row(self, connection: sqlite3.Connection, item: tuple):
+        """Insert a (table, row) pair into the partition for its timestamp (writer lock held)"""
+        table, row = item
+        self.partitions.insert(connection, table, row)
+    
+    def _insert_detection(self, connection: sqlite3.Connection, detection_data: Dict[str, Any]):
+        """Insert a detection, one detection_boxes row per box and its rollups (writer lock held)"""
+        ts = to_epoch_ms(detection_data.get('timestamp', time.time()))
+        detection_id = self.partitions.insert(connection, 'detections', {
+            'timestamp': ts,
+            'classes': json.dumps(detection_data.get('classes', [])),
+            'confidence': detection_data.get('confidence', 0.0),
+            'image_path': detection_data.get('image_path', ''),
+            'processing_time': detection_data.get('processing_time', 0.0)
+        })
+        
+        camera_id = detection_data.get('camera_id')
+        boxes = []
+        for box in detection_data.get('detections', []):
+            x1, y1, x2, y2 = (box.get('bbox') or [None] * 4)[:4]
+            class_id = self._get_class_id(connection, box['class_name'])
+            confidence = box.get('confidence', 0.0)
+            self.partitions.insert(connection, 'detection_boxes', {
+                'detection_id': detection_id,
+                'ts': ts,
+                'camera_id': camera_id,
+                'class_id': class_id,
+                'confidence': confidence,
+                'x1': x1,
+                'y1': y1,
+                'x2': x2,
+                'y2': y2
+            })
+            boxes.append((class_id, confidence))
+        
+        # Same transaction, so the rollups always match the raw rows
+        self.rollups.add(connection, ts, camera_id, detection_data.get('confidence', 0.0), boxes)
+    
+    def _flush_loop(self):
+        """Commit buffered rows per batch_size rows or per flush_interval"""
+        while not self.flush_stop.is_set():
+            self.flush_event.wait(self.flush_interval)
+            self.flush_event.clear()
+            self.flush()
+    
+    def flush(self) -> int:
+        """
+        Commit every buffered row in one transaction
+        
+        Returns:
+            Number of rows committed
+        """
+        with self.flush_lock:
+            with self.buffer_lock:
+                if not self.write_buffer or self.connection is None:
+                    # Rows stay buffered rather than being dropped
+                    return 0
+                rows = self.write_buffer
+                self.write_buffer = []
+                
+            start = time.monotonic()
+            try:
+                with self._writer() as connection:
+                    # Consecutive rows for the same table go in one executemany
+                    for sql, group in groupby(rows, key=itemgetter(0)):
+                        self._execute(connection, sql, [params for _, params in group])
+                    connection.commit()
+                    
+            except Exception as e:
+                with self._writer() as connection:
+                    self._rollback(connection)
+                with self.buffer_lock:
+                    self.buffer_stats['failed_flushes'] += 1
+                    # Keep the rows for the next flush unless the buffer is full
+                    if len(self.write_buffer) + len(rows) <= self.max_buffer:
+                        self.write_buffer = rows + self.write_buffer
+                    else:
+                        self.buffer_stats['dropped_rows'] += len(rows)
+                self.logger.error(f"Failed to flush {len(rows)} buffered row(s): {e}")
+                return 0
+                
+            elapsed = time.monotonic() - start
+            with self.buffer_lock:
+                self.buffer_stats['flushes'] += 1
+                self.buffer_stats['flushed_rows'] += len(rows)
+                self.buffer_stats['max_batch'] = max(self.buffer_stats['max_batch'], len(rows))
+                self.buffer_stats['max_flush_time'] = max(self.buffer_stats['max_flush_time'], elapsed)
+            return len(rows)
+    
+    def get_buffer_stats(self) -> Dict[str, Any]:
+        """Get write-behind buffer metrics"""
+        with self.buffer_lock:
+            flushes = self.buffer_stats['flushes']
+            return {
+                'durability': self.durability,
+                'pending': len(self.write_buffer),
+                'flushes': flushes,
+                'flushed_rows': self.buffer_stats['flushed_rows'],
+                'avg_batch': round(self.buffer_stats['flushed_rows'] / flushes, 1) if flushes else 0.0,
+                'max_batch': self.buffer_stats['max_batch'],
+                'max_flush_ms': round(self.buffer_stats['max_flush_time'] * 1000, 2),
+                'failed_flushes': self.buffer_stats['failed_flushes'],
+                'dropped_rows': self.buffer_stats['dropped_rows']
+            }
+    
     def log_detection(self, detection_data: Dict[str, Any]) -> bool:
         """Log a detection to the database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO detections (timestamp, classes, confidence, image_path, processing_time)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    detection_data.get('timestamp', datetime.now().isoformat()),
-                    json.dumps(detection_data.get('classes', [])),
-                    detection_data.get('confidence', 0.0),
-                    detection_data.get('image_path', ''),
-                    detection_data.get('processing_time', 0.0)
-                ))
-                
-                self.connection.commit()
-                self.logger.info("Detection logged to database")
-                return True
-                
+            self._write(self._insert_detection, detection_data)
+            
+            self.logger.info("Detection logged to database")
+            return True
+            
         except Exception as e:
             self.logger.error(f"Failed to log detection: {e}")
             return False
@@ -185,22 +524,13 @@ class DatabaseManager(LoggerMixin):
     def log_event(self, event_type: str, message: str, severity: str = 'info') -> bool:
         """Log a system event to the database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO system_events (timestamp, event_type, message, severity)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    event_type,
-                    message,
-                    severity
-                ))
-                
-                self.connection.commit()
-                return True
-                
+            return self._write(self._insert_row, ('system_events', {
+                'timestamp': to_epoch_ms(time.time()),
+                'event_type': event_type,
+                'message': message,
+                'severity': severity
+            }))
+            
         except Exception as e:
             self.logger.error(f"Failed to log event: {e}")
             return False
@@ -208,24 +538,15 @@ class DatabaseManager(LoggerMixin):
     def log_performance_metrics(self, metrics: Dict[str, Any]) -> bool:
         """Log performance metrics to the database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO performance_metrics (timestamp, cpu_usage, memory_usage, disk_usage, detection_count, error_count)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    metrics.get('cpu_usage', 0.0),
-                    metrics.get('memory_usage', 0.0),
-                    metrics.get('disk_usage', 0.0),
-                    metrics.get('detection_count', 0),
-                    metrics.get('error_count', 0)
-                ))
-                
-                self.connection.commit()
-                return True
-                
+            return self._write(self._insert_row, ('performance_metrics', {
+                'timestamp': to_epoch_ms(time.time()),
+                'cpu_usage': metrics.get('cpu_usage', 0.0),
+                'memory_usage': metrics.get('memory_usage', 0.0),
+                'disk_usage': metrics.get('disk_usage', 0.0),
+                'detection_count': metrics.get('detection_count', 0),
+                'error_count': metrics.get('error_count', 0)
+            }))
+            
         except Exception as e:
             self.logger.error(f"Failed to log performance metrics: {e}")
             return False
@@ -233,32 +554,58 @@ class DatabaseManager(LoggerMixin):
     def log_alert(self, alert_type: str, message: str, detection_count: int = 0, severity: str = 'warning') -> bool:
         """Log an alert to the database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO alerts (timestamp, alert_type, message, detection_count, severity)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    alert_type,
-                    message,
-                    detection_count,
-                    severity
-                ))
-                
-                self.connection.commit()
-                return True
-                
+            return self._write(self._insert_row, ('alerts', {
+                'timestamp': to_epoch_ms(time.time()),
+                'alert_type': alert_type,
+                'message': message,
+                'detection_count': detection_count,
+                'severity': severity
+            }))
+            
         except Exception as e:
             self.logger.error(f"Failed to log alert: {e}")
             return False
     
+    def update_metrics(self, metrics: Dict[str, Any]) -> bool:
+        """
+        Record a sample of system metrics
+        
+        Numeric values, including those of nested dicts, are kept raw in
+        memory and rolled up per minute and per hour; see MetricsStore.
+        """
+        try:
+            rows = self.metrics.add(to_epoch_ms(time.time()), flatten_metrics(metrics))
+            if rows:
+                self._write(self.metrics.write, rows)
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Failed to update metrics: {e}")
+            return False
+    
+    def get_metrics(self, names: Optional[List[str]] = None, hours: float = 1.0,
+                    max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get metric series over the last hours at the best stored resolution
+        
+        Raw samples are used while the in-memory buffer reaches back far
+        enough, then minute and then hour rollups, keeping each series to
+        max_points points.
+        """
+        try:
+            now_ms = to_epoch_ms(time.time())
+            with self.readers.connection() as connection:
+                return self.metrics.query(connection, now_ms - int(hours * HOUR_MS), now_ms + 1, now_ms, names, max_points)
+        
+        except Exception as e:
+            self.logger.error(f"Failed to get metrics: {e}")
+            return {'error': str(e)}
+    
     def get_detections(self, limit: int = 100, days: int = 7) -> List[Dict[str, Any]]:
         """Get recent detections from database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
                 
                 cutoff_date = datetime.now() - timedelta(days=days)
                 
@@ -267,7 +614,7 @@ class DatabaseManager(LoggerMixin):
                     WHERE timestamp > ? 
                     ORDER BY timestamp DESC 
                     LIMIT ?
-                ''', (cutoff_date.isoformat(), limit))
+                ''', (to_epoch_ms(cutoff_date), limit))
                 
                 rows = cursor.fetchall()
                 detections = []
@@ -286,8 +633,8 @@ class DatabaseManager(LoggerMixin):
     def get_events(self, limit: int = 100, days: int = 7) -> List[Dict[str, Any]]:
         """Get recent system events from database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
                 
                 cutoff_date = datetime.now() - timedelta(days=days)
                 
@@ -296,7 +643,7 @@ class DatabaseManager(LoggerMixin):
                     WHERE timestamp > ? 
                     ORDER BY timestamp DESC 
                     LIMIT ?
-                ''', (cutoff_date.isoformat(), limit))
+                ''', (to_epoch_ms(cutoff_date), limit))
                 
                 rows = cursor.fetchall()
                 return [dict(row) for row in rows]
@@ -308,8 +655,8 @@ class DatabaseManager(LoggerMixin):
     def get_performance_metrics(self, limit: int = 100, days: int = 7) -> List[Dict[str, Any]]:
         """Get recent performance metrics from database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
                 
                 cutoff_date = datetime.now() - timedelta(days=days)
                 
@@ -318,7 +665,7 @@ class DatabaseManager(LoggerMixin):
                     WHERE timestamp > ? 
                     ORDER BY timestamp DESC 
                     LIMIT ?
-                ''', (cutoff_date.isoformat(), limit))
+                ''', (to_epoch_ms(cutoff_date), limit))
                 
                 rows = cursor.fetchall()
                 return [dict(row) for row in rows]
@@ -330,8 +677,8 @@ class DatabaseManager(LoggerMixin):
     def get_alerts(self, limit: int = 100, days: int = 7) -> List[Dict[str, Any]]:
         """Get recent alerts from database"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
                 
                 cutoff_date = datetime.now() - timedelta(days=days)
                 
@@ -340,7 +687,7 @@ class DatabaseManager(LoggerMixin):
                     WHERE timestamp > ? 
                     ORDER BY timestamp DESC 
                     LIMIT ?
-                ''', (cutoff_date.isoformat(), limit))
+                ''', (to_epoch_ms(cutoff_date), limit))
                 
                 rows = cursor.fetchall()
                 return [dict(row) for row in rows]
@@ -350,46 +697,35 @@ class DatabaseManager(LoggerMixin):
             return []
     
     def get_analytics_summary(self, days: int = 30) -> Dict[str, Any]:
-        """Get analytics summary from database"""
+        """
+        Get analytics summary from the detection rollups
+        
+        Reads a few hundred rollup rows (whole days, then hours and minutes
+        at the window's start) instead of scanning the raw detections.
+        """
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
-                
-                cutoff_date = datetime.now() - timedelta(days=days)
+            with self.readers.connection() as connection:
+                now_ms = to_epoch_ms(time.time())
+                start_ms = now_ms - days * DAY_MS
                 
-                # Total detections
-                cursor.execute('''
-                    SELECT COUNT(*) as count FROM detections WHERE timestamp > ?
-                ''', (cutoff_date.isoformat(),))
-                total_detections = cursor.fetchone()['count']
-                
-                # Average confidence
-                cursor.execute('''
-                    SELECT AVG(confidence) as avg_confidence FROM detections WHERE timestamp > ?
-                ''', (cutoff_date.isoformat(),))
-                avg_confidence = cursor.fetchone()['avg_confidence'] or 0
+                # Total detections and average confidence
+                total_detections, confidence_sum = self.rollups.totals(connection, start_ms, now_ms + 1)
+                avg_confidence = confidence_sum / total_detections if total_detections else 0
                 
                 # Unique classes
-                cursor.execute('''
-                    SELECT DISTINCT classes FROM detections WHERE timestamp > ?
-                ''', (cutoff_date.isoformat(),))
-                classes_rows = cursor.fetchall()
-                unique_classes = set()
-                for row in classes_rows:
-                    classes = json.loads(row['classes'])
-                    unique_classes.update(classes)
+                names = {class_id: name for name, class_id in self.class_ids.items()}
+                unique_classes = [
+                    names.get(class_id, str(class_id))
+                    for class_id in self.rollups.class_ids(connection, start_ms, now_ms + 1)
+                ]
                 
                 # Recent detections (last 24 hours)
-                recent_cutoff = datetime.now() - timedelta(hours=24)
-                cursor.execute('''
-                    SELECT COUNT(*) as count FROM detections WHERE timestamp > ?
-                ''', (recent_cutoff.isoformat(),))
-                recent_detections = cursor.fetchone()['count']
+                recent_detections, _ = self.rollups.totals(connection, now_ms - 24 * HOUR_MS, now_ms + 1)
                 
                 return {
                     'total_detections': total_detections,
                     'recent_detections_24h': recent_detections,
-                    'unique_classes_detected': list(unique_classes),
+                    'unique_classes_detected': unique_classes,
                     'average_confidence': round(avg_confidence, 3),
                     'detection_rate_per_hour': recent_detections / 24 if recent_detections > 0 else 0
                 }
@@ -398,71 +734,242 @@ class DatabaseManager(LoggerMixin):
             self.logger.error(f"Failed to get analytics summary: {e}")
             return {'error': str(e)}
     
-    def cleanup_old_data(self, days: int = 30) -> int:
-        """Clean up old data from database"""
+    def rebuild_rollups(self) -> int:
+        """
+        Recompute the detection rollups from the raw tables
+        
+        Returns:
+            Number of rollup rows written
+        """
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
-                
-                cutoff_date = datetime.now() - timedelta(days=days)
-                
-                # Count records to be deleted
-                cursor.execute('SELECT COUNT(*) as count FROM detections WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                detections_to_delete = cursor.fetchone()['count']
-                
-                cursor.execute('SELECT COUNT(*) as count FROM system_events WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                events_to_delete = cursor.fetchone()['count']
-                
-                cursor.execute('SELECT COUNT(*) as count FROM performance_metrics WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                metrics_to_delete = cursor.fetchone()['count']
+            self.flush()
+            with self._writer() as connection:
+                written = self.rollups.rebuild(connection)
+                connection.commit()
+            self.logger.info(f"Rebuilt {written} detection rollup row(s)")
+            return written
+        
+        except Exception as e:
+            with self._writer() as connection:
+                self._rollback(connection)
+            self.logger.error(f"Failed to rebuild detection rollups: {e}")
+            return 0
+    
+    def get_class_counts(self, class_name: Optional[str] = None, camera_id: Optional[str] = None,
+                         hours: int = 24, bucket_seconds: int = 3600) -> List[Dict[str, Any]]:
+        """
+        Count detected boxes per camera, class and time bucket
+        
+        Filtering by class or camera is answered from the covering
+        (class_id, ts, camera_id) or (camera_id, ts, class_id) index.
+        
+        Args:
+            class_name: Only count this class (all classes if None)
+            camera_id: Only count this camera (all cameras if None)
+            hours: How far back to count
+            bucket_seconds: Bucket width, e.g. 3600 for per-hour counts
+        
+        Returns:
+            Rows with camera_id, class, bucket_start (epoch ms) and count
+        """
+        try:
+            bucket_ms = bucket_seconds * 1000
+            conditions = ['b.ts > ?']
+            params = [to_epoch_ms(datetime.now() - timedelta(hours=hours))]
+            
+            if class_name is not None:
+                class_id = self.class_ids.get(class_name)
+                if class_id is None:
+                    return []
+                conditions.insert(0, 'b.class_id = ?')
+                params.insert(0, class_id)
+            if camera_id is not None:
+                conditions.insert(0, 'b.camera_id = ?')
+                params.insert(0, camera_id)
+            
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f'''
+                    SELECT b.camera_id, b.class_id, (b.ts / ?) * ? AS bucket_start, COUNT(*) AS count
+                    FROM detection_boxes b
+                    WHERE {' AND '.join(conditions)}
+                    GROUP BY b.camera_id, b.class_id, bucket_start
+                    ORDER BY bucket_start, b.camera_id
+                ''', (bucket_ms, bucket_ms, *params))
                 
-                cursor.execute('SELECT COUNT(*) as count FROM alerts WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                alerts_to_delete = cursor.fetchone()['count']
+                names = {class_id: name for name, class_id in self.class_ids.items()}
+                return [
+                    {
+                        'camera_id': row['camera_id'],
+                        'class': names.get(row['class_id'], str(row['class_id'])),
+                        'bucket_start': row['bucket_start'],
+                        'count': row['count']
+                    }
+                    for row in cursor.fetchall()
+                ]
+        
+        except Exception as e:
+            self.logger.error(f"Failed to get class counts: {e}")
+            return []
+    
+    def export_stream(self, fmt: str, table: str = 'detections', start_ms: Optional[int] = None,
+                      end_ms: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Stream a time-series table as NDJSON, CSV or Parquet
+        
+        Rows are read export_chunk_size at a time with keyset pagination on
+        (timestamp, id), so memory use does not grow with the row count; see
+        StreamingExport.
+        
+        Raises:
+            ValueError: For an unknown format or table
+            RuntimeError: For Parquet without pyarrow installed
+        """
+        # Rows still waiting in the buffer belong in the export
+        self.flush()
+        return StreamingExport(self.readers, self.export_chunk_size).stream(fmt, table, start_ms, end_ms)
+    
+    def export(self, fmt: str, path: str, table: str = 'detections', start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Export a time-series table to a file
+        
+        Returns:
+            Rows and bytes written, or None on failure
+        """
+        try:
+            self.flush()
+            start = time.monotonic()
+            exporter = StreamingExport(self.readers, self.export_chunk_size)
+            with open(path, 'wb') as output:
+                result = exporter.write(fmt, output, table, start_ms, end_ms)
+            
+            result['seconds'] = round(time.monotonic() - start, 2)
+            self.logger.info(f"Exported {result['rows']} {table} row(s) to {path} ({result['bytes']} bytes)")
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"Failed to export {table}: {e}")
+            return None
+    
+    def cleanup_old_data(self, days: int = 30) -> int:
+        """
+        Clean up old data from database
+        
+        Drops the partitions whose whole period is older than the cutoff, one
+        per transaction, instead of deleting rows through the indexes; rows up
+        to one partition period past the cutoff stay until their partition
+        expires. Freed pages are returned to the OS in vacuum_pages steps,
+        releasing the writer lock between steps.
+        """
+        try:
+            self.flush()
+            cutoff_ms = to_epoch_ms(datetime.now() - timedelta(days=days))
+            expired = self.partitions.expired(cutoff_ms)
                 
-                # Delete old records
-                cursor.execute('DELETE FROM detections WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                cursor.execute('DELETE FROM system_events WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                cursor.execute('DELETE FROM performance_metrics WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                cursor.execute('DELETE FROM alerts WHERE timestamp < ?', (cutoff_date.isoformat(),))
+            # Count from a reader so the writer is not held up
+            total_deleted = 0
+            with self.readers.connection() as connection:
+                for table, name in expired:
+                    if table != 'detection_boxes':
+                        total_deleted += connection.execute(f'SELECT COUNT(*) FROM {name}').fetchone()[0]
                 
-                self.connection.commit()
+            # One partition per transaction, so writers wait for one drop at most
+            for partition in expired:
+                with self._writer() as connection:
+                    try:
+                        self.partitions.drop(connection, [partition])
+                        connection.commit()
+                    except Exception:
+                        self._rollback(connection)
+                        raise
                 
-                total_deleted = detections_to_delete + events_to_delete + metrics_to_delete + alerts_to_delete
-                self.logger.info(f"Cleaned up {total_deleted} old records from database")
+            # Rollups keep their own, longer retention
+            with self._writer() as connection:
+                self.rollups.cleanup(connection, to_epoch_ms(time.time()))
+                self.metrics.cleanup(connection, to_epoch_ms(time.time()))
+                connection.commit()
                 
-                return total_deleted
+            freed_pages = self._release_free_pages()
+            self.logger.info(
+                f"Cleaned up {total_deleted} old records from database "
+                f"({len(expired)} partition(s) dropped, {freed_pages} page(s) released)"
+            )
+            return total_deleted
                 
         except Exception as e:
             self.logger.error(f"Failed to cleanup old data: {e}")
             return 0
     
-    def backup_database(self) -> bool:
-        """Create a backup of the database"""
+    def _release_free_pages(self) -> int:
+        """
+        Return free pages to the OS, vacuum_pages at a time
+        
+        Returns:
+            Number of pages released
+        """
+        with self._writer() as connection:
+            if connection.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                # Files created before partitioning keep their free pages for reuse
+                return 0
+        
+        released = 0
+        while True:
+            with self._writer() as connection:
+                before = connection.execute('PRAGMA freelist_count').fetchone()[0]
+                if before == 0:
+                    break
+                connection.execute(f'PRAGMA incremental_vacuum({self.vacuum_pages})').fetchall()
+                connection.commit()
+                after = connection.execute('PRAGMA freelist_count').fetchone()[0]
+            
+            if after >= before:
+                break
+            released += before - after
+        return released
+    
+    def backup_database(self, wait: bool = False) -> bool:
+        """
+        Create a backup of the database
+        
+        The copy runs in a background thread from a read-only snapshot, so
+        writes continue while it is taken; see OnlineBackup.
+        
+        Args:
+            wait: Block until the backup is complete
+        
+        Returns:
+            True if the backup was started (or, with wait, completed)
+        """
         try:
             if not self.backup_enabled:
                 return True
             
-            backup_path = Path(f"data/backups/iron_dome_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+            # The backup must include rows still waiting in the buffer
+            self.flush()
             
-            with self.lock:
-                # Create backup
-                backup_connection = sqlite3.connect(backup_path)
-                self.connection.backup(backup_connection)
-                backup_connection.close()
+            if wait:
+                return self.backup.run()['success']
             
-            self.last_backup = datetime.now()
-            self.logger.info(f"Database backup created: {backup_path}")
+            if not self.backup.start():
+                self.logger.warning("Database backup already running")
+                return False
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to backup database: {e}")
             return False
     
+    def _backup_loop(self):
+        """Take a backup every backup_interval seconds"""
+        while not self.backup_stop.wait(self.backup_interval):
+            self.backup_database(wait=True)
+    
     def get_status(self) -> Dict[str, Any]:
         """Get database status"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
                 
                 # Get table sizes
                 cursor.execute('SELECT COUNT(*) as count FROM detections')
@@ -481,7 +988,12 @@ class DatabaseManager(LoggerMixin):
                     'type': self.db_type,
                     'path': self.db_path,
                     'backup_enabled': self.backup_enabled,
-                    'last_backup': self.last_backup.isoformat() if self.last_backup else None,
+                    'last_backup': self.backup.last_backup.isoformat() if self.backup.last_backup else None,
+                    'backup': self.backup.get_stats(),
+                    'write_buffer': self.get_buffer_stats(),
+                    'connections': self.get_connection_stats(),
+                    'partitions': self.partitions.get_stats(),
+                    'metrics': self.metrics.get_stats(),
                     'table_sizes': {
                         'detections': detections_count,
                         'events': events_count,
@@ -497,8 +1009,8 @@ class DatabaseManager(LoggerMixin):
     def check_health(self) -> Dict[str, Any]:
         """Check database health"""
         try:
-            with self.lock:
-                cursor = self.connection.cursor()
+            with self.readers.connection() as connection:
+                cursor = connection.cursor()
                 cursor.execute('SELECT 1')
                 cursor.fetchone()
                 
@@ -520,10 +1032,37 @@ class DatabaseManager(LoggerMixin):
         """Shutdown database system"""
         self.logger.info("Shutting down database system...")
         
+        # From here on writers commit their own rows instead of buffering them
+        with self.buffer_lock:
+            self.closing = True
+        
+        # Let a running backup finish before the connection closes
+        self.backup_stop.set()
+        self.backup.wait(timeout=30.0)
+        
+        # Commit every buffered row before the connection closes
+        open_minute = self.metrics.close()
+        if open_minute and self.connection is not None:
+            self._write(self.metrics.write, open_minute)
+        self.flush_stop.set()
+        self.flush_event.set()
+        if self.flush_thread and self.flush_thread.is_alive():
+            self.flush_thread.join(timeout=5.0)
+        flushed = self.flush()
+        if flushed:
+            self.logger.info(f"Flushed {flushed} buffered row(s) on shutdown")
+        
         try:
-            if self.connection:
-                self.connection.close()
-                self.logger.info("Database connection closed")
+            if self.readers:
+                self.readers.close()
+            # No flush or write may be running while the connection closes
+            with self.flush_lock, self._writer():
+                if self.connection:
+                    self.connection.close()
+                    self.connection = None
+                    self.logger.info("Database connection closed")
+            if self.write_buffer:
+                self.logger.error(f"{len(self.write_buffer)} buffered row(s) could not be committed before shutdown")
         except Exception as e:
             self.logger.error(f"Error closing database connection: {e}")
         
@@ -0,0 +1,198 @@
+"""
+Streaming Export for Iron Dome for Mosquitoes
+Exports time-series tables as NDJSON, CSV or Parquet in fixed-size chunks
+"""
+
+import io
+import csv
+import json
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from utils.startup_profiler import startup_profiler
+from database.partitions import PARTITIONED_TABLES
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Columns holding JSON text, decoded in NDJSON output
+JSON_COLUMNS = {'detections': {'classes'}}
+
+# Arrow types by declared SQLite column type
+ARROW_TYPES = {'INTEGER': 'int64', 'REAL': 'float64', 'TEXT': 'string'}
+
+class _ByteSink:
+    """Write-only file handing out its bytes as they are written"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+class StreamingExport:
+    """
+    Exports a time-series table without loading it into memory
+
+    Rows are read chunk_size at a time in (time, id) order. Each chunk is a
+    separate keyset query - time and id greater than the last row of the
+    previous chunk - on a freshly borrowed read connection, so a slow
+    download neither holds a pooled connection nor pins a WAL snapshot, and
+    each query starts from the partition indexes instead of skipping an
+    OFFSET. Rows committed during the export are included if they sort
+    after the last row already sent.
+
+    Memory use is one chunk plus the encoder state, whatever the row count.
+    Parquet needs pyarrow, imported on first use; each chunk becomes one row
+    group.
+    """
+
+    def __init__(self, readers, chunk_size: int = 5000):
+        self.readers = readers
+        self.chunk_size = max(1, chunk_size)
+        self.rows = 0
+
+    def columns(self, table: str) -> List[Tuple[str, str]]:
+        """(name, declared type) of every column of a table"""
+        with self.readers.connection() as connection:
+            return [(row[1], row[2].upper()) for row in connection.execute(f'PRAGMA table_info({table})')]
+
+    def chunks(self, table: str, columns: List[str], start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None) -> Iterator[List[tuple]]:
+        """Yield the rows of [start_ms, end_ms) in (time, id) order, chunk_size at a time"""
+        time_column = PARTITIONED_TABLES[table][0]
+        range_filter = f'{time_column} >= ? AND {time_column} < ?'
+        range_params = (start_ms if start_ms is not None else -2 ** 63, end_ms if end_ms is not None else 2 ** 63 - 1)
+        select = f"SELECT {', '.join(columns)} FROM {table}"
+        time_index = columns.index(time_column)
+        id_index = columns.index('id')
+
+        last = None
+        while True:
+            with self.readers.connection() as connection:
+                if last is None:
+                    cursor = connection.execute(f'''
+                        {select} WHERE {range_filter}
+                        ORDER BY {time_column}, id LIMIT ?
+                    ''', (*range_params, self.chunk_size))
+                else:
+                    cursor = connection.execute(f'''
+                        {select} WHERE {range_filter} AND ({time_column}, id) > (?, ?)
+                        ORDER BY {time_column}, id LIMIT ?
+                    ''', (*range_params, *last, self.chunk_size))
+                rows = [tuple(row) for row in cursor]
+
+            if not rows:
+                return
+            self.rows += len(rows)
+            yield rows
+            if len(rows) < self.chunk_size:
+                return
+            last = (rows[-1][time_index], rows[-1][id_index])
+
+    def stream(self, fmt: str, table: str = 'detections', start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Encoded export of a table, as an iterator of byte strings
+
+        Raises:
+            ValueError: For an unknown format or table
+            RuntimeError: For Parquet without pyarrow installed
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}' (expected one of {', '.join(EXPORT_FORMATS)})")
+        if table not in PARTITIONED_TABLES:
+            raise ValueError(f"Unknown export table '{table}' (expected one of {', '.join(PARTITIONED_TABLES)})")
+
+        columns = self.columns(table)
+        names = [name for name, _ in columns]
+        chunks = self.chunks(table, names, start_ms, end_ms)
+        if fmt == 'ndjson':
+            return self._ndjson(names, JSON_COLUMNS.get(table, set()), chunks)
+        if fmt == 'csv':
+            return self._csv(names, chunks)
+        return self._parquet(columns, chunks)
+
+    def _ndjson(self, names: List[str], json_columns: set, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        """One JSON object per row"""
+        decode = [name in json_columns for name in names]
+        for rows in chunks:
+            lines = []
+            for row in rows:
+                record = {
+                    name: json.loads(value) if is_json and value is not None else value
+                    for name, value, is_json in zip(names, row, decode)
+                }
+                lines.append(json.dumps(record))
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def _csv(self, names: List[str], chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        """A header row, then one line per row"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def _parquet(self, columns: List[Tuple[str, str]], chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        """One row group per chunk"""
+        try:
+            pa = startup_profiler.import_module('pyarrow')
+            pq = startup_profiler.import_module('pyarrow.parquet')
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        schema = pa.schema([(name, getattr(pa, ARROW_TYPES.get(decltype, 'string'))()) for name, decltype in columns])
+        return self._parquet_chunks(pa, pq, schema, chunks)
+
+    def _parquet_chunks(self, pa, pq, schema, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        """Write row groups to a sink, handing out the bytes after each one"""
+        sink = _ByteSink()
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+        try:
+            for rows in chunks:
+                arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                yield sink.take()
+        finally:
+            writer.close()
+        yield sink.take()
+
+    def write(self, fmt: str, output, table: str = 'detections', start_ms: Optional[int] = None,
+              end_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Write an export to a binary file object
+
+        Returns:
+            Rows and bytes written
+        """
+        self.rows = 0
+        written = 0
+        for data in self.stream(fmt, table, start_ms, end_ms):
+            output.write(data)
+            written += len(data)
+        return {'rows': self.rows, 'bytes': written}
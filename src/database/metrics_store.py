@@ -0,0 +1,262 @@
+"""
+Metrics Store for Iron Dome for Mosquitoes
+System metrics kept raw in memory and downsampled per minute and per hour
+"""
+
+import math
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Any, List, Optional
+from database.rollups import MINUTE_MS, HOUR_MS, DAY_MS
+
+# Resolution of the raw samples held in memory
+RAW = 0
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    """
+    Numeric values of a nested metrics dict, keyed by dotted path
+
+    Booleans become 0.0 or 1.0; strings, lists and None are skipped.
+    """
+    values = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, (bool, int, float)) and not (isinstance(value, float) and math.isnan(value)):
+            values[name] = float(value)
+    return values
+
+class MetricsStore:
+    """
+    Time series of system metrics at raw, minute and hour resolution
+
+    Raw samples go to a fixed-size ring in memory: one timestamp column shared
+    by one float column per metric, raw_samples slots each, with NaN where a
+    sample lacked the metric. Every sample also updates the count, sum, min
+    and max of the open minute; when the minute closes, its aggregates are
+    upserted into metric_rollups at minute and hour resolution, so the hour
+    rows are built from the minutes. Storage is bounded: at most max_metrics
+    series, a fixed raw ring, and a retention per resolution.
+
+    query() picks the finest resolution that still covers the start of the
+    window in at most max_points points. The open minute is merged in from
+    memory, so the latest bucket is never missing.
+    """
+
+    UPSERT = '''
+        INSERT INTO metric_rollups (resolution, metric, bucket, count, total, minimum, maximum)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (resolution, metric, bucket) DO UPDATE SET
+            count = count + excluded.count,
+            total = total + excluded.total,
+            minimum = MIN(minimum, excluded.minimum),
+            maximum = MAX(maximum, excluded.maximum)
+    '''
+
+    def __init__(self, config: Dict[str, Any]):
+        self.raw_capacity = max(1, config.get('raw_samples', 720))
+        self.max_metrics = config.get('max_metrics', 256)
+        self.max_points = config.get('max_points', 500)
+        self.retention_days = {
+            MINUTE_MS: config.get('minute_retention_days', 7),
+            HOUR_MS: config.get('hour_retention_days', 365)
+        }
+
+        self.lock = threading.Lock()
+        self.timestamps = array('q', [0]) * self.raw_capacity
+        self.columns = {}
+        self.head = 0
+        self.size = 0
+
+        # Open minute: metric -> [count, total, minimum, maximum]
+        self.minute_start = None
+        self.minute = {}
+        self.dropped_metrics = set()
+
+    def create(self, cursor: sqlite3.Cursor):
+        """Create the rollup table"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS metric_rollups (
+                resolution INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                minimum REAL NOT NULL,
+                maximum REAL NOT NULL,
+                PRIMARY KEY (resolution, metric, bucket)
+            ) WITHOUT ROWID
+        ''')
+
+    def write(self, connection: sqlite3.Connection, rows: List[tuple]):
+        """Upsert rollup rows returned by add() or close() (writer lock held)"""
+        connection.executemany(self.UPSERT, rows)
+
+    def add(self, ts: int, values: Dict[str, float]) -> List[tuple]:
+        """
+        Record one sample of flattened metrics
+
+        Returns:
+            Rollup rows of the minute this sample closed, for write()
+        """
+        with self.lock:
+            minute = ts - ts % MINUTE_MS
+            rows = self._close_minute() if self.minute_start is not None and minute != self.minute_start else []
+            self.minute_start = minute
+
+            slot = self.head
+            self.timestamps[slot] = ts
+            for column in self.columns.values():
+                column[slot] = math.nan
+
+            for name, value in values.items():
+                column = self.columns.get(name)
+                if column is None:
+                    if len(self.columns) >= self.max_metrics:
+                        self.dropped_metrics.add(name)
+                        continue
+                    column = self.columns[name] = array('d', [math.nan]) * self.raw_capacity
+                column[slot] = value
+
+                aggregate = self.minute.get(name)
+                if aggregate is None:
+                    self.minute[name] = [1, value, value, value]
+                else:
+                    aggregate[0] += 1
+                    aggregate[1] += value
+                    aggregate[2] = min(aggregate[2], value)
+                    aggregate[3] = max(aggregate[3], value)
+
+            self.head = (slot + 1) % self.raw_capacity
+            self.size = min(self.size + 1, self.raw_capacity)
+            return rows
+
+    def close(self) -> List[tuple]:
+        """Close the open minute early, e.g. on shutdown; returns its rollup rows"""
+        with self.lock:
+            return self._close_minute() if self.minute_start is not None else []
+
+    def _close_minute(self) -> List[tuple]:
+        """Rollup rows of the open minute at minute and hour resolution (lock held)"""
+        hour = self.minute_start - self.minute_start % HOUR_MS
+        rows = []
+        for name, (count, total, minimum, maximum) in self.minute.items():
+            rows.append((MINUTE_MS, name, self.minute_start, count, total, minimum, maximum))
+            rows.append((HOUR_MS, name, hour, count, total, minimum, maximum))
+        self.minute = {}
+        return rows
+
+    def _raw_slots(self) -> range:
+        """Ring slots from oldest to newest (lock held)"""
+        return range(self.head - self.size, self.head)
+
+    def choose_resolution(self, start_ms: int, end_ms: int, now_ms: int, max_points: Optional[int] = None) -> int:
+        """Finest resolution covering [start_ms, end_ms) in at most max_points points"""
+        max_points = max_points or self.max_points
+        with self.lock:
+            if self.size:
+                oldest = self.timestamps[(self.head - self.size) % self.raw_capacity]
+                in_window = sum(
+                    1 for slot in self._raw_slots()
+                    if start_ms <= self.timestamps[slot % self.raw_capacity] < end_ms
+                )
+                if oldest <= start_ms and in_window <= max_points:
+                    return RAW
+
+        for resolution in (MINUTE_MS, HOUR_MS):
+            days = self.retention_days[resolution]
+            retained = days <= 0 or start_ms >= now_ms - days * DAY_MS
+            if retained and (end_ms - start_ms) / resolution <= max_points:
+                return resolution
+        return HOUR_MS
+
+    def query(self, connection: sqlite3.Connection, start_ms: int, end_ms: int, now_ms: int,
+              names: Optional[List[str]] = None, max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Series of [start_ms, end_ms) at the best resolution for the window
+
+        Returns:
+            Resolution in ms (0 for raw samples) and, per metric, points with
+            timestamp, count, mean, min and max
+        """
+        resolution = self.choose_resolution(start_ms, end_ms, now_ms, max_points)
+        wanted = set(names) if names else None
+        series = {}
+
+        if resolution == RAW:
+            with self.lock:
+                for name, column in self.columns.items():
+                    if wanted is not None and name not in wanted:
+                        continue
+                    points = []
+                    for slot in self._raw_slots():
+                        slot %= self.raw_capacity
+                        ts, value = self.timestamps[slot], column[slot]
+                        if start_ms <= ts < end_ms and not math.isnan(value):
+                            points.append({'timestamp': ts, 'count': 1, 'mean': value, 'min': value, 'max': value})
+                    if points:
+                        series[name] = points
+            return {'resolution_ms': RAW, 'start': start_ms, 'end': end_ms, 'series': series}
+
+        # Bucket -> [count, total, minimum, maximum] per metric
+        buckets = {}
+        first_bucket = start_ms - start_ms % resolution
+        cursor = connection.execute('''
+            SELECT metric, bucket, count, total, minimum, maximum FROM metric_rollups
+            WHERE resolution = ? AND bucket >= ? AND bucket < ?
+        ''', (resolution, first_bucket, end_ms))
+        for name, bucket, count, total, minimum, maximum in cursor:
+            if wanted is None or name in wanted:
+                buckets.setdefault(name, {})[bucket] = [count, total, minimum, maximum]
+
+        with self.lock:
+            if self.minute_start is not None:
+                open_bucket = self.minute_start - self.minute_start % resolution
+                if first_bucket <= open_bucket < end_ms:
+                    for name, (count, total, minimum, maximum) in self.minute.items():
+                        if wanted is not None and name not in wanted:
+                            continue
+                        aggregate = buckets.setdefault(name, {}).setdefault(open_bucket, [0, 0.0, minimum, maximum])
+                        aggregate[0] += count
+                        aggregate[1] += total
+                        aggregate[2] = min(aggregate[2], minimum)
+                        aggregate[3] = max(aggregate[3], maximum)
+
+        for name, by_bucket in buckets.items():
+            series[name] = [
+                {'timestamp': bucket, 'count': count, 'mean': total / count, 'min': minimum, 'max': maximum}
+                for bucket, (count, total, minimum, maximum) in sorted(by_bucket.items())
+            ]
+        return {'resolution_ms': resolution, 'start': start_ms, 'end': end_ms, 'series': series}
+
+    def cleanup(self, connection: sqlite3.Connection, now_ms: int) -> int:
+        """
+        Drop rollup rows past the retention of their resolution
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        for resolution, days in self.retention_days.items():
+            if days > 0:
+                cursor = connection.execute(
+                    'DELETE FROM metric_rollups WHERE resolution = ? AND bucket < ?',
+                    (resolution, now_ms - days * DAY_MS)
+                )
+                deleted += cursor.rowcount
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get series counts and raw buffer usage"""
+        with self.lock:
+            return {
+                'metrics': len(self.columns),
+                'max_metrics': self.max_metrics,
+                'dropped_metrics': len(self.dropped_metrics),
+                'raw_samples': self.size,
+                'raw_capacity': self.raw_capacity,
+                'raw_buffer_bytes': (len(self.columns) + 1) * self.raw_capacity * 8,
+                'oldest_raw': self.timestamps[(self.head - self.size) % self.raw_capacity] if self.size else None
+            }
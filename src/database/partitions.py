@@ -0,0 +1,288 @@
+"""
+Time Partitions for Iron Dome for Mosquitoes
+Per-period tables behind one view per time-series table
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Current time in epoch milliseconds, as an SQL expression
+NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+# Time-partitioned tables: time column, column definitions and indexes by name suffix
+PARTITIONED_TABLES = {
+    'detections': ('timestamp', f'''
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        classes TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        image_path TEXT,
+        processing_time REAL,
+        created_at INTEGER DEFAULT ({NOW_MS})
+    ''', {'timestamp': 'timestamp'}),
+    # One row per detected box; class_id references detection_classes
+    'detection_boxes': ('ts', '''
+        id INTEGER PRIMARY KEY,
+        detection_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        camera_id TEXT,
+        class_id INTEGER NOT NULL,
+        confidence REAL NOT NULL,
+        x1 REAL,
+        y1 REAL,
+        x2 REAL,
+        y2 REAL
+    ''', {
+        # Covering: per-class and per-camera counts over time never touch the table
+        'class_ts': 'class_id, ts, camera_id',
+        'camera_ts': 'camera_id, ts, class_id',
+        'detection': 'detection_id'
+    }),
+    'system_events': ('timestamp', f'''
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        message TEXT,
+        severity TEXT DEFAULT 'info',
+        created_at INTEGER DEFAULT ({NOW_MS})
+    ''', {'timestamp': 'timestamp'}),
+    'performance_metrics': ('timestamp', f'''
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        cpu_usage REAL,
+        memory_usage REAL,
+        disk_usage REAL,
+        detection_count INTEGER,
+        error_count INTEGER,
+        created_at INTEGER DEFAULT ({NOW_MS})
+    ''', {'timestamp': 'timestamp'}),
+    'alerts': ('timestamp', f'''
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        alert_type TEXT NOT NULL,
+        message TEXT,
+        detection_count INTEGER,
+        severity TEXT DEFAULT 'warning',
+        created_at INTEGER DEFAULT ({NOW_MS})
+    ''', {'timestamp': 'timestamp'})
+}
+
+class TimePartitions:
+    """
+    Stores each time-series table as one table per period
+
+    detections_p20261015 holds the detections of the period starting on
+    that UTC date, and so on for every table in PARTITIONED_TABLES. A view
+    with the plain table name unions the partitions; SQLite pushes WHERE
+    terms into every arm and merges ORDER BY ... LIMIT from the partition
+    indexes, so queries keep using the plain names. Retention drops whole
+    partitions instead of deleting rows through the indexes.
+
+    IDs stay unique across partitions and across writers sharing the file
+    (a restarted service whose old instance is still flushing, a CLI
+    cleanup, nodes sharing one database): each ID is taken from the
+    partition_sequences table inside the inserting transaction, which holds
+    SQLite's write lock until it commits. Partitions created by another
+    writer are picked up from the catalog before a partition is created or
+    a view rebuilt. Every method apart from get_stats() needs the writer
+    lock.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.period_ms = max(1, config.get('partition_days', 7)) * DAY_MS
+
+        # Table -> {partition name: (start_ms, end_ms)}
+        self.partitions = {table: {} for table in PARTITIONED_TABLES}
+
+    def create_catalog(self, cursor: sqlite3.Cursor):
+        """Create the partition catalog and the ID sequences"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS partitions (
+                name TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS partition_sequences (
+                table_name TEXT PRIMARY KEY,
+                next_id INTEGER NOT NULL
+            )
+        ''')
+
+    def load(self, connection: sqlite3.Connection):
+        """Read the catalog, bring the ID sequences past every stored ID and create the views"""
+        self._read_catalog(connection)
+
+        for table, partitions in self.partitions.items():
+            last_ids = [connection.execute(f'SELECT MAX(id) FROM {name}').fetchone()[0] or 0 for name in partitions]
+            # Rows written before the sequences existed must never be reused
+            connection.execute('''
+                INSERT INTO partition_sequences (table_name, next_id) VALUES (?, ?)
+                ON CONFLICT (table_name) DO UPDATE SET next_id = MAX(next_id, excluded.next_id)
+            ''', (table, max(last_ids, default=0) + 1))
+
+        for table in PARTITIONED_TABLES:
+            self._refresh_view(connection, table)
+
+    def _read_catalog(self, connection: sqlite3.Connection, table: Optional[str] = None):
+        """Replace the known partitions of one table, or of all, with the catalog's"""
+        tables = [table] if table else list(PARTITIONED_TABLES)
+        for name in tables:
+            self.partitions[name] = {}
+        for row in connection.execute('SELECT name, table_name, start_ms, end_ms FROM partitions'):
+            if row[1] in tables:
+                self.partitions[row[1]][row[0]] = (row[2], row[3])
+
+    def _refresh_view(self, connection: sqlite3.Connection, table: str):
+        """Point the table's view at its current partitions, including those of other writers"""
+        self._read_catalog(connection, table)
+        partitions = sorted(self.partitions[table], key=lambda name: self.partitions[table][name][0])
+        if not partitions:
+            # Always keep one partition so the view can be defined
+            self._create(connection, table, self._start_of(int(datetime.now().timestamp() * 1000)))
+            partitions = list(self.partitions[table])
+
+        connection.execute(f'DROP VIEW IF EXISTS {table}')
+        connection.execute(
+            f'CREATE VIEW {table} AS ' + ' UNION ALL '.join(f'SELECT * FROM {name}' for name in partitions)
+        )
+
+    def _start_of(self, ts: int) -> int:
+        """Start of the period holding an epoch-ms timestamp"""
+        return ts - ts % self.period_ms
+
+    def _create(self, connection: sqlite3.Connection, table: str, start_ms: int) -> str:
+        """Create the partition of a table starting at start_ms"""
+        _, columns, indexes = PARTITIONED_TABLES[table]
+        name = f"{table}_p{datetime.fromtimestamp(start_ms / 1000, timezone.utc):%Y%m%d}"
+
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {name} ({columns})')
+        for suffix, index_columns in indexes.items():
+            connection.execute(f'CREATE INDEX IF NOT EXISTS {name}_{suffix} ON {name}({index_columns})')
+        connection.execute(
+            'INSERT OR REPLACE INTO partitions (name, table_name, start_ms, end_ms) VALUES (?, ?, ?, ?)',
+            (name, table, start_ms, start_ms + self.period_ms)
+        )
+
+        self.partitions[table][name] = (start_ms, start_ms + self.period_ms)
+        return name
+
+    def _find(self, table: str, ts: int) -> Optional[str]:
+        """Name of a known partition holding ts"""
+        for name, (start_ms, end_ms) in self.partitions[table].items():
+            if start_ms <= ts < end_ms:
+                return name
+        return None
+
+    def partition_for(self, connection: sqlite3.Connection, table: str, ts: int) -> str:
+        """Name of the partition holding ts, creating it and updating the view if needed"""
+        name = self._find(table, ts)
+        if name:
+            return name
+
+        # Another writer may have created it since the catalog was read
+        self._read_catalog(connection, table)
+        name = self._find(table, ts)
+        if name:
+            self._refresh_view(connection, table)
+            return name
+
+        name = self._create(connection, table, self._start_of(ts))
+        self._refresh_view(connection, table)
+        return name
+
+    def insert(self, connection: sqlite3.Connection, table: str, row: Dict[str, Any]) -> int:
+        """
+        Insert a row into the partition holding its time column
+
+        Returns:
+            The row's ID
+        """
+        name = self.partition_for(connection, table, row[PARTITIONED_TABLES[table][0]])
+        row_id = self.allocate_id(connection, table)
+
+        columns = ['id', *row]
+        connection.execute(
+            f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            (row_id, *row.values())
+        )
+        return row_id
+
+    def allocate_id(self, connection: sqlite3.Connection, table: str) -> int:
+        """
+        Take the next ID of a table in the caller's write transaction
+
+        The UPDATE takes SQLite's write lock, so no other connection can take
+        the same ID before this transaction commits; a rollback returns it.
+
+        Raises:
+            RuntimeError: If the table has no sequence (load() was not called)
+        """
+        connection.execute('UPDATE partition_sequences SET next_id = next_id + 1 WHERE table_name = ?', (table,))
+        row = connection.execute('SELECT next_id - 1 FROM partition_sequences WHERE table_name = ?', (table,)).fetchone()
+        if row is None:
+            raise RuntimeError(f"No ID sequence for {table} - partitions not loaded")
+        return row[0]
+
+    def adopt(self, connection: sqlite3.Connection, table: str) -> int:
+        """
+        Move the rows of an unpartitioned table into partitions and drop it
+
+        Returns:
+            Number of rows moved
+        """
+        time_column = PARTITIONED_TABLES[table][0]
+        legacy_columns = {row[1] for row in connection.execute(f'PRAGMA table_info({table})')}
+        if not legacy_columns:
+            return 0
+        starts = [row[0] for row in connection.execute(
+            f'SELECT DISTINCT {time_column} - {time_column} % ? FROM {table}', (self.period_ms,)
+        )]
+
+        moved = 0
+        for start_ms in starts:
+            name = self._create(connection, table, start_ms)
+            names = [row[1] for row in connection.execute(f'PRAGMA table_info({name})') if row[1] in legacy_columns]
+            cursor = connection.execute(f'''
+                INSERT INTO {name} ({', '.join(names)})
+                SELECT {', '.join(names)} FROM {table} WHERE {time_column} >= ? AND {time_column} < ?
+            ''', (start_ms, start_ms + self.period_ms))
+            moved += cursor.rowcount
+
+        connection.execute(f'DROP TABLE {table}')
+        return moved
+
+    def expired(self, cutoff_ms: int) -> List[Tuple[str, str]]:
+        """(table, partition) pairs holding only rows older than cutoff_ms"""
+        return [
+            (table, name)
+            for table, partitions in self.partitions.items()
+            for name, (_, end_ms) in partitions.items()
+            if end_ms <= cutoff_ms
+        ]
+
+    def drop(self, connection: sqlite3.Connection, partitions: List[Tuple[str, str]]):
+        """Drop whole partitions and update the views"""
+        for table, name in partitions:
+            connection.execute(f'DROP TABLE IF EXISTS {name}')
+            connection.execute('DELETE FROM partitions WHERE name = ?', (name,))
+            self.partitions[table].pop(name, None)
+
+        for table in {table for table, _ in partitions}:
+            self._refresh_view(connection, table)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get partition counts and the time span they cover"""
+        starts = [start for partitions in self.partitions.values() for start, _ in partitions.values()]
+        ends = [end for partitions in self.partitions.values() for _, end in partitions.values()]
+        return {
+            'partition_days': self.period_ms // DAY_MS,
+            'partitions': {table: len(partitions) for table, partitions in self.partitions.items()},
+            'oldest_start': min(starts, default=None),
+            'newest_end': max(ends, default=None)
+        }
@@ -0,0 +1,201 @@
+"""
+Detection Rollups for Iron Dome for Mosquitoes
+Per-minute, per-hour and per-day detection counts maintained on insert
+"""
+
+import time
+import sqlite3
+from typing import Dict, Any, List, Optional, Tuple
+
+# Bucket widths in milliseconds, finest first
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+RESOLUTIONS = (MINUTE_MS, HOUR_MS, DAY_MS)
+
+# class_id of the rows counting whole detections rather than boxes; class IDs
+# from detection_classes start at 1
+ALL_CLASSES = 0
+
+def split_range(start_ms: int, end_ms: int, finest: int = MINUTE_MS) -> List[Tuple[int, int, int]]:
+    """
+    Cover [start_ms, end_ms) with as few rollup buckets as possible
+
+    Whole days are read from day buckets and the ragged ends from hour and
+    then minute buckets, so a 30-day window touches fewer than 200 buckets
+    per camera and class. The bucket holding start_ms at the finest
+    resolution is included whole, so the start is accurate to that
+    resolution; the end is exact.
+
+    Returns:
+        (resolution, first_bucket, end_bucket) ranges
+    """
+    ranges = []
+
+    def cover(start: int, end: int, level: int):
+        if start >= end:
+            return
+        resolution = RESOLUTIONS[level]
+        if level == lowest:
+            ranges.append((resolution, start - start % resolution, end))
+            return
+        first = -(-start // resolution) * resolution
+        last = end - end % resolution
+        if first >= last:
+            cover(start, end, level - 1)
+            return
+        ranges.append((resolution, first, last))
+        cover(start, first, level - 1)
+        cover(last, end, level - 1)
+
+    lowest = RESOLUTIONS.index(finest)
+    cover(start_ms, end_ms, len(RESOLUTIONS) - 1)
+    return ranges
+
+class DetectionRollups:
+    """
+    Detection counts and confidence sums by resolution, bucket, camera and class
+
+    Rows are upserted in the transaction that inserts the detection, so the
+    rollups never disagree with the raw tables. Per class the rows count
+    boxes; the ALL_CLASSES rows count detections and sum their max
+    confidence. Rollups outlive the raw rows: cleanup_old_data() removes
+    detections, while minute and hour rows have their own retention.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.retention_days = {
+            MINUTE_MS: config.get('minute_retention_days', 7),
+            HOUR_MS: config.get('hour_retention_days', 365),
+            DAY_MS: config.get('day_retention_days', 0)
+        }
+
+    def create(self, cursor: sqlite3.Cursor):
+        """Create the rollup table"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS detection_rollups (
+                resolution INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                camera_id TEXT NOT NULL DEFAULT '',
+                class_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                confidence_sum REAL NOT NULL,
+                PRIMARY KEY (resolution, class_id, bucket, camera_id)
+            ) WITHOUT ROWID
+        ''')
+
+    def add(self, connection: sqlite3.Connection, ts: int, camera_id: Optional[str], confidence: float,
+            boxes: List[Tuple[int, float]]):
+        """
+        Count one detection and its (class_id, confidence) boxes
+
+        Call with the writer lock held, before the insert is committed.
+        """
+        rows = [(ALL_CLASSES, 1, confidence)]
+        per_class = {}
+        for class_id, box_confidence in boxes:
+            count, total = per_class.get(class_id, (0, 0.0))
+            per_class[class_id] = (count + 1, total + box_confidence)
+        rows.extend((class_id, count, total) for class_id, (count, total) in per_class.items())
+
+        connection.executemany('''
+            INSERT INTO detection_rollups (resolution, bucket, camera_id, class_id, count, confidence_sum)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (resolution, class_id, bucket, camera_id) DO UPDATE SET
+                count = count + excluded.count,
+                confidence_sum = confidence_sum + excluded.confidence_sum
+        ''', [
+            (resolution, ts - ts % resolution, camera_id or '', class_id, count, total)
+            for resolution in RESOLUTIONS
+            for class_id, count, total in rows
+        ])
+
+    def rebuild(self, connection: sqlite3.Connection) -> int:
+        """
+        Recompute every rollup from detections and detection_boxes
+
+        Detections deleted by retention are gone from the raw tables, so their
+        counts are lost from the rebuilt rollups.
+
+        Returns:
+            Number of rollup rows written
+        """
+        connection.execute('DELETE FROM detection_rollups')
+        written = 0
+        for resolution in RESOLUTIONS:
+            # Detections carry no camera_id; take it from their boxes
+            cursor = connection.execute('''
+                INSERT INTO detection_rollups (resolution, bucket, camera_id, class_id, count, confidence_sum)
+                SELECT ?, d.timestamp - d.timestamp % ?,
+                       COALESCE((SELECT b.camera_id FROM detection_boxes b WHERE b.detection_id = d.id LIMIT 1), ''),
+                       ?, COUNT(*), SUM(d.confidence)
+                FROM detections d
+                GROUP BY 2, 3
+            ''', (resolution, resolution, ALL_CLASSES))
+            written += cursor.rowcount
+
+            cursor = connection.execute('''
+                INSERT INTO detection_rollups (resolution, bucket, camera_id, class_id, count, confidence_sum)
+                SELECT ?, ts - ts % ?, COALESCE(camera_id, ''), class_id, COUNT(*), SUM(confidence)
+                FROM detection_boxes
+                GROUP BY 2, 3, 4
+            ''', (resolution, resolution))
+            written += cursor.rowcount
+        return written
+
+    def _range_filter(self, start_ms: int, end_ms: int) -> Tuple[str, list]:
+        """WHERE clause selecting the buckets that cover a time range"""
+        # The finest resolution whose retention still reaches back to start_ms
+        now_ms = int(time.time() * 1000)
+        finest = next(
+            (resolution for resolution in RESOLUTIONS
+             if self.retention_days[resolution] <= 0 or start_ms >= now_ms - self.retention_days[resolution] * DAY_MS),
+            DAY_MS
+        )
+        ranges = split_range(start_ms, end_ms, finest)
+        if not ranges:
+            return '0', []
+        clause = ' OR '.join('(resolution = ? AND bucket >= ? AND bucket < ?)' for _ in ranges)
+        return f'({clause})', [value for bucket_range in ranges for value in bucket_range]
+
+    def totals(self, connection: sqlite3.Connection, start_ms: int, end_ms: int,
+               class_id: int = ALL_CLASSES) -> Tuple[int, float]:
+        """
+        Count and confidence sum for one class over a time range
+
+        Returns:
+            (count, confidence_sum)
+        """
+        clause, params = self._range_filter(start_ms, end_ms)
+        row = connection.execute(f'''
+            SELECT COALESCE(SUM(count), 0), COALESCE(SUM(confidence_sum), 0.0)
+            FROM detection_rollups
+            WHERE class_id = ? AND {clause}
+        ''', (class_id, *params)).fetchone()
+        return row[0], row[1]
+
+    def class_ids(self, connection: sqlite3.Connection, start_ms: int, end_ms: int) -> List[int]:
+        """IDs of the classes detected over a time range"""
+        clause, params = self._range_filter(start_ms, end_ms)
+        cursor = connection.execute(f'''
+            SELECT DISTINCT class_id FROM detection_rollups
+            WHERE class_id != ? AND {clause}
+        ''', (ALL_CLASSES, *params))
+        return [row[0] for row in cursor.fetchall()]
+
+    def cleanup(self, connection: sqlite3.Connection, now_ms: int) -> int:
+        """
+        Drop rollup rows past the retention of their resolution
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        for resolution, days in self.retention_days.items():
+            if days > 0:
+                cursor = connection.execute(
+                    'DELETE FROM detection_rollups WHERE resolution = ? AND bucket < ?',
+                    (resolution, now_ms - days * DAY_MS)
+                )
+                deleted += cursor.rowcount
+        return deleted
@@ -3,12 +3,47 @@ Mosquito Detector for Iron Dome for Mosquitoes
 Handles object detection including cats, mosquitoes, and other insects
 """
 
+import os
 import cv2
+import time
 import numpy as np
 from typing import List, Dict, Any, Optional
-from ultralytics import YOLO
 from loguru import logger
 from utils.logger import LoggerMixin
+from utils.startup_profiler import startup_profiler
+
+def build_detection_record(frame: Dict[str, Any], detections: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Build the detection record stored and broadcast for a frame
+    
+    Args:
+        frame: Frame the detections came from
+        detections: Result of MosquitoDetector.detect
+        
+    Returns:
+        Detection record, or None if nothing was detected
+    """
+    if not detections:
+        return None
+    
+    # Replays carry their own timeline, so two runs store identical records
+    replay = frame.get('source') == 'replay'
+    timestamp = frame['timestamp'] if replay else time.time()
+    source = frame.get('camera_id') or frame.get('source', 'unknown')
+    return {
+        'timestamp': timestamp,
+        'camera_id': source,
+        'classes': [d['class_name'] for d in detections],
+        'confidence': max([d['confidence'] for d in detections]),
+        'detections': detections,
+        'image_path': f"data/detections/detection_{int(timestamp * 1000)}_{source}.jpg",
+        # Seconds from capture (monotonic, system-wide) until the detections were available;
+        # replay latency is reported as lag by the replay source instead
+        'processing_time': time.monotonic() - frame['captured_at'] if 'captured_at' in frame and not replay else 0.0,
+        # Name of the Phone Link capture, served from the archive by /api/captures/<name>
+        'capture_name': os.path.basename(frame.get('original_path') or frame['file_path'])
+        if frame.get('source') == 'phone_link' and frame.get('file_path') else None
+    }
 
 class MosquitoDetector(LoggerMixin):
     """Advanced object detector for mosquitoes, cats, and other objects"""
@@ -22,6 +57,12 @@ class MosquitoDetector(LoggerMixin):
         self.iou_threshold = config.get('iou_threshold', 0.5)
         self.max_detections = config.get('max_detections_per_frame', 10)
         
+        # Cheaper inference used while the pipeline sheds load
+        degraded_config = config.get('degraded', {})
+        self.degraded_imgsz = degraded_config.get('imgsz', 320)
+        self.degraded_model_path = degraded_config.get('model_path')
+        self.degraded_model = None
+        
         self.logger.info(f"Initializing detector with classes: {self.classes_to_detect}")
         self.logger.info(f"Confidence threshold: {self.confidence_threshold}")
     
@@ -31,9 +72,16 @@ class MosquitoDetector(LoggerMixin):
             model_path = self.config.get('model_path', 'models/yolov8n.pt')
             self.logger.info(f"Loading YOLO model from: {model_path}")
             
+            # Imported here so nodes that never detect do not load ultralytics and torch
+            YOLO = startup_profiler.import_attr('ultralytics', 'YOLO')
+            
             self.model = YOLO(model_path)
             self.logger.info("YOLO model loaded successfully")
             
+            if self.degraded_model_path:
+                self.logger.info(f"Loading degraded YOLO model from: {self.degraded_model_path}")
+                self.degraded_model = YOLO(self.degraded_model_path)
+            
             # Test model
             self._test_model()
             
@@ -57,12 +105,13 @@ class MosquitoDetector(LoggerMixin):
             self.logger.error(f"Model test failed: {e}")
             raise
     
-    def detect(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def detect(self, image: np.ndarray, degraded: bool = False) -> List[Dict[str, Any]]:
         """
         Detect objects in the given image
         
         Args:
             image: Input image as numpy array
+            degraded: Use the degraded model and inference size (under overload)
             
         Returns:
             List of detection results
@@ -72,12 +121,19 @@ class MosquitoDetector(LoggerMixin):
                 self.logger.error("Model not initialized")
                 return []
             
+            model = self.model
+            options = {}
+            if degraded:
+                model = self.degraded_model or self.model
+                options['imgsz'] = self.degraded_imgsz
+            
             # Run detection
-            results = self.model(
+            results = model(
                 image, 
                 conf=self.confidence_threshold, 
                 iou=self.iou_threshold,
-                max_det=self.max_detections
+                max_det=self.max_detections,
+                **options
             )
             
             detections = []
@@ -89,7 +145,7 @@ class MosquitoDetector(LoggerMixin):
                         # Get detection info
                         confidence = float(box.conf[0].item())
                         class_id = int(box.cls[0].item())
-                        class_name = self.model.names[class_id]
+                        class_name = model.names[class_id]
                         
                         # Get bounding box coordinates
                         bbox = box.xyxy[0].cpu().numpy().tolist()
@@ -229,10 +285,13 @@ class MosquitoDetector(LoggerMixin):
             'classes_to_detect': self.classes_to_detect,
             'confidence_threshold': self.confidence_threshold,
             'iou_threshold': self.iou_threshold,
-            'max_detections': self.max_detections
+            'max_detections': self.max_detections,
+            'degraded_model_loaded': self.degraded_model is not None,
+            'degraded_imgsz': self.degraded_imgsz
         }
     
     def shutdown(self):
         """Shutdown the detector"""
         self.logger.info("Shutting down detector")
-        self.model = None 
\ No newline at end of file
+        self.model = None
+        self.degraded_model = None 
\ No newline at end of file
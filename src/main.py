@@ -14,7 +14,7 @@ sys.path.append(str(Path(__file__).parent))
 
 from utils.config_loader import ConfigLoader
 from utils.logger import setup_logger
-from core.system_manager import SystemManager
+from utils.startup_profiler import startup_profiler
 
 
 def parse_arguments():
@@ -27,6 +27,51 @@ def parse_arguments():
         action="store_true", 
         help="Run in development mode"
     )
+    parser.add_argument(
+        "--multiprocess", 
+        action="store_true", 
+        help="Run capture, detection and services as separate processes"
+    )
+    parser.add_argument(
+        "--distributed", 
+        type=str, 
+        choices=["producer", "worker", "both"],
+        help="Share capture processing with other nodes through the distributed work queue"
+    )
+    parser.add_argument(
+        "--headless", 
+        action="store_true", 
+        help="Run without the web interface and Google Drive, importing only the detection core"
+    )
+    parser.add_argument(
+        "--startup-report", 
+        action="store_true", 
+        help="Log the import cost of every module loaded during startup"
+    )
+    parser.add_argument(
+        "--export", 
+        type=str, 
+        choices=["ndjson", "csv", "parquet"],
+        help="Export a table from the database and exit instead of starting the system"
+    )
+    parser.add_argument(
+        "--export-table", 
+        type=str, 
+        default="detections",
+        choices=["detections", "detection_boxes", "system_events", "performance_metrics", "alerts"],
+        help="Table to export"
+    )
+    parser.add_argument(
+        "--export-days", 
+        type=int, 
+        default=0,
+        help="Export only the last N days (0 = everything)"
+    )
+    parser.add_argument(
+        "--output", 
+        type=str, 
+        help="Export file (default: data/exports/<table>_<time>.<format>)"
+    )
     parser.add_argument(
         "--config", 
         type=str, 
@@ -43,6 +88,35 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def apply_headless_profile(config):
+    """Disable the components a headless node does not need"""
+    config.setdefault('web_interface', {})['enabled'] = False
+    config.setdefault('google_drive', {})['enabled'] = False
+    config.setdefault('system', {})['headless'] = True
+
+
+def run_export(args, config, logger):
+    """Stream one table from the database to a file"""
+    import time
+    from datetime import datetime
+    from database.database_manager import DatabaseManager
+    
+    output = args.output or f"data/exports/{args.export_table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{args.export}"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    start_ms = int((time.time() - args.export_days * 86400) * 1000) if args.export_days > 0 else None
+    
+    database = DatabaseManager(config.get('database', {}))
+    database.initialize()
+    try:
+        result = database.export(args.export, output, args.export_table, start_ms)
+    finally:
+        database.shutdown()
+    
+    if result is None:
+        sys.exit(1)
+    logger.info(f"✅ Exported {result['rows']} row(s) to {output} in {result['seconds']}s")
+
+
 def main():
     """Main application entry point."""
     try:
@@ -54,20 +128,46 @@ def main():
         logger.info("🚀 Starting Iron Dome for Mosquitoes")
         
         # Load configuration
-        config = ConfigLoader(args.config).load()
+        with startup_profiler.phase('load config'):
+            config = ConfigLoader(args.config).load()
         logger.info("✅ Configuration loaded successfully")
         
+        if args.export:
+            run_export(args, config, logger)
+            return
+        
+        if args.headless or config.get('system', {}).get('headless', False):
+            apply_headless_profile(config)
+            logger.info("Headless profile - web interface and Google Drive disabled")
+        
+        # Command line role overrides the configured one
+        if args.distributed:
+            config.setdefault('distributed', {})['role'] = args.distributed
+        
         # Initialize system manager
-        system_manager = SystemManager(config, dev_mode=args.dev)
+        if args.multiprocess:
+            mode = "multiprocess"
+        elif args.distributed:
+            mode = "distributed"
+        else:
+            mode = "dev" if args.dev else "default"
+        SystemManager = startup_profiler.import_attr('core.system_manager', 'SystemManager')
+        with startup_profiler.phase('create system manager'):
+            system_manager = SystemManager(config, mode=mode)
+        with startup_profiler.phase('initialize components'):
+            system_manager.initialize()
         logger.info("✅ System manager initialized")
         
+        if args.startup_report or config.get('system', {}).get('startup_report', False):
+            startup_profiler.log_report()
+        
         # Start the system
-        system_manager.start()
+        system_manager.run()
         
     except KeyboardInterrupt:
         logger.info("🛑 System shutdown requested by user")
         if 'system_manager' in locals():
-            system_manager.stop()
+            system_manager.shutdown()
     except Exception as e:
         logger.error(f"❌ System error: {e}")
         sys.exit(1)
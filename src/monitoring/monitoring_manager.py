@@ -30,10 +30,18 @@ class MonitoringManager(LoggerMixin):
         self.detection_history = []
         self.performance_metrics = {}
         self.health_status = 'unknown'
+        self.frame_stats = {
+            'frames_seen': 0,
+            'frames_by_source': {},
+            'last_frame_time': None
+        }
+        self.component_stats = {}
         
         # Threading
         self.monitoring_thread = None
         self.running = False
+        self.stop_event = threading.Event()
+        self.metrics_interval = config.get('metrics_interval', 30)
         
         self.logger.info("Monitoring manager initialized")
     
@@ -99,12 +107,12 @@ class MonitoringManager(LoggerMixin):
                 # Clean old data
                 self._cleanup_old_data()
                 
-                # Sleep for monitoring interval
-                time.sleep(30)  # Check every 30 seconds
+                # Wait for the monitoring interval (returns early on shutdown)
+                self.stop_event.wait(self.metrics_interval)
                 
             except Exception as e:
                 self.logger.error(f"Error in monitoring worker: {e}")
-                time.sleep(60)  # Wait longer on error
+                self.stop_event.wait(self.metrics_interval * 2)  # Wait longer on error
     
     def _update_system_stats(self):
         """Update system statistics"""
@@ -187,6 +195,26 @@ class MonitoringManager(LoggerMixin):
         except Exception as e:
             self.logger.error(f"Error cleaning up old data: {e}")
     
+    def process_frames(self, frames: List[Dict[str, Any]]):
+        """Track incoming frames per source"""
+        try:
+            for frame in frames:
+                source = frame.get('camera_id') or frame.get('source', 'unknown')
+                self.frame_stats['frames_seen'] += 1
+                self.frame_stats['frames_by_source'][source] = self.frame_stats['frames_by_source'].get(source, 0) + 1
+                self.frame_stats['last_frame_time'] = frame.get('timestamp', time.time())
+                
+        except Exception as e:
+            self.logger.error(f"Error processing frames: {e}")
+    
+    def update_component_stats(self, name: str, stats: Dict[str, Any]):
+        """Record the latest metrics reported by a background component"""
+        self.component_stats[name] = {**stats, 'updated_at': datetime.now().isoformat()}
+        
+        # Surface a growing upload backlog as a health issue
+        if name == 'uploads' and stats.get('queue_depth', 0) > self.config.get('upload_backlog_warning', 100):
+            self.logger.warning(f"Upload backlog: {stats['queue_depth']} pending (lag {stats.get('last_lag_seconds', 0)}s)")
+    
     def log_detection(self, detection_data: Dict[str, Any]):
         """Log a new detection"""
         try:
@@ -248,7 +276,9 @@ class MonitoringManager(LoggerMixin):
             'health_status': self.health_status,
             'detection_count': len(self.detection_history),
             'error_count': self.system_stats['error_count'],
-            'uptime_hours': self.system_stats['uptime'] / 3600
+            'uptime_hours': self.system_stats['uptime'] / 3600,
+            'frame_stats': self.frame_stats,
+            'components': self.component_stats
         }
     
     def get_analytics_summary(self) -> Dict[str, Any]:
@@ -315,6 +345,7 @@ class MonitoringManager(LoggerMixin):
         """Shutdown monitoring system"""
         self.logger.info("Shutting down monitoring system...")
         self.running = False
+        self.stop_event.set()
         
         if self.monitoring_thread and self.monitoring_thread.is_alive():
             self.monitoring_thread.join(timeout=5)
@@ -24,7 +24,10 @@ class ConfigLoader:
                 'name': 'Iron Dome for Mosquitoes',
                 'version': '1.0.0',
                 'debug': True,
-                'log_level': 'INFO'
+                'log_level': 'INFO',
+                'status_interval': 5.0,
+                'headless': False,
+                'startup_report': False
             },
             'detection': {
                 'model_path': 'models/yolov8n.pt',
@@ -32,13 +35,19 @@ class ConfigLoader:
                 'iou_threshold': 0.5,
                 'classes_to_detect': ['mosquito', 'insect', 'fly'],
                 'detection_interval': 1.0,
-                'max_detections_per_frame': 10
+                'max_detections_per_frame': 10,
+                'degraded': {
+                    'imgsz': 320,
+                    'model_path': None
+                }
             },
             'camera': {
                 'phone_link': {
                     'enabled': True,
                     'capture_folder': 'data/captures',
-                    'auto_save': True
+                    'auto_save': True,
+                    'poll_interval': 0.25,
+                    'full_scan_interval': 5.0
                 },
                 'usb_camera': {
                     'enabled': False,
@@ -51,13 +60,112 @@ class ConfigLoader:
                     'url': '',
                     'username': '',
                     'password': ''
+                },
+                'dedup': {
+                    'enabled': True,
+                    'hash_size': 8,
+                    'max_distance': 4,
+                    'window_size': 32,
+                    'window_seconds': 30,
+                    'sources': ['phone_link']
+                },
+                'archive': {
+                    'enabled': True,
+                    'archive_folder': 'data/archive'
+                },
+                'sources': [],
+                'stream': {
+                    'buffer_size': 1,
+                    'max_frame_age': 2.0,
+                    'stall_timeout': 10.0,
+                    'open_timeout': 10.0,
+                    'max_read_failures': 20,
+                    'reconnect_initial_delay': 1.0,
+                    'reconnect_max_delay': 60.0
+                },
+                'scheduler': {
+                    'budget_fps': 0,
+                    'max_batch': 8
+                },
+                'max_wait': 1.0
+            },
+            'pipeline': {
+                'queue_size': 32,
+                'lossless_sources': ['phone_link', 'replay'],
+                'drop_log_interval': 5.0,
+                'stages': {
+                    'monitoring': {'maxsize': 64, 'block': False},
+                    'decode': {'workers': 2, 'maxsize': 16, 'block': True},
+                    'infer': {'workers': 1, 'maxsize': 8, 'block': True},
+                    'persist': {'workers': 1, 'maxsize': 64, 'block': True},
+                    'notify': {'workers': 1, 'maxsize': 64, 'block': True},
+                    'upload': {'workers': 1, 'maxsize': 256, 'block': False}
+                },
+                'load_shedding': {
+                    'policy': 'latest_per_source',
+                    'max_queue_depth': 12,
+                    'max_latency': 2.0,
+                    'resume_ratio': 0.5,
+                    'sample_every': 3,
+                    'exempt_priorities': ['interactive']
+                },
+                'priority': {
+                    'enabled': True,
+                    'classes': ['interactive', 'live'],
+                    'sources': {'phone_link': 'interactive'},
+                    'default_class': 'live',
+                    'starvation_timeout': 2.0,
+                    'reserved_slots': 8
+                },
+                'tracing': {
+                    'enabled': True,
+                    'sample_rate': 1.0,
+                    'max_traces': 1000,
+                    'export_path': None,
+                    'flush_every': 50
+                },
+                'watchdog': {
+                    'enabled': True,
+                    'check_interval': 1.0,
+                    'stall_timeout': 30.0,
+                    'producer_stall_timeout': 30.0,
+                    'max_snapshots': 20
                 }
             },
+            'distributed': {
+                'enabled': False,
+                'role': 'worker',
+                'node_id': None,
+                'queue_path': 'data/work_queue.db',
+                'spool_dir': 'data/spool',
+                'lease_seconds': 30.0,
+                'renew_interval': 10.0,
+                'max_processing_time': 120.0,
+                'max_attempts': 3,
+                'prefetch': 4,
+                'poll_interval': 0.5,
+                'retention': 86400
+            },
+            'processes': {
+                'enabled': False,
+                'start_method': 'spawn',
+                'detection_workers': 1,
+                'frame_queue_size': 16,
+                'result_queue_size': 64,
+                'put_timeout': 1.0,
+                'supervise_interval': 1.0,
+                'restart_initial_delay': 1.0,
+                'restart_max_delay': 30.0,
+                'max_restarts': 5,
+                'restart_window': 300.0,
+                'stop_timeout': 10.0
+            },
             'prevention': {
                 'enabled': True,
                 'methods': ['alert', 'log', 'notification'],
                 'alert_threshold': 3,
-                'cooldown_period': 300
+                'cooldown_period': 300,
+                'status_interval': 5.0
             },
             'monitoring': {
                 'enabled': True,
@@ -70,7 +178,42 @@ class ConfigLoader:
                 'type': 'sqlite',
                 'path': 'data/iron_dome.db',
                 'backup_enabled': True,
-                'backup_interval': 86400
+                'backup_interval': 86400,
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'read_pool_size': 4,
+                'write_behind': {
+                    'durability': 'batched',
+                    'batch_size': 50,
+                    'flush_interval': 0.25,
+                    'max_buffer': 5000
+                },
+                'rollups': {
+                    'minute_retention_days': 7,
+                    'hour_retention_days': 365,
+                    'day_retention_days': 0
+                },
+                'partitions': {
+                    'partition_days': 7,
+                    'vacuum_pages': 1024
+                },
+                'backup': {
+                    'dir': 'data/backups',
+                    'pages_per_step': 256,
+                    'step_pause': 0.001,
+                    'compress': False,
+                    'keep': 7
+                },
+                'export': {
+                    'chunk_size': 5000
+                },
+                'metrics': {
+                    'raw_samples': 720,
+                    'max_metrics': 256,
+                    'max_points': 500,
+                    'minute_retention_days': 7,
+                    'hour_retention_days': 365
+                }
             },
             'web_interface': {
                 'enabled': True,
@@ -79,6 +222,17 @@ class ConfigLoader:
                 'debug': True,
                 'auto_reload': True
             },
+            'google_drive': {
+                'enabled': False,
+                'upload': {
+                    'max_concurrency': 2,
+                    'max_queue': 1000,
+                    'max_retries': 3,
+                    'retry_delay': 5.0,
+                    'drain_timeout': 10.0,
+                    'stall_timeout': 120.0
+                }
+            },
             'notifications': {
                 'email': {
                     'enabled': False,
@@ -239,6 +393,20 @@ class ConfigLoader:
                 raise ValueError("USB camera resolution must be a list of 2 integers")
             if usb_config['fps'] <= 0:
                 raise ValueError("USB camera FPS must be positive")
+        
+        # Validate live camera sources
+        names = set()
+        for source in camera_config.get('sources', []) or []:
+            if source.get('type', 'ip') not in ('usb', 'ip', 'rtsp', 'replay'):
+                raise ValueError(f"Unsupported camera source type: {source.get('type')}")
+            if source.get('type') == 'replay' and source.get('speed', 1.0) < 0:
+                raise ValueError("Replay speed must be 0 (as fast as possible) or positive")
+            if source.get('weight', 1.0) <= 0:
+                raise ValueError("Camera source weight must be positive")
+            name = source.get('name')
+            if name and name in names:
+                raise ValueError(f"Duplicate camera source name: {name}")
+            names.add(name)
     
     def _validate_performance_settings(self):
         """Validate performance configuration settings"""
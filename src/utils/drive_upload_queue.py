@@ -0,0 +1,282 @@
+"""
+Drive Upload Queue for Iron Dome for Mosquitoes
+Uploads detection artifacts to Google Drive in the background with bounded concurrency
+"""
+
+import os
+import time
+import heapq
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+from utils.logger import LoggerMixin
+from utils.thread_watchdog import ThreadWatchdog, Heartbeat
+
+class DriveUploadQueue(LoggerMixin):
+    """
+    Background upload service for detection artifacts
+
+    enqueue() never blocks: artifacts go onto a bounded queue and a fixed
+    number of workers upload them, each with its own Drive client. Date
+    folder IDs are cached so a folder is looked up or created once per day
+    instead of once per upload. With a watchdog, a worker stuck in a Drive
+    call for longer than stall_timeout is replaced by a fresh worker.
+
+    A failed upload is not retried by sleeping in its worker: it is parked
+    with a not-before time of retry_delay * attempts and picked up by the
+    first idle worker once due, so backoff never holds an upload slot or
+    looks like a stall to the watchdog.
+    """
+
+    def __init__(self, drive_manager, config: Dict[str, Any], watchdog: Optional[ThreadWatchdog] = None):
+        super().__init__()
+        self.drive_manager = drive_manager
+        self.config = config
+        self.watchdog = watchdog
+        self.stall_timeout = config.get('stall_timeout', 120.0)
+        self.max_concurrency = config.get('max_concurrency', 2)
+        self.max_queue = config.get('max_queue', 1000)
+        self.max_retries = config.get('max_retries', 3)
+        self.retry_delay = config.get('retry_delay', 5.0)
+        self.drain_timeout = config.get('drain_timeout', 10.0)
+
+        self.queue = queue.Queue(maxsize=self.max_queue)
+        # Failed uploads waiting out their backoff: heap of (not_before, sequence, item)
+        self.delayed = []
+        self.delayed_sequence = 0
+        self.delayed_lock = threading.Lock()
+        self.date_folders = {}
+        self.folder_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.workers = []
+        self.worker_count = 0
+        self.running = False
+
+        self.stats = {
+            'enqueued': 0,
+            'uploaded': 0,
+            'failed': 0,
+            'retries': 0,
+            'dropped': 0,
+            'in_flight': 0,
+            'total_lag': 0.0,
+            'max_lag': 0.0,
+            'last_lag': 0.0,
+            'last_upload': None
+        }
+
+    def start(self):
+        """Start the upload workers"""
+        if self.running:
+            return
+
+        self.running = True
+        self.stop_event.clear()
+
+        for _ in range(self.max_concurrency):
+            self._start_worker()
+
+        self.logger.info(f"Drive upload queue started ({self.max_concurrency} worker(s))")
+
+    def _start_worker(self):
+        """Start one upload worker thread"""
+        worker = threading.Thread(target=self._upload_worker, name=f"drive-upload-{self.worker_count}", daemon=True)
+        self.worker_count += 1
+        worker.start()
+        self.workers.append(worker)
+
+    def _replace_worker(self, heartbeat: Heartbeat) -> bool:
+        """Retire a worker stuck in a Drive call and start a replacement"""
+        if not self.running:
+            return False
+
+        heartbeat.retired = True
+        self.workers = [worker for worker in self.workers if worker.ident != heartbeat.thread_ident]
+        self.logger.warning(f"Upload worker {heartbeat.name} replaced after stalling")
+        self._start_worker()
+        return True
+
+    def enqueue(self, file_path: str, created_at: Optional[float] = None, description: str = "") -> bool:
+        """
+        Queue an artifact for upload without waiting on the network
+
+        Args:
+            file_path: Local file to upload
+            created_at: Artifact creation time, used for the date folder (now if None)
+            description: Drive file description
+
+        Returns:
+            True if queued, False if the queue was full
+        """
+        item = {
+            'file_path': file_path,
+            'created_at': created_at or time.time(),
+            'description': description,
+            'enqueued_at': time.time(),
+            'attempts': 0
+        }
+
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            with self.stats_lock:
+                self.stats['dropped'] += 1
+            self.logger.warning(f"Upload queue full - dropped {os.path.basename(file_path)}")
+            return False
+
+        with self.stats_lock:
+            self.stats['enqueued'] += 1
+        return True
+
+    def _get_date_folder(self, drive, created_at: float) -> Optional[str]:
+        """Get the Drive folder for a day, creating it once"""
+        date = datetime.fromtimestamp(created_at)
+        key = date.strftime('%Y-%m-%d')
+
+        with self.folder_lock:
+            if key not in self.date_folders:
+                folder_id = drive.create_date_folder(date)
+                if not folder_id:
+                    return None
+                self.date_folders[key] = folder_id
+            return self.date_folders[key]
+
+    def _schedule_retry(self, item: Dict[str, Any]) -> bool:
+        """Park a failed upload until its backoff has passed"""
+        with self.delayed_lock:
+            if len(self.delayed) + self.queue.qsize() >= self.max_queue:
+                return False
+            not_before = time.monotonic() + self.retry_delay * item['attempts']
+            heapq.heappush(self.delayed, (not_before, self.delayed_sequence, item))
+            self.delayed_sequence += 1
+        return True
+
+    def _next_item(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Get the next upload: a due retry first, then the queue
+
+        Once stopping, parked retries are due at once so they get a last
+        attempt within the drain timeout.
+        """
+        with self.delayed_lock:
+            if self.delayed:
+                wait = self.delayed[0][0] - time.monotonic()
+                if wait <= 0 or not self.running:
+                    return heapq.heappop(self.delayed)[2]
+                timeout = min(timeout, wait)
+
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _has_pending(self) -> bool:
+        """Check if any upload is queued or parked"""
+        with self.delayed_lock:
+            return bool(self.delayed) or not self.queue.empty()
+
+    def _upload_worker(self):
+        """Upload queued artifacts one at a time"""
+        drive = self.drive_manager.clone()
+        if drive is None:
+            self.logger.error("Upload worker could not create a Drive client - exiting")
+            return
+
+        name = threading.current_thread().name
+        if self.watchdog:
+            heartbeat = self.watchdog.register(name, self.stall_timeout, on_stall=self._replace_worker)
+        else:
+            heartbeat = Heartbeat(name)
+
+        while (self.running or self._has_pending()) and not heartbeat.retired:
+            item = self._next_item(0.5)
+            if item is None:
+                if not self.running:
+                    break
+                continue
+
+            with self.stats_lock:
+                self.stats['in_flight'] += 1
+            heartbeat.busy()
+
+            try:
+                item['attempts'] += 1
+                file_id = None
+
+                if os.path.exists(item['file_path']):
+                    folder_id = self._get_date_folder(drive, item['created_at'])
+                    if folder_id:
+                        file_id = drive.upload_file(item['file_path'], folder_id, item['description'])
+                else:
+                    self.logger.error(f"Upload artifact missing: {item['file_path']}")
+                    item['attempts'] = self.max_retries + 1
+
+                if file_id:
+                    self._record_upload(item)
+                elif item['attempts'] <= self.max_retries and self.running:
+                    scheduled = self._schedule_retry(item)
+                    with self.stats_lock:
+                        self.stats['retries' if scheduled else 'dropped'] += 1
+                else:
+                    with self.stats_lock:
+                        self.stats['failed'] += 1
+
+            except Exception as e:
+                with self.stats_lock:
+                    self.stats['failed'] += 1
+                self.logger.error(f"Upload worker error: {e}")
+
+            finally:
+                heartbeat.idle()
+                with self.stats_lock:
+                    self.stats['in_flight'] -= 1
+
+        if self.watchdog:
+            self.watchdog.unregister(heartbeat)
+
+    def _record_upload(self, item: Dict[str, Any]):
+        """Update upload counters and lag"""
+        lag = time.time() - item['enqueued_at']
+        with self.stats_lock:
+            self.stats['uploaded'] += 1
+            self.stats['total_lag'] += lag
+            self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+            self.stats['last_lag'] = lag
+            self.stats['last_upload'] = datetime.now().isoformat()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and upload lag"""
+        with self.stats_lock:
+            uploaded = self.stats['uploaded']
+            return {
+                'running': self.running,
+                'workers': len([w for w in self.workers if w.is_alive()]),
+                'queue_depth': self.queue.qsize(),
+                'retry_waiting': len(self.delayed),
+                'in_flight': self.stats['in_flight'],
+                'enqueued': self.stats['enqueued'],
+                'uploaded': uploaded,
+                'failed': self.stats['failed'],
+                'retries': self.stats['retries'],
+                'dropped': self.stats['dropped'],
+                'avg_lag_seconds': round(self.stats['total_lag'] / uploaded, 2) if uploaded else 0.0,
+                'max_lag_seconds': round(self.stats['max_lag'], 2),
+                'last_lag_seconds': round(self.stats['last_lag'], 2),
+                'last_upload': self.stats['last_upload']
+            }
+
+    def shutdown(self):
+        """Stop accepting retries and give pending uploads a bounded time to drain"""
+        self.running = False
+        self.stop_event.set()
+
+        deadline = time.time() + self.drain_timeout
+        for worker in self.workers:
+            worker.join(timeout=max(0.0, deadline - time.time()))
+
+        pending = self.queue.qsize() + len(self.delayed)
+        if pending:
+            self.logger.warning(f"Drive upload queue stopped with {pending} pending upload(s)")
+        self.workers = []
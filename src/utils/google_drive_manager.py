@@ -41,6 +41,7 @@ class GoogleDriveManager:
         self.token_path = token_path
         self.service = None
         self.folder_id = None
+        self.credentials = None
         
     def authenticate(self) -> bool:
         """
@@ -80,6 +81,7 @@ class GoogleDriveManager:
                 token.write(creds.to_json())
                 
         try:
+            self.credentials = creds
             self.service = build('drive', 'v3', credentials=creds)
             logger.info("Successfully authenticated with Google Drive")
             return True
@@ -87,6 +89,29 @@ class GoogleDriveManager:
             logger.error(f"Failed to build Drive service: {e}")
             return False
             
+    def clone(self) -> Optional['GoogleDriveManager']:
+        """
+        Create a manager sharing this one's credentials and project folder.
+        
+        The Drive client is not thread-safe, so every upload worker needs its own.
+        
+        Returns:
+            GoogleDriveManager: New authenticated manager, or None if not authenticated
+        """
+        if not self.credentials:
+            logger.error("Not authenticated with Google Drive")
+            return None
+            
+        try:
+            manager = GoogleDriveManager(self.credentials_path, self.token_path)
+            manager.credentials = self.credentials
+            manager.service = build('drive', 'v3', credentials=self.credentials)
+            manager.folder_id = self.folder_id
+            return manager
+        except Exception as e:
+            logger.error(f"Failed to build Drive service: {e}")
+            return None
+            
     def create_project_folder(self, folder_name: str = "IronDome Mosquitoes") -> Optional[str]:
         """
         Create a folder in Google Drive for the project.
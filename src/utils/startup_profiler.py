@@ -0,0 +1,105 @@
+"""
+Startup Profiler for Iron Dome for Mosquitoes
+Imports optional components on demand and reports what startup spent its time on
+"""
+
+import os
+import sys
+import time
+import importlib
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+import psutil
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class StartupProfiler:
+    """
+    Records import cost per module and duration per startup phase
+
+    Components that are only needed when enabled are imported through
+    import_attr(), so a disabled web interface or Drive integration never
+    loads Flask or the Google API client. Each timed import also lists the
+    non-standard-library packages it pulled in for the first time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []
+        self.phases = []
+
+    def import_module(self, name: str):
+        """Import a module, timing it if it was not loaded yet"""
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+
+        before = set(sys.modules)
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed = time.perf_counter() - start
+
+        # Packages loaded for the first time, apart from the standard library
+        loaded = {key.split('.')[0] for key in set(sys.modules) - before}
+        loaded -= set(getattr(sys, 'stdlib_module_names', ()))
+        loaded.discard(name.split('.')[0])
+
+        self.imports.append({
+            'module': name,
+            'seconds': elapsed,
+            'loaded': sorted(package for package in loaded if not package.startswith('_'))
+        })
+        return module
+
+    def import_attr(self, module_name: str, attr: str):
+        """Import a module and get one of its attributes"""
+        return getattr(self.import_module(module_name), attr)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time one startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({'phase': name, 'seconds': time.perf_counter() - start})
+
+    def get_report(self) -> Dict[str, Any]:
+        """Get import and phase timings in milliseconds"""
+        report = {
+            'elapsed_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'imports': [
+                {'module': entry['module'], 'ms': round(entry['seconds'] * 1000, 1), 'loaded': entry['loaded']}
+                for entry in sorted(self.imports, key=lambda entry: entry['seconds'], reverse=True)
+            ],
+            'phases': [
+                {'phase': entry['phase'], 'ms': round(entry['seconds'] * 1000, 1)} for entry in self.phases
+            ],
+            'rss_mb': None
+        }
+
+        try:
+            report['rss_mb'] = round(psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024), 1)
+        except psutil.Error:
+            pass
+
+        return report
+
+    def log_report(self, limit: Optional[int] = None):
+        """Log the startup timing report"""
+        report = self.get_report()
+        lines = [f"Startup timing: {report['elapsed_ms']:.0f} ms, RSS {report['rss_mb']} MB"]
+
+        for entry in report['imports'][:limit]:
+            loaded = f" (loaded: {', '.join(entry['loaded'][:8])})" if entry['loaded'] else ""
+            lines.append(f"  import {entry['module']:<32} {entry['ms']:>8.1f} ms{loaded}")
+        for entry in report['phases']:
+            lines.append(f"  phase  {entry['phase']:<32} {entry['ms']:>8.1f} ms")
+
+        logger.info("\n".join(lines))
+
+
+# Shared by main.py and the system manager for the lifetime of the process
+startup_profiler = StartupProfiler()
@@ -0,0 +1,221 @@
+"""
+Thread Watchdog for Iron Dome for Mosquitoes
+Detects worker threads stuck in a work item and hands them to a restart handler
+"""
+
+import sys
+import time
+import threading
+import traceback
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+from utils.logger import LoggerMixin
+
+class Heartbeat:
+    """
+    Progress reported by one worker thread
+
+    A worker calls busy() when it picks up a work item and idle() when it is
+    done, so a thread blocked waiting for work is never considered stalled.
+    Long work items can call beat() to show they are still progressing.
+    A retired worker has been replaced and must exit after its current item.
+    """
+
+    __slots__ = ('name', 'thread_ident', 'stall_timeout', 'on_stall', 'busy_since',
+                 'last_beat', 'items', 'stalled', 'retired')
+
+    def __init__(self, name: str, stall_timeout: float = 0.0,
+                 on_stall: Optional[Callable[['Heartbeat'], Optional[bool]]] = None):
+        self.name = name
+        self.thread_ident = threading.get_ident()
+        self.stall_timeout = stall_timeout
+        self.on_stall = on_stall
+        self.busy_since = None
+        self.last_beat = time.monotonic()
+        self.items = 0
+        self.stalled = False
+        self.retired = False
+
+    def busy(self):
+        """Mark the start of a work item"""
+        self.busy_since = self.last_beat = time.monotonic()
+
+    def beat(self):
+        """Report progress inside a long work item"""
+        self.last_beat = time.monotonic()
+
+    def idle(self):
+        """Mark the end of a work item"""
+        self.busy_since = None
+        self.last_beat = time.monotonic()
+        self.items += 1
+        self.stalled = False
+
+
+class ThreadWatchdog(LoggerMixin):
+    """
+    Heartbeat-based watchdog for worker threads
+
+    A background thread checks every registered heartbeat. A worker that has
+    been busy without a beat for longer than its stall timeout is reported
+    once per stall with a snapshot of its stack, and its on_stall handler is
+    called so the owner can retire it and start a replacement; Python cannot
+    kill a thread, so the stuck one exits whenever its call returns.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__()
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.check_interval = config.get('check_interval', 1.0)
+        self.stall_timeout = config.get('stall_timeout', 30.0)
+        self.max_snapshots = config.get('max_snapshots', 20)
+
+        self.heartbeats = {}
+        self.snapshots = deque(maxlen=self.max_snapshots)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.stats = {
+            'stalls': 0,
+            'restarts': 0,
+            'restart_failures': 0
+        }
+
+    def register(self, name: str, stall_timeout: Optional[float] = None,
+                 on_stall: Optional[Callable[[Heartbeat], Optional[bool]]] = None) -> Heartbeat:
+        """
+        Register the calling thread
+
+        Args:
+            name: Worker name used in reports
+            stall_timeout: Seconds busy without progress before a stall (default from config, 0 = never)
+            on_stall: Called from the watchdog thread with the stalled heartbeat; returns
+                False if it did not restart the worker
+
+        Returns:
+            The worker's heartbeat
+        """
+        heartbeat = Heartbeat(name, self.stall_timeout if stall_timeout is None else stall_timeout, on_stall)
+        with self.lock:
+            self.heartbeats[id(heartbeat)] = heartbeat
+        return heartbeat
+
+    def unregister(self, heartbeat: Heartbeat):
+        """Stop watching a worker that exited"""
+        with self.lock:
+            self.heartbeats.pop(id(heartbeat), None)
+
+    def start(self):
+        """Start the watchdog thread"""
+        if not self.enabled or (self.thread and self.thread.is_alive()):
+            return
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch_loop, name="thread-watchdog", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Thread watchdog started (stall timeout: {self.stall_timeout}s)")
+
+    def _watch_loop(self):
+        """Check heartbeats on a fixed interval"""
+        while not self.stop_event.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Watchdog check failed: {e}")
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """
+        Detect stalled workers and restart them
+
+        Returns:
+            Names of workers found stalled in this check
+        """
+        if now is None:
+            now = time.monotonic()
+
+        with self.lock:
+            heartbeats = list(self.heartbeats.values())
+
+        stalled = []
+        for heartbeat in heartbeats:
+            if (heartbeat.stalled or heartbeat.retired or heartbeat.busy_since is None
+                    or heartbeat.stall_timeout <= 0 or now - heartbeat.last_beat < heartbeat.stall_timeout):
+                continue
+
+            heartbeat.stalled = True
+            stalled.append(heartbeat.name)
+            self._report_stall(heartbeat, now)
+
+            if heartbeat.on_stall:
+                try:
+                    if heartbeat.on_stall(heartbeat) is not False:
+                        with self.lock:
+                            self.stats['restarts'] += 1
+                except Exception as e:
+                    with self.lock:
+                        self.stats['restart_failures'] += 1
+                    self.logger.error(f"Failed to restart stalled worker {heartbeat.name}: {e}")
+
+        return stalled
+
+    def _report_stall(self, heartbeat: Heartbeat, now: float):
+        """Log and keep a stack snapshot of a stalled worker"""
+        frame = sys._current_frames().get(heartbeat.thread_ident)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<thread exited>"
+        busy_since = heartbeat.busy_since
+        busy_for = now - busy_since if busy_since is not None else 0.0
+
+        with self.lock:
+            self.stats['stalls'] += 1
+            self.snapshots.append({
+                'worker': heartbeat.name,
+                'time': time.time(),
+                'busy_seconds': round(busy_for, 1),
+                'stack': stack
+            })
+
+        self.logger.error(
+            f"Worker {heartbeat.name} stalled: busy for {busy_for:.1f}s without progress\n{stack}"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-worker progress and stall history"""
+        now = time.monotonic()
+        with self.lock:
+            workers = {}
+            for heartbeat in self.heartbeats.values():
+                busy_since = heartbeat.busy_since
+                workers[heartbeat.name] = {
+                    'busy': busy_since is not None,
+                    'busy_seconds': round(now - busy_since, 1) if busy_since is not None else 0.0,
+                    'items': heartbeat.items,
+                    'stalled': heartbeat.stalled,
+                    'retired': heartbeat.retired
+                }
+
+            return {
+                'enabled': self.enabled,
+                'stall_timeout': self.stall_timeout,
+                'stalls': self.stats['stalls'],
+                'restarts': self.stats['restarts'],
+                'restart_failures': self.stats['restart_failures'],
+                'stalled_workers': [name for name, worker in workers.items() if worker['stalled']],
+                'workers': workers,
+                'recent_stalls': [
+                    {key: value for key, value in snapshot.items() if key != 'stack'}
+                    for snapshot in self.snapshots
+                ]
+            }
+
+    def get_snapshots(self) -> List[Dict[str, Any]]:
+        """Get recent stall reports including stacks"""
+        with self.lock:
+            return list(self.snapshots)
+
+    def shutdown(self):
+        """Stop the watchdog thread"""
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.check_interval + 1.0)
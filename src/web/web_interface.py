@@ -3,15 +3,18 @@ Web Interface for Iron Dome for Mosquitoes
 Provides real-time monitoring dashboard and API endpoints
 """
 
+import os
+import json
 import threading
 import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from loguru import logger
 from utils.logger import LoggerMixin
+from database.export import EXPORT_FORMATS
 
 class WebInterface(LoggerMixin):
     """Web interface for real-time monitoring and control"""
@@ -84,12 +87,18 @@ class WebInterface(LoggerMixin):
                 return jsonify(self.monitoring_manager.check_health())
             return jsonify({'error': 'Monitoring manager not available'})
         
+        @self.app.route('/api/detector')
+        def api_detector():
+            """Get detector status"""
+            if self.detection_manager:
+                return jsonify(self.detection_manager.get_status())
+            return jsonify({'error': 'Detector not available'})
+        
         @self.app.route('/api/analytics')
         def api_analytics():
             """Get analytics data"""
-            if self.monitoring_manager:
-                return jsonify(self.monitoring_manager.get_analytics_summary())
-            return jsonify({'error': 'Monitoring manager not available'})
+            days = request.args.get('days', 30, type=int)
+            return jsonify(self._get_analytics(days))
         
         @self.app.route('/api/detections')
         def api_detections():
@@ -99,6 +108,60 @@ class WebInterface(LoggerMixin):
                 return jsonify(self.monitoring_manager.get_detection_history(limit))
             return jsonify({'error': 'Monitoring manager not available'})
         
+        @self.app.route('/api/export/<table>')
+        def api_export(table):
+            """Stream a table as NDJSON, CSV or Parquet, optionally limited to the last days or start/end (epoch ms)"""
+            database = self.system_manager.components.get('database') if self.system_manager else None
+            if not database:
+                return jsonify({'error': 'Database not available'}), 503
+            
+            fmt = request.args.get('format', 'ndjson')
+            days = request.args.get('days', 0, type=int)
+            start_ms = request.args.get('start', type=int)
+            end_ms = request.args.get('end', type=int)
+            if start_ms is None and days > 0:
+                start_ms = int((time.time() - days * 86400) * 1000)
+            
+            try:
+                chunks = database.export_stream(fmt, table, start_ms, end_ms)
+            except (ValueError, RuntimeError) as e:
+                return jsonify({'error': str(e)}), 400
+            
+            filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+            return Response(chunks, mimetype=EXPORT_FORMATS[fmt],
+                            headers={'Content-Disposition': f'attachment; filename={filename}'})
+        
+        @self.app.route('/api/metrics')
+        def api_metrics():
+            """Get system metric series over the last hours, optionally for comma-separated names"""
+            database = self.system_manager.components.get('database') if self.system_manager else None
+            if not database:
+                return jsonify({'error': 'Database not available'}), 503
+            names = [name for name in request.args.get('names', '').split(',') if name]
+            hours = request.args.get('hours', 1.0, type=float)
+            max_points = request.args.get('max_points', type=int)
+            return jsonify(database.get_metrics(names or None, hours, max_points))
+        
+        @self.app.route('/api/captures/<path:name>')
+        def api_capture(name):
+            """Serve an archived Phone Link capture by the name it had in the capture folder"""
+            archived_path = self._lookup_capture(name)
+            if not archived_path or not os.path.exists(archived_path):
+                return jsonify({'error': f'Capture {name} not found in the archive'}), 404
+            return send_file(os.path.abspath(archived_path))
+        
+        @self.app.route('/api/traces')
+        def api_traces():
+            """Get recent per-frame traces; format=chrome returns a trace file for Perfetto"""
+            tracer = getattr(self.system_manager, 'tracer', None)
+            if not tracer:
+                return jsonify({'error': 'Frame tracing not available'}), 503
+            limit = request.args.get('limit', 50, type=int)
+            if request.args.get('format') == 'chrome':
+                return Response(json.dumps(tracer.get_chrome_trace(limit)), mimetype='application/json',
+                                headers={'Content-Disposition': 'attachment; filename=frame_traces.json'})
+            return jsonify(tracer.get_traces(limit))
+        
         @self.app.route('/api/performance')
         def api_performance():
             """Get performance metrics"""
@@ -162,8 +225,25 @@ class WebInterface(LoggerMixin):
         @self.socketio.on('request_analytics')
         def handle_analytics_request():
             """Handle analytics request"""
-            if self.monitoring_manager:
-                emit('analytics_data', self.monitoring_manager.get_analytics_summary())
+            emit('analytics_data', self._get_analytics())
+    
+    def _lookup_capture(self, name: str) -> Optional[str]:
+        """Archived path of a capture, from the camera manager or (multi-process mode) the archive index"""
+        components = self.system_manager.components if self.system_manager else {}
+        if 'camera' in components:
+            return components['camera'].lookup_capture(name)
+        if 'captures' in components:
+            return components['captures'].lookup(name)
+        return None
+    
+    def _get_analytics(self, days: int = 30) -> Dict[str, Any]:
+        """Analytics from the database rollups, or from recent history without a database"""
+        database = self.system_manager.components.get('database') if self.system_manager else None
+        if database:
+            return database.get_analytics_summary(days)
+        if self.monitoring_manager:
+            return self.monitoring_manager.get_analytics_summary()
+        return {'error': 'Monitoring manager not available'}
     
     def set_system_references(self, system_manager, monitoring_manager, detection_manager):
         """Set references to system components"""
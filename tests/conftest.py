@@ -0,0 +1,9 @@
+"""
+Test configuration for Iron Dome for Mosquitoes
+Modules are imported from src, as main.py does
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,128 @@
+"""
+Tests for streaming exports: keyset chunking, range filters and encoders
+"""
+
+import io
+import csv
+import json
+import sqlite3
+
+import pytest
+
+from database.connection_pool import ReadConnectionPool
+from database.export import StreamingExport
+from database.partitions import TimePartitions, DAY_MS
+
+DAY_START = 1_700_006_400_000  # a UTC midnight
+COLUMNS = ['id', 'timestamp', 'classes']
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Detections database, filled through a function of timestamps"""
+    db_path = str(tmp_path / 'export.db')
+    connection = sqlite3.connect(db_path)
+    partitions = TimePartitions({'partition_days': 1})
+    partitions.create_catalog(connection.cursor())
+    partitions.load(connection)
+    connection.commit()
+    readers = ReadConnectionPool(db_path, size=2)
+
+    def fill(timestamps):
+        for ts in timestamps:
+            partitions.insert(connection, 'detections', {
+                'timestamp': ts, 'classes': json.dumps([{'class_name': 'mosquito'}]), 'confidence': 0.9
+            })
+        connection.commit()
+        return readers
+
+    yield fill
+    readers.close()
+    connection.close()
+
+
+def test_chunks_split_at_chunk_size(database):
+    export = StreamingExport(database([DAY_START + index for index in range(7)]), chunk_size=3)
+
+    chunks = list(export.chunks('detections', COLUMNS))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert [row[1] for chunk in chunks for row in chunk] == [DAY_START + index for index in range(7)]
+    assert export.rows == 7
+
+
+def test_exact_multiple_of_chunk_size_has_no_empty_chunk(database):
+    export = StreamingExport(database([DAY_START + index for index in range(6)]), chunk_size=3)
+
+    assert [len(chunk) for chunk in export.chunks('detections', COLUMNS)] == [3, 3]
+
+
+def test_equal_timestamps_across_chunk_boundary_are_sent_once(database):
+    # Five rows share one timestamp, so every boundary falls inside the tie
+    timestamps = [DAY_START] * 5 + [DAY_START + 1] * 2
+    export = StreamingExport(database(timestamps), chunk_size=2)
+
+    ids = [row[0] for chunk in export.chunks('detections', COLUMNS) for row in chunk]
+
+    assert len(ids) == 7
+    assert len(set(ids)) == 7
+
+
+def test_chunks_follow_time_then_id_across_partitions(database):
+    # Inserted out of order over three daily partitions
+    timestamps = [DAY_START + 2 * DAY_MS, DAY_START, DAY_START + DAY_MS, DAY_START + 5]
+    export = StreamingExport(database(timestamps), chunk_size=2)
+
+    rows = [row for chunk in export.chunks('detections', COLUMNS) for row in chunk]
+
+    assert [row[1] for row in rows] == sorted(timestamps)
+
+
+def test_range_is_half_open(database):
+    export = StreamingExport(database([DAY_START + index * 1000 for index in range(10)]), chunk_size=4)
+
+    rows = [row for chunk in export.chunks('detections', COLUMNS, DAY_START + 2000, DAY_START + 7000) for row in chunk]
+
+    assert [row[1] for row in rows] == [DAY_START + index * 1000 for index in range(2, 7)]
+
+
+def test_csv_has_header_and_every_row(database):
+    export = StreamingExport(database([DAY_START + index for index in range(5)]), chunk_size=2)
+    output = io.BytesIO()
+
+    result = export.write('csv', output)
+
+    lines = list(csv.reader(io.StringIO(output.getvalue().decode('utf-8'))))
+    assert lines[0][:3] == COLUMNS
+    assert len(lines) == 6
+    assert result == {'rows': 5, 'bytes': len(output.getvalue())}
+
+
+def test_ndjson_decodes_json_columns(database):
+    export = StreamingExport(database([DAY_START, DAY_START + 1, DAY_START + 2]), chunk_size=2)
+    output = io.BytesIO()
+
+    export.write('ndjson', output)
+
+    records = [json.loads(line) for line in output.getvalue().decode('utf-8').splitlines()]
+    assert len(records) == 3
+    assert records[0]['classes'] == [{'class_name': 'mosquito'}]
+
+
+def test_empty_range_exports_header_only(database):
+    export = StreamingExport(database([DAY_START]), chunk_size=2)
+    output = io.BytesIO()
+
+    result = export.write('csv', output, start_ms=DAY_START + DAY_MS)
+
+    assert result['rows'] == 0
+    assert output.getvalue().decode('utf-8').splitlines() == [','.join(name for name, _ in export.columns('detections'))]
+
+
+def test_unknown_format_or_table_raises(database):
+    export = StreamingExport(database([]))
+
+    with pytest.raises(ValueError):
+        export.stream('xml')
+    with pytest.raises(ValueError):
+        export.stream('csv', table='users')
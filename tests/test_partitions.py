@@ -0,0 +1,152 @@
+"""
+Tests for time partitions: routing inserts, ID allocation and retention
+"""
+
+import sqlite3
+
+import pytest
+
+from database.partitions import TimePartitions, DAY_MS
+
+DAY_START = 1_700_006_400_000  # 2023-11-15 00:00 UTC
+
+
+def open_partitions(db_path):
+    connection = sqlite3.connect(db_path)
+    partitions = TimePartitions({'partition_days': 1})
+    partitions.create_catalog(connection.cursor())
+    partitions.load(connection)
+    connection.commit()
+    return connection, partitions
+
+
+def insert_event(connection, partitions, ts, message='event'):
+    row_id = partitions.insert(connection, 'system_events', {
+        'timestamp': ts, 'event_type': 'test', 'message': message, 'severity': 'info'
+    })
+    connection.commit()
+    return row_id
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'partitions.db')
+
+
+def test_insert_routes_rows_to_period_partitions(db_path):
+    connection, partitions = open_partitions(db_path)
+
+    for day in range(3):
+        insert_event(connection, partitions, DAY_START + day * DAY_MS + 1000, f'day {day}')
+
+    for day, name in enumerate(('system_events_p20231115', 'system_events_p20231116', 'system_events_p20231117')):
+        assert partitions.partitions['system_events'][name] == (DAY_START + day * DAY_MS, DAY_START + (day + 1) * DAY_MS)
+        assert connection.execute(f'SELECT message FROM {name}').fetchall() == [(f'day {day}',)]
+    # The view unions every partition
+    messages = connection.execute('SELECT message FROM system_events ORDER BY timestamp').fetchall()
+    assert messages == [('day 0',), ('day 1',), ('day 2',)]
+
+
+def test_ids_are_unique_across_partitions(db_path):
+    connection, partitions = open_partitions(db_path)
+
+    ids = [insert_event(connection, partitions, DAY_START + (index % 3) * DAY_MS) for index in range(9)]
+
+    assert len(set(ids)) == 9
+    assert connection.execute('SELECT COUNT(DISTINCT id) FROM system_events').fetchone()[0] == 9
+
+
+def test_ids_are_unique_across_writers_sharing_the_file(db_path):
+    first_connection, first = open_partitions(db_path)
+    second_connection, second = open_partitions(db_path)
+
+    ids = []
+    for index in range(5):
+        ids.append(insert_event(first_connection, first, DAY_START + index * DAY_MS))
+        ids.append(insert_event(second_connection, second, DAY_START + index * DAY_MS + 1))
+
+    assert len(set(ids)) == 10
+    # Each writer sees the partitions the other created
+    for connection in (first_connection, second_connection):
+        assert connection.execute('SELECT COUNT(*) FROM system_events').fetchone()[0] == 10
+
+
+def test_sequence_survives_reload(db_path):
+    connection, partitions = open_partitions(db_path)
+    last_id = insert_event(connection, partitions, DAY_START)
+    connection.close()
+
+    connection, partitions = open_partitions(db_path)
+
+    assert insert_event(connection, partitions, DAY_START) > last_id
+
+
+def test_load_seeds_sequence_past_existing_rows(db_path):
+    connection, partitions = open_partitions(db_path)
+    insert_event(connection, partitions, DAY_START)
+    # Rows written before the sequences existed
+    connection.execute("INSERT INTO system_events_p20231115 (id, timestamp, event_type) VALUES (500, ?, 'old')", (DAY_START,))
+    connection.execute('DELETE FROM partition_sequences')
+    connection.commit()
+    connection.close()
+
+    connection, partitions = open_partitions(db_path)
+
+    assert insert_event(connection, partitions, DAY_START) == 501
+
+
+def test_insert_without_load_raises(db_path):
+    connection = sqlite3.connect(db_path)
+    partitions = TimePartitions({'partition_days': 1})
+    partitions.create_catalog(connection.cursor())
+
+    with pytest.raises(RuntimeError):
+        partitions.allocate_id(connection, 'system_events')
+
+
+def test_expired_partitions_are_dropped_and_view_updated(db_path):
+    connection, partitions = open_partitions(db_path)
+    for day in range(3):
+        insert_event(connection, partitions, DAY_START + day * DAY_MS, f'day {day}')
+
+    expired = partitions.expired(DAY_START + 2 * DAY_MS)
+    partitions.drop(connection, expired)
+    connection.commit()
+
+    assert sorted(expired) == [('system_events', 'system_events_p20231115'), ('system_events', 'system_events_p20231116')]
+    assert 'system_events_p20231115' not in partitions.partitions['system_events']
+    assert connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'system_events_p20231115'").fetchone()[0] == 0
+    assert connection.execute("SELECT COUNT(*) FROM partitions WHERE name = 'system_events_p20231115'").fetchone()[0] == 0
+    assert connection.execute('SELECT message FROM system_events').fetchall() == [('day 2',)]
+
+
+def test_dropping_every_partition_keeps_view_usable(db_path):
+    connection, partitions = open_partitions(db_path)
+    insert_event(connection, partitions, DAY_START)
+
+    partitions.drop(connection, [('system_events', name) for name in list(partitions.partitions['system_events'])])
+    connection.commit()
+
+    assert connection.execute('SELECT COUNT(*) FROM system_events').fetchone()[0] == 0
+    assert len(partitions.partitions['system_events']) == 1
+    insert_event(connection, partitions, DAY_START)
+    assert connection.execute('SELECT COUNT(*) FROM system_events').fetchone()[0] == 1
+
+
+def test_adopt_moves_unpartitioned_rows(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.execute('CREATE TABLE system_events (id INTEGER PRIMARY KEY, timestamp INTEGER, event_type TEXT, message TEXT)')
+    connection.executemany(
+        'INSERT INTO system_events (timestamp, event_type, message) VALUES (?, ?, ?)',
+        [(DAY_START, 'old', 'a'), (DAY_START + DAY_MS, 'old', 'b')]
+    )
+    partitions = TimePartitions({'partition_days': 1})
+    partitions.create_catalog(connection.cursor())
+
+    assert partitions.adopt(connection, 'system_events') == 2
+    partitions.load(connection)
+    connection.commit()
+
+    assert len(partitions.partitions['system_events']) == 2
+    assert connection.execute('SELECT message FROM system_events ORDER BY timestamp').fetchall() == [('a',), ('b',)]
+    assert insert_event(connection, partitions, DAY_START) == 3
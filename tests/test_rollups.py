@@ -0,0 +1,68 @@
+"""
+Tests for splitting a time window into rollup bucket ranges
+"""
+
+import pytest
+
+from database.rollups import split_range, MINUTE_MS, HOUR_MS, DAY_MS
+
+DAY_START = 1_700_006_400_000  # a UTC midnight
+
+
+def assert_tiles(ranges, start_ms, end_ms, finest=MINUTE_MS):
+    """Ranges must cover [start rounded down to finest, end) with no gaps or overlap"""
+    spans = sorted((first, end) for _, first, end in ranges)
+    assert spans[0][0] == start_ms - start_ms % finest
+    assert spans[-1][1] == end_ms
+    for (_, previous_end), (next_start, _) in zip(spans, spans[1:]):
+        assert previous_end == next_start
+
+
+@pytest.mark.parametrize('start_ms, end_ms', [
+    (DAY_START + 5 * HOUR_MS + 17 * MINUTE_MS + 1234, DAY_START + 30 * DAY_MS + 3 * HOUR_MS + 59 * MINUTE_MS),
+    (DAY_START + 90 * MINUTE_MS, DAY_START + 2 * DAY_MS),
+    (DAY_START, DAY_START + 26 * HOUR_MS + 5 * MINUTE_MS + 7),
+    (DAY_START + 59 * MINUTE_MS, DAY_START + 61 * MINUTE_MS),
+])
+def test_ranges_tile_the_window(start_ms, end_ms):
+    ranges = split_range(start_ms, end_ms)
+
+    assert_tiles(ranges, start_ms, end_ms)
+    for resolution, first, end in ranges:
+        assert first % resolution == 0
+        # Only the range that reaches the requested end may stop mid-bucket
+        assert end % resolution == 0 or end == end_ms
+
+
+def test_day_aligned_window_uses_day_buckets_only():
+    assert split_range(DAY_START, DAY_START + 7 * DAY_MS) == [(DAY_MS, DAY_START, DAY_START + 7 * DAY_MS)]
+
+
+def test_sub_hour_window_uses_minute_buckets_only():
+    start_ms = DAY_START + 10 * MINUTE_MS + 30_000
+    end_ms = DAY_START + 40 * MINUTE_MS
+
+    assert split_range(start_ms, end_ms) == [(MINUTE_MS, DAY_START + 10 * MINUTE_MS, end_ms)]
+
+
+def test_long_window_touches_few_buckets():
+    start_ms = DAY_START + 5 * HOUR_MS + 17 * MINUTE_MS
+    end_ms = start_ms + 30 * DAY_MS
+
+    buckets = sum((end - first) // resolution for resolution, first, end in split_range(start_ms, end_ms))
+
+    assert buckets < 200
+
+
+def test_hour_finest_rounds_start_to_hour():
+    start_ms = DAY_START + 5 * HOUR_MS + 17 * MINUTE_MS
+    end_ms = DAY_START + 2 * DAY_MS
+
+    ranges = split_range(start_ms, end_ms, finest=HOUR_MS)
+
+    assert_tiles(ranges, start_ms, end_ms, finest=HOUR_MS)
+    assert {resolution for resolution, _, _ in ranges} == {HOUR_MS, DAY_MS}
+
+
+def test_empty_window_has_no_ranges():
+    assert split_range(DAY_START, DAY_START) == []
@@ -0,0 +1,109 @@
+"""
+Tests for the shared work queue: leases, acknowledgements and redelivery
+"""
+
+import time
+
+import pytest
+
+from core.work_queue import WorkQueue
+
+
+@pytest.fixture
+def work_queue(tmp_path):
+    work_queue = WorkQueue({'queue_path': str(tmp_path / 'queue.db'), 'lease_seconds': 0.2, 'max_attempts': 2})
+    work_queue.initialize()
+    yield work_queue
+    work_queue.close()
+
+
+def test_lease_serves_highest_priority_first(work_queue):
+    low = work_queue.enqueue({'frame': 'live'}, priority=0)
+    high = work_queue.enqueue({'frame': 'still'}, priority=2)
+
+    items = work_queue.lease('node-a', count=2)
+
+    assert [item['id'] for item in items] == [high, low]
+    assert items[0]['payload'] == {'frame': 'still'}
+    assert items[0]['attempts'] == 1
+
+
+def test_leased_item_is_not_leased_twice(work_queue):
+    work_queue.enqueue({'frame': 1})
+
+    assert len(work_queue.lease('node-a')) == 1
+    assert work_queue.lease('node-b') == []
+
+
+def test_ack_stores_result_and_completes_item(work_queue):
+    item_id = work_queue.enqueue({'frame': 1})
+    work_queue.lease('node-a')
+
+    assert work_queue.ack(item_id, 'node-a', {'detections': 3})
+    assert work_queue.get_result(item_id)['result'] == {'detections': 3}
+    stats = work_queue.get_stats()
+    assert stats['done'] == 1
+    assert stats['completed_per_node'] == {'node-a': 1}
+
+
+def test_expired_lease_is_redelivered_to_another_node(work_queue):
+    item_id = work_queue.enqueue({'frame': 1})
+    work_queue.lease('node-a')
+    time.sleep(0.3)
+
+    items = work_queue.lease('node-b')
+
+    assert [item['id'] for item in items] == [item_id]
+    assert items[0]['attempts'] == 2
+    # The first node lost its lease and can no longer acknowledge
+    assert not work_queue.ack(item_id, 'node-a')
+    assert work_queue.ack(item_id, 'node-b')
+
+
+def test_renewed_lease_does_not_expire(work_queue):
+    work_queue.enqueue({'frame': 1})
+    item_id = work_queue.lease('node-a')[0]['id']
+
+    for _ in range(3):
+        time.sleep(0.1)
+        assert work_queue.renew('node-a', [item_id]) == 1
+
+    assert work_queue.lease('node-b') == []
+
+
+def test_item_goes_dead_after_max_attempts(work_queue):
+    item_id = work_queue.enqueue({'frame': 1})
+    for node in ('node-a', 'node-b'):
+        assert work_queue.lease(node)[0]['id'] == item_id
+        time.sleep(0.3)
+
+    assert work_queue.lease('node-c') == []
+    assert work_queue.get_stats()['dead'] == 1
+
+
+def test_release_returns_item_for_redelivery(work_queue):
+    item_id = work_queue.enqueue({'frame': 1})
+    work_queue.lease('node-a')
+
+    assert work_queue.release(item_id, 'node-a', 'decode failed')
+    assert work_queue.lease('node-b')[0]['id'] == item_id
+
+
+def test_purge_removes_done_and_dead_items_and_returns_payloads(work_queue):
+    done = work_queue.enqueue({'spool_file': 'done.jpg'})
+    work_queue.lease('node-a')
+    work_queue.ack(done, 'node-a')
+    dead = work_queue.enqueue({'spool_file': 'dead.jpg'})
+    work_queue.lease('node-a')
+    work_queue.release(dead, 'node-a')
+    work_queue.lease('node-a')
+    work_queue.release(dead, 'node-a')
+    pending = work_queue.enqueue({'spool_file': 'pending.jpg'})
+
+    payloads = work_queue.purge(0)
+
+    assert sorted(payload['spool_file'] for payload in payloads) == ['dead.jpg', 'done.jpg']
+    assert work_queue.get_result(done) is None
+    stats = work_queue.get_stats()
+    assert (stats['done'], stats['dead'], stats['pending']) == (0, 0, 1)
+    assert work_queue.lease('node-a')[0]['id'] == pending